@@ -1,17 +1,20 @@
 <?php
 /**
  * Editor de Taules de Base de Dades Avançat
- * @description Editor avançat d'estructures BD amb 7 accions: list (totes+predefinides), create (SQL custom/predefinit), describe (estructura+CREATE TABLE), count (registres), drop (confirm=yes obligatori), alter (modifica+mostra actualitzada), execute_sql (arbitrari, SELECT retorna dades). Taules predefinides: Etera (4 taules amb FULLTEXT/JSON/ENUM), CTPonts (reserves). PDO prepared statements. URL decode per SQL custom. Metadata completa: access_info, affected_rows, descriptions. Fallback config 'etera'.
- * @param string $action Acció a realitzar: list, create, describe, count, drop, alter, execute_sql.
+ * @description Editor avançat d'estructures BD amb 10 accions: list (totes+predefinides), create (SQL custom/predefinit), describe (estructura+CREATE TABLE), count (registres), drop (confirm=yes obligatori), alter (modifica+mostra actualitzada), execute_sql (arbitrari, SELECT retorna dades), execute_batch (lot de sentències amb resultat per sentència), file_exists (comprova un fitxer pujat pel seu sha256), capabilities (algorismes de compressió acceptats a sql_file). Taules predefinides: Etera (4 taules amb FULLTEXT/JSON/ENUM), CTPonts (reserves). PDO prepared statements. URL decode per SQL custom. Metadata completa: access_info, affected_rows, descriptions. Fallback config 'etera'.
+ * @param string $action Acció a realitzar: list, create, describe, count, drop, alter, execute_sql, execute_batch, file_exists, capabilities.
  * @param string $config Nom de la configuració de BD a utilitzar (ex: 'fitxar', 'etera', 'ctponts').
  * @param string $table Nom de la taula sobre la qual actuar.
  * @param string $sql Comanda SQL personalitzada i codificada per URL (per a accions com create, alter, execute_sql).
+ * @param string $sql_file Nom d'un fitxer pujat amb upload.php (execute_sql: SQL en text pla; execute_batch: array JSON de sentències).
+ * @param string $transaction Valor '1' per executar el lot d'execute_batch dins d'una transacció.
  * @param string $confirm Valor 'yes' requerit per a accions destructives com 'drop'.
  * @usage table_editor.php?action=list&config=fitxar (llista totes les taules)
  * @usage table_editor.php?action=describe&config=fitxar&table=usuaris (mostra estructura)
  * @usage table_editor.php?action=count&config=fitxar&table=usuaris (compte registres)
  * @usage table_editor.php?action=drop&config=fitxar&table=test&confirm=yes (elimina taula)
  * @usage table_editor.php?action=execute_sql&config=fitxar&sql=SELECT%20*%20FROM%20usuaris (executa SQL)
+ * @usage table_editor.php?action=execute_batch&config=fitxar&sql_file=sql_<sha256>.json&transaction=1 (executa lot)
  * @warning Eina potent que pot modificar/eliminar dades! Usar amb precaució en producció
  * @warning Les accions destructives (drop) requereixen confirm=yes
  * @category Database Management
@@ -19,6 +22,9 @@
  * @note Taules predefinides Etera: etera_literal, etera_context, etera_coneixements, etera_memoria
  * @note Taules predefinides CTPonts: lloguer_pistes
  * @note execute_sql amb SELECT retorna resultats en query_results
+ * @note sql_file inexistent retorna HTTP 404 (el client el torna a pujar)
+ * @note sql_file acabat en .gz (gzip) o .zst (zstd, extensió PHP zstd) es descomprimeix abans d'executar
+ * @note execute_batch retorna batch_results alineat amb l'array d'entrada (affected_rows o error per sentència)
  * @note alter mostra estructura actualitzada després de modificar
  * @note describe inclou CREATE TABLE statement complet
  */
@@ -32,6 +38,44 @@ function loadToolsConfig() {
     return null;
 }
 
+// Fitxers pujats amb upload.php (directori configurable a tools-config.json: upload_dir)
+function getUploadDir() {
+    $tools_config = loadToolsConfig();
+    return rtrim($tools_config['upload_dir'] ?? __DIR__, '/');
+}
+
+function readUploadedFile($file_name) {
+    $path = getUploadDir() . '/' . basename($file_name);
+    if (!is_file($path)) {
+        // Codi 404: el client pot tornar a pujar el fitxer i reintentar
+        throw new Exception("Fitxer pujat no trobat: " . basename($file_name), 404);
+    }
+    $content = file_get_contents($path);
+    
+    // Pujades comprimides per db-insert-utf8 (--compress): es descomprimeixen per l'extensió
+    if (substr($path, -3) === '.gz') {
+        $content = gzdecode($content);
+    } elseif (substr($path, -4) === '.zst') {
+        $content = function_exists('zstd_uncompress') ? zstd_uncompress($content) : false;
+    }
+    if ($content === false) {
+        throw new Exception("No s'ha pogut descomprimir el fitxer pujat: " . basename($file_name));
+    }
+    return $content;
+}
+
+// Algorismes de compressió que readUploadedFile sap descomprimir
+function getSupportedCompression() {
+    $algorithms = [];
+    if (function_exists('gzdecode')) {
+        $algorithms[] = 'gzip';
+    }
+    if (function_exists('zstd_uncompress')) {
+        $algorithms[] = 'zstd';
+    }
+    return $algorithms;
+}
+
 function getDatabaseConfig($config_name = 'etera') {
     // Configuracions per defecte
     $default_configs = [
@@ -190,6 +234,7 @@ $action = $_GET['action'] ?? 'list';
 $table = $_GET['table'] ?? '';
 $config_name = $_GET['config'] ?? 'etera';
 $custom_sql = $_GET['sql'] ?? '';
+$sql_file = $_GET['sql_file'] ?? '';
 
 // Obtenir configuració de BD
 $db_config = getDatabaseConfig($config_name);
@@ -322,11 +367,11 @@ try {
             break;
             
         case 'execute_sql':
-            if (!$custom_sql) {
+            if (!$custom_sql && !$sql_file) {
                 throw new Exception("Cal proporcionar SQL per executar");
             }
             
-            $sql = urldecode($custom_sql);
+            $sql = $custom_sql ? urldecode($custom_sql) : readUploadedFile($sql_file);
             $response['sql_executed'] = $sql;
             
             // Executar la consulta
@@ -344,15 +389,91 @@ try {
             }
             break;
             
+        case 'execute_batch':
+            if (!$sql_file) {
+                throw new Exception("Cal proporcionar sql_file amb el lot de sentències");
+            }
+            
+            $statements = json_decode(readUploadedFile($sql_file), true);
+            if (!is_array($statements)) {
+                throw new Exception("El lot ha de ser un array JSON de sentències SQL");
+            }
+            
+            $use_transaction = ($_GET['transaction'] ?? '') === '1';
+            $batch_results = [];
+            $failed = 0;
+            
+            if ($use_transaction) {
+                $pdo->beginTransaction();
+            }
+            
+            // Una entrada per sentència, en el mateix ordre que l'array d'entrada
+            foreach ($statements as $statement) {
+                try {
+                    $stmt = $pdo->prepare($statement);
+                    $stmt->execute();
+                    $statement_result = ['affected_rows' => $stmt->rowCount()];
+                    
+                    if (stripos(trim($statement), 'SELECT') === 0) {
+                        $statement_result['query_results'] = $stmt->fetchAll(PDO::FETCH_ASSOC);
+                    }
+                    $batch_results[] = $statement_result;
+                } catch (PDOException $e) {
+                    $failed++;
+                    $batch_results[] = ['affected_rows' => 0, 'error' => $e->getMessage()];
+                    
+                    // Dins d'una transacció, el primer error avorta tot el lot
+                    if ($use_transaction) {
+                        break;
+                    }
+                }
+            }
+            
+            if ($use_transaction) {
+                if ($failed > 0) {
+                    $pdo->rollBack();
+                } else {
+                    $pdo->commit();
+                }
+                $response['rolled_back'] = $failed > 0;
+            }
+            
+            $response['message'] = $failed > 0 ? "Lot executat amb $failed error(s)" : "Lot executat correctament";
+            $response['batch_results'] = $batch_results;
+            $response['executed'] = count($batch_results);
+            $response['failed'] = $failed;
+            $response['transaction'] = $use_transaction;
+            break;
+            
+        case 'file_exists':
+            if (!$sql_file) {
+                throw new Exception("Cal proporcionar sql_file");
+            }
+            
+            // Els fitxers de db-insert-utf8 es nomenen pel sha256 del contingut
+            $path = getUploadDir() . '/' . basename($sql_file);
+            $exists = is_file($path);
+            if ($exists && !empty($_GET['sha256'])) {
+                $exists = hash_file('sha256', $path) === strtolower($_GET['sha256']);
+            }
+            
+            $response['file'] = basename($sql_file);
+            $response['exists'] = $exists;
+            break;
+            
+        case 'capabilities':
+            $response['compression'] = getSupportedCompression();
+            break;
+            
         default:
-            throw new Exception("Acció no vàlida. Accions disponibles: list, create, describe, count, drop, alter, execute_sql");
+            throw new Exception("Acció no vàlida. Accions disponibles: list, create, describe, count, drop, alter, execute_sql, execute_batch, file_exists, capabilities");
     }
     
     header('Content-Type: application/json');
     echo json_encode($response, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE);
     
 } catch (Exception $e) {
-    http_response_code(500);
+    http_response_code($e->getCode() === 404 ? 404 : 500);
     header('Content-Type: application/json');
     echo json_encode([
         'error' => $e->getMessage(),
@@ -6,10 +6,14 @@
  * @param string $config Configuració de BD a utilitzar (per defecte: project_manager).
  * @param string $project_id ID del projecte (requerit per get, update, history).
  * @param int $limit Límit de resultats per historial (per defecte: 50).
+ * @param int $since_version Historial: només versions posteriors, en ordre ascendent (exportació incremental).
+ * @param int $since_id Historial amb since_version: cursor de fila, continua després de (since_version, since_id) per paginar dins d'una versió.
  * @usage project_manager.php?action=health&config=project_manager
  * @usage project_manager.php?action=list&config=project_manager
  * @usage project_manager.php?action=get&config=project_manager&project_id=test-project
  * @usage project_manager.php?action=history&config=project_manager&project_id=test-project&limit=20
+ * @usage project_manager.php?action=history&config=project_manager&project_id=test-project&since_version=12&limit=500
+ * @usage project_manager.php?action=history&config=project_manager&project_id=test-project&since_version=14&since_id=3071&limit=500
  * @example URL: https://www.contratemps.org/claudetools/project_manager.php?action=health&config=project_manager
  * @post Create: {"name": "Projecte", "description": "Desc", "template": "custom", "device": "mcp-client"}
  * @post Update: {"currentVersion": 1, "changes": [{"type": "answer_question", "questionId": "q1", "answer": "Resposta"}], "device": "mcp-client"}
@@ -304,18 +308,38 @@ function updateProject($projectId) {
 
 function getProjectHistory($projectId) {
     $limit = isset($_GET['limit']) ? intval($_GET['limit']) : 50;
+    $sinceVersion = isset($_GET['since_version']) ? intval($_GET['since_version']) : null;
+    $sinceId = isset($_GET['since_id']) ? intval($_GET['since_id']) : null;
     
     $conn = getDbConnection();
     if (!$conn) {
         sendJson(['error' => 'Database connection failed'], 500);
     }
     
-    $stmt = $conn->prepare("SELECT version, timestamp, device, change_type, change_data 
-                            FROM version_history 
-                            WHERE project_id = ? 
-                            ORDER BY version DESC 
-                            LIMIT ?");
-    $stmt->bind_param("si", $projectId, $limit);
+    if ($sinceVersion !== null && $sinceId !== null) {
+        // Pàgina següent: cursor de fila (version, id), una versió pot ocupar més d'una pàgina
+        $stmt = $conn->prepare("SELECT id, version, timestamp, device, change_type, change_data 
+                                FROM version_history 
+                                WHERE project_id = ? AND (version > ? OR (version = ? AND id > ?)) 
+                                ORDER BY version ASC, id ASC 
+                                LIMIT ?");
+        $stmt->bind_param("siiii", $projectId, $sinceVersion, $sinceVersion, $sinceId, $limit);
+    } elseif ($sinceVersion !== null) {
+        // Canvis posteriors a una versió, en l'ordre en què es van aplicar (id desempata el timestamp)
+        $stmt = $conn->prepare("SELECT id, version, timestamp, device, change_type, change_data 
+                                FROM version_history 
+                                WHERE project_id = ? AND version > ? 
+                                ORDER BY version ASC, id ASC 
+                                LIMIT ?");
+        $stmt->bind_param("sii", $projectId, $sinceVersion, $limit);
+    } else {
+        $stmt = $conn->prepare("SELECT id, version, timestamp, device, change_type, change_data 
+                                FROM version_history 
+                                WHERE project_id = ? 
+                                ORDER BY version DESC, id DESC 
+                                LIMIT ?");
+        $stmt->bind_param("si", $projectId, $limit);
+    }
     $stmt->execute();
     
     $result = $stmt->get_result();
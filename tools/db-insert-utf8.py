@@ -6,13 +6,30 @@ Eina per executar SQL amb UTF-8 correcte via upload temporal
 Soluciona els problemes d'encoding en URLs llargues
 """
 
+import io
 import os
+import csv
+import gzip
 import sys
 import json
+import math
+import time
+import hashlib
+import threading
+import asyncio
 import argparse
-import tempfile
 import requests
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
+from urllib.parse import urlsplit
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Forçar UTF-8 per stdout/stderr (Windows fix)
 if sys.platform == 'win32':
@@ -21,84 +38,589 @@ if sys.platform == 'win32':
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 
-def execute_sql_utf8(config: str, sql: str, cleanup: bool = False, debug: bool = False) -> dict:
+# Base dels endpoints upload.php i table_editor.php. Es pot canviar amb --base_url
+# o la variable d'entorn DB_INSERT_BASE_URL (p.ex. el servidor local db_insert_standin.py)
+DEFAULT_BASE_URL = 'https://www.contratemps.org/claudetools'
+BASE_URL_ENV = 'DB_INSERT_BASE_URL'
+
+UPLOAD_URL = None
+EXECUTE_URL = None
+
+
+def set_base_url(base_url: str = None) -> str:
     """
-    Executa SQL amb UTF-8 correcte via upload temporal
+    Fixa UPLOAD_URL i EXECUTE_URL a partir d'una URL base.
     
     Args:
-        config: Configuració BD (tutor, etera, ctponts...)
-        sql: SQL a executar
-        cleanup: Si True, esborra el fitxer remot després
-        debug: Si True, mostra informació de debug
+        base_url: URL base (default: DB_INSERT_BASE_URL o DEFAULT_BASE_URL)
     
     Returns:
-        dict amb success, message, result...
+        La URL base efectiva
     """
+    global UPLOAD_URL, EXECUTE_URL
+    base_url = (base_url or os.environ.get(BASE_URL_ENV) or DEFAULT_BASE_URL).rstrip('/')
+    UPLOAD_URL = f"{base_url}/upload.php"
+    EXECUTE_URL = f"{base_url}/table_editor.php"
+    return base_url
+
+
+set_base_url()
+
+# Pool de connexions keep-alive compartit per totes les crides
+DEFAULT_POOL_SIZE = 10
+# Reintents (amb backoff exponencial) per als passos idempotents: upload i cleanup
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUS = (502, 503, 504)
+
+_session = None
+_session_pool_size = None
+
+
+def get_session(pool_size: int = None) -> requests.Session:
+    """
+    Retorna la sessió HTTP compartida (keep-alive, pool de connexions).
     
-    temp_filename = None
+    La sessió es crea una sola vegada per procés; si es demana una mida de
+    pool diferent, es recrea.
     
-    try:
-        # 1. Crear fitxer temporal local
-        temp_file = tempfile.NamedTemporaryFile(
-            mode='w', 
-            encoding='utf-8',
-            suffix='.txt',
-            delete=False,
-            prefix='sql_temp_'
-        )
-        temp_filename = temp_file.name
-        temp_file.write(sql)
-        temp_file.close()
+    Args:
+        pool_size: Connexions màximes per host (default: DEFAULT_POOL_SIZE)
+    """
+    global _session, _session_pool_size
+    
+    pool_size = pool_size or _session_pool_size or DEFAULT_POOL_SIZE
+    if _session is not None and pool_size == _session_pool_size:
+        return _session
+    
+    if _session is not None:
+        _session.close()
+    
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=0
+    )
+    adapter.poolmanager.pool_classes_by_scheme = {
+        'http': _TimedHTTPConnectionPool,
+        'https': _TimedHTTPSConnectionPool
+    }
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    
+    _session = session
+    _session_pool_size = pool_size
+    return session
+
+
+class _ConnectionStats:
+    """Connexions noves (TCP+TLS) obertes durant una operació, i el temps que han costat."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.new_connections = 0
+        self.connect_ms = 0.0
+    
+    def record(self, elapsed_ms: float):
+        with self._lock:
+            self.new_connections += 1
+            self.connect_ms = round(self.connect_ms + elapsed_ms, 2)
+    
+    @property
+    def reused(self) -> bool:
+        return self.new_connections == 0
+
+
+# Comptador actiu de cada fil: les connexions del pool hi anoten cada connect()
+_connection_tracking = threading.local()
+
+
+def _track_connections(stats: Optional[_ConnectionStats]) -> Optional[_ConnectionStats]:
+    """Fa que les connexions noves d'aquest fil s'anotin a stats; retorna el comptador anterior."""
+    previous = getattr(_connection_tracking, 'stats', None)
+    _connection_tracking.stats = stats
+    return previous
+
+
+class _TimedConnectionMixin:
+    """Mesura connect() a la connexió real que fa servir la petició (el pool ho crida només si cal obrir-la)."""
+    
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            stats = getattr(_connection_tracking, 'stats', None)
+            if stats is not None:
+                stats.record(_elapsed_ms(start))
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def _request_with_retry(session: requests.Session, method: str, url: str,
+                        retries: int = 0, debug: bool = False, **kwargs) -> requests.Response:
+    """
+    Fa una petició amb la sessió compartida, reintentant errors transitoris.
+    
+    Només s'ha d'usar amb retries > 0 en passos idempotents (upload, cleanup):
+    execute_sql no es reintenta mai per no duplicar INSERTs.
+    """
+    attempt = 0
+    while True:
+        # Els fitxers oberts s'han de rebobinar abans de reenviar-los
+        for _, file_tuple in (kwargs.get('files') or {}).items():
+            if hasattr(file_tuple[1], 'seek'):
+                file_tuple[1].seek(0)
         
+        try:
+            response = session.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUS or attempt >= retries:
+                return response
+            reason = f"HTTP {response.status_code}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= retries:
+                raise
+            reason = type(e).__name__
+        
+        delay = DEFAULT_BACKOFF * (2 ** attempt)
+        attempt += 1
         if debug:
-            print(f"[DEBUG] Fitxer temporal local: {temp_filename}", file=sys.stderr)
-            print(f"[DEBUG] SQL size: {len(sql)} chars", file=sys.stderr)
+            print(f"[DEBUG] Reintent {attempt}/{retries} de {url} en {delay}s ({reason})", file=sys.stderr)
+        time.sleep(delay)
+
+
+def _elapsed_ms(start: float) -> float:
+    """Mil·lisegons transcorreguts des de start (perf_counter)"""
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+# Els fitxers remots es nomenen pel sha256 del contingut: processos diferents
+# no es trepitgen, i un reintent o repetició pot saltar-se l'upload.
+# Per sota d'aquesta mida és més barat pujar que preguntar al servidor.
+REMOTE_CHECK_MIN_BYTES = 64 * 1024
+
+# Blobs que aquest procés ha pujat i encara no ha esborrat: (upload_url, nom)
+_uploaded_blobs = set()
+_uploaded_blobs_lock = threading.Lock()
+# Feines d'aquest procés que estan fent servir cada blob: (upload_url, nom) -> comptador.
+# Dues feines amb el mateix SQL comparteixen blob; el cleanup només el fa l'última.
+_blob_users = {}
+
+
+def blob_filename(payload: bytes, suffix: str = '.txt') -> Tuple[str, str]:
+    """Nom remot adreçat per contingut: (sql_<sha256[:40]><suffix>, sha256 complet)"""
+    digest = hashlib.sha256(payload).hexdigest()
+    return f"sql_{digest[:40]}{suffix}", digest
+
+
+def _remember_blob(remote_filename: str, present: bool):
+    """Marca (o desmarca) un blob com a present al servidor"""
+    with _uploaded_blobs_lock:
+        if present:
+            _uploaded_blobs.add((UPLOAD_URL, remote_filename))
+        else:
+            _uploaded_blobs.discard((UPLOAD_URL, remote_filename))
+
+
+def _acquire_blob(remote_filename: str):
+    key = (UPLOAD_URL, remote_filename)
+    with _uploaded_blobs_lock:
+        _blob_users[key] = _blob_users.get(key, 0) + 1
+
+
+def _release_blob(remote_filename: str) -> bool:
+    """Allibera un ús del blob; retorna True si ja no el fa servir cap altra feina del procés."""
+    key = (UPLOAD_URL, remote_filename)
+    with _uploaded_blobs_lock:
+        users = _blob_users.get(key, 1) - 1
+        if users > 0:
+            _blob_users[key] = users
+            return False
+        _blob_users.pop(key, None)
+        return True
+
+
+def _blob_already_uploaded(session: requests.Session, remote_filename: str, digest: str,
+                           size: int, debug: bool = False) -> Optional[str]:
+    """
+    Comprova si el servidor ja té el blob, per saltar-se l'upload.
+    
+    Returns:
+        'cache' si aquest procés ja l'ha pujat, 'remote' si el servidor el té
+        (només es pregunta per blobs grans), o None si cal pujar-lo
+    """
+    with _uploaded_blobs_lock:
+        if (UPLOAD_URL, remote_filename) in _uploaded_blobs:
+            return 'cache'
+    
+    if size < REMOTE_CHECK_MIN_BYTES:
+        return None
+    
+    try:
+        params = {'action': 'file_exists', 'sql_file': remote_filename, 'sha256': digest}
+        resp = session.get(EXECUTE_URL, params=params, timeout=10)
+        if resp.status_code == 200 and resp.json().get('exists'):
+            _remember_blob(remote_filename, True)
+            return 'remote'
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if debug:
+            print(f"[DEBUG] No s'ha pogut comprovar el blob remot: {e}", file=sys.stderr)
+    
+    return None
+
+
+def _upload_blob(session: requests.Session, source, remote_filename: str, content_type: str,
+                 retries: int, debug: bool) -> requests.Response:
+    """Puja un blob (bytes o fitxer obert) i el recorda si l'upload és correcte"""
+    files = {'file': (remote_filename, source, content_type)}
+    resp = _request_with_retry(
+        session, 'POST', UPLOAD_URL, retries=retries, debug=debug,
+        files=files, timeout=30
+    )
+    if resp.status_code == 200:
+        try:
+            if resp.json().get('success'):
+                _remember_blob(remote_filename, True)
+        except ValueError:
+            pass
+    return resp
+
+
+def _upload_and_execute(session: requests.Session, source, remote_filename: str, digest: str,
+                        size: int, content_type: str, params: dict, execute_timeout: int,
+                        retries: int, debug: bool, timings: dict) -> Tuple[str, requests.Response, dict]:
+    """
+    Puja el blob si cal i l'executa a table_editor.php.
+    
+    Si el servidor no troba el fitxer en executar (404: una altra feina o un
+    altre procés n'ha fet cleanup, encara que l'acabem de pujar), es torna a
+    pujar i s'executa un cop més: l'execute fallit no ha arribat a executar res.
+    
+    Mentre dura, el blob compta com a usat per aquesta feina: info['last_user']
+    diu si en acabar no el fa servir cap altra feina del procés (només llavors
+    se'n pot fer cleanup).
+    
+    Returns:
+        (pas, resposta, info): pas és 'upload' si ha fallat l'upload, o 'execute'
+    """
+    _acquire_blob(remote_filename)
+    info = {'upload_skipped': False, 'skip_reason': None, 'reuploaded': False, 'last_user': False}
+    try:
+        return _upload_and_execute_blob(session, source, remote_filename, digest, size, content_type,
+                                        params, execute_timeout, retries, debug, timings, info)
+    finally:
+        info['last_user'] = _release_blob(remote_filename)
+
+
+def _upload_and_execute_blob(session: requests.Session, source, remote_filename: str, digest: str,
+                             size: int, content_type: str, params: dict, execute_timeout: int,
+                             retries: int, debug: bool, timings: dict,
+                             info: dict) -> Tuple[str, requests.Response, dict]:
+    skipped = _blob_already_uploaded(session, remote_filename, digest, size, debug)
+    info.update(upload_skipped=skipped is not None, skip_reason=skipped)
+    
+    if skipped is None:
+        start = time.perf_counter()
+        upload_resp = _upload_blob(session, source, remote_filename, content_type, retries, debug)
+        timings['upload'] = timings.get('upload', 0) + _elapsed_ms(start)
+        if (UPLOAD_URL, remote_filename) not in _uploaded_blobs:
+            return 'upload', upload_resp, info
+    elif debug:
+        print(f"[DEBUG] Upload saltat ({skipped}): {remote_filename}", file=sys.stderr)
+    
+    start = time.perf_counter()
+    execute_resp = session.get(EXECUTE_URL, params=params, timeout=execute_timeout)
+    timings['execute'] = timings.get('execute', 0) + _elapsed_ms(start)
+    
+    if execute_resp.status_code == 404:
+        if debug:
+            print(f"[DEBUG] El servidor ja no té {remote_filename}: es torna a pujar", file=sys.stderr)
+        _remember_blob(remote_filename, False)
+        info['reuploaded'] = True
         
-        # 2. Pujar fitxer al servidor
-        upload_url = 'https://www.contratemps.org/claudetools/upload.php'
-        remote_filename = 'temp_sql.txt'
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        start = time.perf_counter()
+        upload_resp = _upload_blob(session, source, remote_filename, content_type, retries, debug)
+        timings['upload'] = timings.get('upload', 0) + _elapsed_ms(start)
+        if (UPLOAD_URL, remote_filename) not in _uploaded_blobs:
+            return 'upload', upload_resp, info
         
-        with open(temp_filename, 'rb') as f:
-            files = {'file': (remote_filename, f, 'text/plain; charset=utf-8')}
-            upload_resp = requests.post(upload_url, files=files, timeout=30)
+        start = time.perf_counter()
+        execute_resp = session.get(EXECUTE_URL, params=params, timeout=execute_timeout)
+        timings['execute'] += _elapsed_ms(start)
+    
+    return 'execute', execute_resp, info
+
+
+def _cleanup_blob(session: requests.Session, remote_filename: str, retries: int, debug: bool) -> bool:
+    """Esborra un blob remot (action=delete_file) i l'oblida de la cache local"""
+    _remember_blob(remote_filename, False)
+    resp = _request_with_retry(
+        session, 'GET', UPLOAD_URL, retries=retries, debug=debug,
+        params={'action': 'delete_file', 'file': remote_filename}, timeout=10
+    )
+    return resp.status_code == 200
+
+
+# Compressió opcional del cos pujat. El nom remot porta l'extensió de l'algorisme
+# i table_editor.php el descomprimeix en llegir-lo (action=capabilities diu quins suporta).
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+# Amb compress='auto' només es comprimeix a partir d'aquesta mida
+DEFAULT_COMPRESS_MIN_BYTES = 8 * 1024
+COMPRESSION_CHOICES = ['none', 'auto', 'gzip', 'zstd']
+# Ample de banda de pujada de referència per estimar el temps estalviat (~8 Mbit/s)
+REFERENCE_UPLOAD_BYTES_PER_S = 1_000_000
+FILE_READ_CHUNK = 1024 * 1024
+
+# Algorismes suportats pel servidor: EXECUTE_URL -> llista
+_server_compression = {}
+
+
+def get_server_compression(session: requests.Session, debug: bool = False) -> List[str]:
+    """Algorismes de descompressió que suporta table_editor.php (cache per procés)"""
+    if EXECUTE_URL in _server_compression:
+        return _server_compression[EXECUTE_URL]
+    
+    algorithms = []
+    try:
+        resp = session.get(EXECUTE_URL, params={'action': 'capabilities'}, timeout=10)
+        if resp.status_code == 200:
+            algorithms = resp.json().get('compression', [])
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if debug:
+            print(f"[DEBUG] No s'han pogut obtenir les capacitats del servidor: {e}", file=sys.stderr)
+    
+    _server_compression[EXECUTE_URL] = algorithms
+    return algorithms
+
+
+def _local_compression() -> List[str]:
+    """Algorismes disponibles localment (zstd només amb el paquet zstandard)"""
+    return ['zstd', 'gzip'] if zstandard is not None else ['gzip']
+
+
+def _resolve_compression(session: requests.Session, requested: Optional[str], size: int,
+                         debug: bool = False) -> Optional[str]:
+    """
+    Decideix l'algorisme a usar segons el que s'ha demanat i el que suporta el servidor.
+    
+    Args:
+        requested: None/'none', 'auto', 'gzip' o 'zstd'
+    """
+    if not requested or requested == 'none':
+        return None
+    if requested == 'auto' and size < DEFAULT_COMPRESS_MIN_BYTES:
+        return None
+    
+    candidates = _local_compression() if requested == 'auto' else [requested]
+    server_algorithms = get_server_compression(session, debug)
+    for algorithm in candidates:
+        if algorithm in server_algorithms and algorithm in _local_compression():
+            return algorithm
+    
+    if debug:
+        print(f"[DEBUG] Compressió '{requested}' no disponible (servidor: {server_algorithms}): s'envia sense comprimir", file=sys.stderr)
+    return None
+
+
+def _compress_chunks(chunks: Iterable[bytes], algorithm: str) -> bytes:
+    """Comprimeix un flux de bytes (gzip amb mtime=0 per ser determinista)"""
+    buffer = io.BytesIO()
+    if algorithm == 'zstd':
+        with zstandard.ZstdCompressor().stream_writer(buffer, closefd=False) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    else:
+        with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    return buffer.getvalue()
+
+
+def _iter_file_chunks(path: str) -> Iterator[bytes]:
+    """Llegeix un fitxer en blocs de FILE_READ_CHUNK"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(FILE_READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _prepare_payload(session: requests.Session, data: Optional[bytes], path: Optional[str],
+                     suffix: str, content_type: str, compress: Optional[str], debug: bool) -> dict:
+    """
+    Prepara el cos a pujar des de memòria o directament des d'un fitxer, sense
+    fitxers temporals locals.
+    
+    Returns:
+        Dict amb source (bytes o ruta), size, remote_filename, digest, content_type
+        i compression (None o dict amb ràtio i temps)
+    """
+    original_size = len(data) if data is not None else os.path.getsize(path)
+    algorithm = _resolve_compression(session, compress, original_size, debug)
+    
+    if algorithm is None:
+        if data is not None:
+            remote_filename, digest = blob_filename(data, suffix)
+            source = data
+        else:
+            hasher = hashlib.sha256()
+            for chunk in _iter_file_chunks(path):
+                hasher.update(chunk)
+            digest = hasher.hexdigest()
+            remote_filename = f"sql_{digest[:40]}{suffix}"
+            source = path
         
-        if upload_resp.status_code != 200:
-            return {
-                "success": False,
-                "error": f"Error pujant fitxer: HTTP {upload_resp.status_code}",
-                "details": upload_resp.text[:500],
-                "step": "upload"
-            }
+        return {
+            'source': source,
+            'size': original_size,
+            'remote_filename': remote_filename,
+            'digest': digest,
+            'content_type': content_type,
+            'compression': None
+        }
+    
+    start = time.perf_counter()
+    chunks = [data] if data is not None else _iter_file_chunks(path)
+    compressed = _compress_chunks(chunks, algorithm)
+    compress_ms = _elapsed_ms(start)
+    remote_filename, digest = blob_filename(compressed, suffix + COMPRESSION_SUFFIXES[algorithm])
+    
+    return {
+        'source': compressed,
+        'size': len(compressed),
+        'remote_filename': remote_filename,
+        'digest': digest,
+        'content_type': 'application/gzip' if algorithm == 'gzip' else 'application/zstd',
+        'compression': {
+            'algorithm': algorithm,
+            **_compression_report(original_size, len(compressed), compress_ms)
+        }
+    }
+
+
+def _compression_report(original_bytes: int, compressed_bytes: int, compress_ms: float) -> dict:
+    """
+    Resum de la compressió amb el temps estalviat estimat: els bytes no enviats
+    a REFERENCE_UPLOAD_BYTES_PER_S menys el temps de comprimir.
+    """
+    saved_bytes = original_bytes - compressed_bytes
+    return {
+        "original_bytes": original_bytes,
+        "compressed_bytes": compressed_bytes,
+        "saved_bytes": saved_bytes,
+        "ratio": round(original_bytes / compressed_bytes, 2) if compressed_bytes else None,
+        "compress_ms": round(compress_ms, 2),
+        "estimated_time_saved_ms": round(saved_bytes * 1000 / REFERENCE_UPLOAD_BYTES_PER_S - compress_ms, 2)
+    }
+
+
+def execute_sql_utf8(config: str, sql: Optional[str], cleanup: bool = False, debug: bool = False,
+                     pool_size: int = None, retries: int = DEFAULT_RETRIES,
+                     compress: str = None, sql_path: str = None) -> dict:
+    """
+    Executa SQL amb UTF-8 correcte via upload temporal
+    
+    Args:
+        config: Configuració BD (tutor, etera, ctponts...)
+        sql: SQL a executar (o None si s'usa sql_path)
+        cleanup: Si True, esborra el fitxer remot després
+        debug: Si True, mostra informació de debug
+        pool_size: Mida del pool de connexions de la sessió compartida
+        retries: Reintents per als passos idempotents (upload i cleanup)
+        compress: None, 'auto', 'gzip' o 'zstd' (si el servidor no ho suporta, s'envia sense comprimir)
+        sql_path: Fitxer .sql local que es puja directament (sense passar per memòria si no es comprimeix)
+    
+    Returns:
+        dict amb success, message, result... i process.timings_ms per fase
+    """
+    
+    timings = {}
+    # Temps de connexió i reutilització, de les connexions que fan servir les peticions
+    connection = _ConnectionStats()
+    previous_tracking = _track_connections(connection)
+    
+    try:
+        session = get_session(pool_size)
         
-        upload_result = upload_resp.json()
+        if sql is None and sql_path is None:
+            raise ValueError("Cal proporcionar sql o sql_path")
         
-        if not upload_result.get('success'):
-            return {
-                "success": False,
-                "error": "Upload fallit",
-                "details": upload_result,
-                "step": "upload"
-            }
+        # 1-2. Preparar el cos a pujar des de memòria o des del fitxer (sense temporals)
+        data = sql.encode('utf-8') if sql is not None else None
+        payload = _prepare_payload(session, data, sql_path, '.txt',
+                                   'text/plain; charset=utf-8', compress, debug)
+        remote_filename = payload['remote_filename']
+        digest = payload['digest']
         
         if debug:
-            print(f"[DEBUG] Upload OK: {upload_result}", file=sys.stderr)
+            print(f"[DEBUG] Origen: {'memòria' if sql is not None else sql_path}", file=sys.stderr)
+            print(f"[DEBUG] SQL size: {payload['compression']['original_bytes'] if payload['compression'] else payload['size']} bytes", file=sys.stderr)
+            if payload['compression']:
+                print(f"[DEBUG] Compressió: {payload['compression']}", file=sys.stderr)
         
         # 3. Executar SQL des del fitxer remot
-        execute_url = 'https://www.contratemps.org/claudetools/table_editor.php'
         params = {
             'action': 'execute_sql',
             'config': config,
             'sql_file': remote_filename
         }
         
-        execute_resp = requests.get(execute_url, params=params, timeout=60)
+        source = payload['source']
+        source_file = open(source, 'rb') if isinstance(source, str) else None
+        try:
+            step, resp, blob_info = _upload_and_execute(
+                session, source_file or source, remote_filename, digest, payload['size'],
+                payload['content_type'], params, 60, retries, debug, timings
+            )
+        finally:
+            if source_file:
+                source_file.close()
         
+        if step == 'upload':
+            if resp.status_code != 200:
+                return {
+                    "success": False,
+                    "error": f"Error pujant fitxer: HTTP {resp.status_code}",
+                    "details": resp.text[:500],
+                    "step": "upload",
+                    "timings_ms": timings
+                }
+            return {
+                "success": False,
+                "error": "Upload fallit",
+                "details": resp.json(),
+                "step": "upload"
+            }
+        
+        if debug and not blob_info['upload_skipped']:
+            print(f"[DEBUG] Upload OK: {remote_filename}", file=sys.stderr)
+        
+        execute_resp = resp
         if execute_resp.status_code != 200:
             return {
                 "success": False,
                 "error": f"Error executant SQL: HTTP {execute_resp.status_code}",
                 "details": execute_resp.text[:500],
-                "step": "execute"
+                "step": "execute",
+                "timings_ms": timings
             }
         
         result = execute_resp.json()
@@ -108,14 +630,14 @@ def execute_sql_utf8(config: str, sql: str, cleanup: bool = False, debug: bool =
         
         # 4. Cleanup remot (opcional)
         cleanup_done = False
-        if cleanup:
+        if cleanup and not blob_info['last_user']:
+            if debug:
+                print(f"[DEBUG] Cleanup ajornat: una altra feina encara usa {remote_filename}", file=sys.stderr)
+        elif cleanup:
             try:
-                cleanup_params = {
-                    'action': 'delete_file',
-                    'file': remote_filename
-                }
-                cleanup_resp = requests.get(upload_url, params=cleanup_params, timeout=10)
-                cleanup_done = cleanup_resp.status_code == 200
+                start = time.perf_counter()
+                cleanup_done = _cleanup_blob(session, remote_filename, retries, debug)
+                timings['cleanup'] = _elapsed_ms(start)
                 
                 if debug:
                     print(f"[DEBUG] Cleanup remot: {cleanup_done}", file=sys.stderr)
@@ -124,6 +646,7 @@ def execute_sql_utf8(config: str, sql: str, cleanup: bool = False, debug: bool =
                     print(f"[DEBUG] Error cleanup remot: {e}", file=sys.stderr)
         
         # 5. Retornar resultat
+        timings['connect'] = connection.connect_ms
         return {
             "success": True,
             "message": result.get('message', 'SQL executat correctament'),
@@ -133,11 +656,18 @@ def execute_sql_utf8(config: str, sql: str, cleanup: bool = False, debug: bool =
             "sql_executed": result.get('sql_executed'),
             "access_info": result.get('access'),
             "process": {
-                "temp_file_local": temp_filename,
+                "temp_file_local": None,
+                "source_file": sql_path,
                 "temp_file_remote": remote_filename,
-                "uploaded": True,
+                "content_sha256": digest,
+                "uploaded": not blob_info['upload_skipped'] or blob_info['reuploaded'],
+                "upload_skipped": blob_info['skip_reason'],
                 "executed": True,
-                "cleanup_remote": cleanup_done
+                "cleanup_remote": cleanup_done,
+                "connection_reused": connection.reused,
+                "bytes_uploaded": payload['size'] if not blob_info['upload_skipped'] or blob_info['reuploaded'] else 0,
+                "compression": payload['compression'],
+                "timings_ms": timings
             }
         }
         
@@ -163,20 +693,744 @@ def execute_sql_utf8(config: str, sql: str, cleanup: bool = False, debug: bool =
             "step": "general",
             "type": type(e).__name__
         }
-        
+    
     finally:
-        # 6. Cleanup local sempre
-        if temp_filename and os.path.exists(temp_filename):
+        _track_connections(previous_tracking)
+
+
+# Límits per defecte d'un lot (chunk) d'execute_batch
+DEFAULT_BATCH_MAX_BYTES = 512 * 1024
+DEFAULT_BATCH_MAX_STATEMENTS = 500
+
+
+def split_sql_statements(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Separa text SQL en sentències pel ';' final, en streaming.
+    
+    Respecta cometes (' " `), escapes amb \\ i comentaris (-- , # i /* */),
+    de manera que un ';' dins d'un string no talla la sentència.
+    
+    Args:
+        pieces: Trossos de text (p.ex. les línies d'un fitxer .sql)
+    
+    Yields:
+        Cada sentència sense el ';' final ni espais als extrems
+    """
+    current = []
+    quote = None
+    escaped = False
+    comment = None
+    previous = ''
+    
+    for piece in pieces:
+        for char in piece:
+            if comment == 'line':
+                if char == '\n':
+                    comment = None
+                    current.append(char)
+                previous = char
+                continue
+            if comment == 'block':
+                if previous == '*' and char == '/':
+                    comment = None
+                    char = ''
+                previous = char
+                continue
+            
+            if quote:
+                current.append(char)
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == quote:
+                    quote = None
+                previous = char
+                continue
+            
+            if char in ("'", '"', '`'):
+                quote = char
+            elif char == '-' and previous == '-':
+                current.pop()
+                comment = 'line'
+                previous = ''
+                continue
+            elif char == '#':
+                comment = 'line'
+                previous = char
+                continue
+            elif char == '*' and previous == '/':
+                current.pop()
+                comment = 'block'
+                previous = ''
+                continue
+            elif char == ';':
+                statement = ''.join(current).strip()
+                if statement:
+                    yield statement
+                current = []
+                previous = char
+                continue
+            
+            current.append(char)
+            previous = char
+    
+    statement = ''.join(current).strip()
+    if statement:
+        yield statement
+
+
+def iter_statements(source) -> Iterator[str]:
+    """
+    Normalitza l'origen d'un lot a un iterador de sentències.
+    
+    Args:
+        source: Llista o generador de sentències, o ruta a un fitxer
+                (.json amb un array de sentències, o .sql separat per ';')
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.lower().endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                yield from json.load(f)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield from split_sql_statements(f)
+        return
+    
+    for statement in source:
+        yield statement
+
+
+def chunk_statements(statements: Iterable[str], max_bytes: int = DEFAULT_BATCH_MAX_BYTES,
+                     max_statements: int = DEFAULT_BATCH_MAX_STATEMENTS) -> Iterator[List[str]]:
+    """
+    Agrupa sentències en lots limitats per mida (bytes UTF-8 en JSON) i per nombre.
+    
+    Una sentència més gran que max_bytes va sola en el seu lot.
+    """
+    chunk = []
+    chunk_bytes = 2  # []
+    
+    for statement in statements:
+        statement_bytes = len(json.dumps(statement, ensure_ascii=False).encode('utf-8')) + 1
+        if chunk and (chunk_bytes + statement_bytes > max_bytes or len(chunk) >= max_statements):
+            yield chunk
+            chunk = []
+            chunk_bytes = 2
+        chunk.append(statement)
+        chunk_bytes += statement_bytes
+    
+    if chunk:
+        yield chunk
+
+
+def _execute_chunk(session: requests.Session, config: str, chunk: List[str], transaction: bool,
+                   cleanup: bool, retries: int, debug: bool,
+                   compress: str = None) -> Tuple[List[dict], dict]:
+    """
+    Puja un lot com a array JSON (nom pel sha256) i l'executa amb execute_batch.
+    
+    Returns:
+        (resultats alineats amb chunk, temps i bytes d'aquest lot)
+    """
+    data = json.dumps(chunk, ensure_ascii=False).encode('utf-8')
+    payload = _prepare_payload(session, data, None, '.json',
+                               'application/json; charset=utf-8', compress, debug)
+    remote_filename = payload['remote_filename']
+    timings = {'upload': 0.0, 'execute': 0.0, 'cleanup': 0.0, 'bytes_uploaded': 0,
+               'bytes_original': len(data), 'bytes_compressed': payload['size'], 'compress': 0.0}
+    if payload['compression']:
+        timings['compress'] = payload['compression']['compress_ms']
+    
+    def chunk_error(message: str) -> Tuple[List[dict], dict]:
+        return [{"success": False, "affected_rows": 0, "error": message} for _ in chunk], timings
+    
+    params = {
+        'action': 'execute_batch',
+        'config': config,
+        'sql_file': remote_filename,
+        'transaction': '1' if transaction else '0'
+    }
+    step, resp, blob_info = _upload_and_execute(
+        session, payload['source'], remote_filename, payload['digest'], payload['size'],
+        payload['content_type'], params, 120, retries, debug, timings
+    )
+    if not blob_info['upload_skipped'] or blob_info['reuploaded']:
+        timings['bytes_uploaded'] = payload['size']
+    
+    if step == 'upload':
+        return chunk_error(f"Error pujant lot: HTTP {resp.status_code} {resp.text[:200]}")
+    execute_resp = resp
+    
+    if cleanup and blob_info['last_user']:
+        start = time.perf_counter()
+        try:
+            _cleanup_blob(session, remote_filename, retries, debug)
+        except requests.exceptions.RequestException as e:
+            if debug:
+                print(f"[DEBUG] Error cleanup remot: {e}", file=sys.stderr)
+        timings['cleanup'] += _elapsed_ms(start)
+    
+    if execute_resp.status_code != 200:
+        return chunk_error(f"Error executant lot: HTTP {execute_resp.status_code} {execute_resp.text[:200]}")
+    
+    result = execute_resp.json()
+    batch_results = result.get('batch_results', [])
+    rolled_back = result.get('rolled_back', False)
+    
+    results = []
+    for i in range(len(chunk)):
+        if i < len(batch_results):
+            item = batch_results[i]
+            entry = {
+                "success": 'error' not in item and not rolled_back,
+                "affected_rows": item.get('affected_rows', 0),
+                "error": item.get('error')
+            }
+            if rolled_back and 'error' not in item:
+                entry["affected_rows"] = 0
+                entry["error"] = "Revertit (rollback del lot)"
+            if 'query_results' in item:
+                entry["query_results"] = item['query_results']
+        else:
+            entry = {
+                "success": False,
+                "affected_rows": 0,
+                "error": "No executat (lot avortat)"
+            }
+        results.append(entry)
+    
+    return results, timings
+
+
+def _merge_timings(total: dict, chunk_timings: dict):
+    """Acumula els temps i bytes d'un lot als totals"""
+    for key, value in chunk_timings.items():
+        total[key] = total.get(key, 0) + value
+
+
+def _batch_compression_report(timings: dict, compress: Optional[str]) -> Optional[dict]:
+    """Treu de timings els comptadors de compressió i en fa el resum de tots els lots"""
+    original = timings.pop('bytes_original', 0)
+    compressed = timings.pop('bytes_compressed', 0)
+    compress_ms = timings.pop('compress', 0.0)
+    if not compress or compress == 'none':
+        return None
+    return {"requested": compress, **_compression_report(original, compressed, compress_ms)}
+
+
+def execute_sql_batch(config: str, statements, transaction: bool = False,
+                      max_bytes: int = DEFAULT_BATCH_MAX_BYTES,
+                      max_statements: int = DEFAULT_BATCH_MAX_STATEMENTS,
+                      stop_on_error: bool = False, cleanup: bool = False, debug: bool = False,
+                      pool_size: int = None, retries: int = DEFAULT_RETRIES,
+                      compress: str = None) -> dict:
+    """
+    Executa moltes sentències empaquetades en lots (un upload + un execute per lot).
+    
+    Args:
+        config: Configuració BD (tutor, etera, ctponts...)
+        statements: Llista/generador de sentències o ruta a fitxer (.json o .sql)
+        transaction: Si True, cada lot s'executa dins d'una transacció (tot o res)
+        max_bytes: Mida màxima d'un lot (bytes del JSON pujat)
+        max_statements: Nombre màxim de sentències per lot
+        stop_on_error: Si True, no s'envien més lots després d'un error
+        cleanup: Si True, esborra el fitxer remot després de cada lot
+        debug: Si True, mostra informació de debug
+        pool_size: Mida del pool de connexions de la sessió compartida
+        retries: Reintents per als passos idempotents (upload i cleanup)
+        compress: None, 'auto', 'gzip' o 'zstd' per comprimir cada lot pujat
+    
+    Returns:
+        dict amb success, totals i results (un per sentència, en l'ordre d'entrada)
+    """
+    timings = {'connect': None, 'upload': 0.0, 'execute': 0.0, 'cleanup': 0.0, 'bytes_uploaded': 0}
+    results = []
+    chunks = 0
+    start_total = time.perf_counter()
+    
+    connection = _ConnectionStats()
+    previous_tracking = _track_connections(connection)
+    try:
+        session = get_session(pool_size)
+        
+        for chunk in chunk_statements(iter_statements(statements), max_bytes, max_statements):
+            chunks += 1
             try:
-                os.unlink(temp_filename)
-                if debug:
-                    print(f"[DEBUG] Cleanup local OK", file=sys.stderr)
-            except Exception as e:
+                chunk_results, chunk_timings = _execute_chunk(session, config, chunk, transaction,
+                                                              cleanup, retries, debug, compress)
+                _merge_timings(timings, chunk_timings)
+            except requests.exceptions.RequestException as e:
+                chunk_results = [{"success": False, "affected_rows": 0, "error": f"Error de xarxa: {e}"}
+                                 for _ in chunk]
+            
+            for entry in chunk_results:
+                entry["index"] = len(results)
+                results.append(entry)
+            
+            if debug:
+                failed_in_chunk = sum(1 for r in chunk_results if not r["success"])
+                print(f"[DEBUG] Lot {chunks}: {len(chunk)} sentències, {failed_in_chunk} errors", file=sys.stderr)
+            
+            if stop_on_error and any(not r["success"] for r in chunk_results):
+                break
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "step": "batch",
+            "type": type(e).__name__,
+            "executed": sum(1 for r in results if r["success"]),
+            "results": results
+        }
+    finally:
+        _track_connections(previous_tracking)
+    
+    timings['connect'] = connection.connect_ms
+    elapsed = time.perf_counter() - start_total
+    failed = sum(1 for r in results if not r["success"])
+    compression = _batch_compression_report(timings, compress)
+    
+    return {
+        "success": failed == 0,
+        "message": f"{len(results) - failed}/{len(results)} sentències executades en {chunks} lot(s)",
+        "total_statements": len(results),
+        "executed": len(results) - failed,
+        "failed": failed,
+        "affected_rows": sum(r["affected_rows"] for r in results),
+        "results": results,
+        "process": {
+            "chunks": chunks,
+            "transaction": transaction,
+            "bytes_uploaded": timings.pop('bytes_uploaded'),
+            "compression": compression,
+            "timings_ms": {k: (round(v, 2) if v is not None else None) for k, v in timings.items()},
+            "elapsed_s": round(elapsed, 3),
+            "statements_per_second": round(len(results) / elapsed, 1) if elapsed > 0 else None
+        }
+    }
+
+
+# Límits per defecte de bulk-insert
+DEFAULT_INSERT_MAX_BYTES = 64 * 1024
+DEFAULT_IN_FLIGHT = 4
+
+# Escapament de literals MySQL (equivalent a mysql_real_escape_string)
+_SQL_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    "'": "\\'",
+    '"': '\\"',
+    '\0': '\\0',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\x1a': '\\Z'
+})
+
+
+def sql_literal(value) -> str:
+    """
+    Converteix un valor Python a literal SQL (MySQL).
+    
+    None -> NULL, bool -> 1/0, números tal qual, dict/list -> JSON, la resta
+    com a string escapat. Els strings es mantenen en UTF-8 (accents i emojis).
+    """
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value) if math.isfinite(value) else 'NULL'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    return "'" + str(value).translate(_SQL_ESCAPES) + "'"
+
+
+def sql_identifier(name: str) -> str:
+    """Cita un nom de taula o columna amb backticks"""
+    return '`' + str(name).replace('`', '``') + '`'
+
+
+def iter_csv_rows(path: str, delimiter: str = ',', null_value: str = None) -> Iterator[dict]:
+    """
+    Llegeix un CSV (amb capçalera) fila a fila.
+    
+    Args:
+        null_value: Si s'indica, les cel·les amb aquest text es converteixen a NULL
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f, delimiter=delimiter):
+            if null_value is not None:
+                row = {k: (None if v == null_value else v) for k, v in row.items()}
+            yield row
+
+
+def iter_jsonl_rows(path: str) -> Iterator[dict]:
+    """Llegeix un JSONL (un objecte per línia) fila a fila"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError(f"Línia {line_number}: cal un objecte JSON per fila")
+            yield row
+
+
+def build_insert_statements(table: str, rows: Iterable[dict], columns: List[str] = None,
+                            max_bytes: int = DEFAULT_INSERT_MAX_BYTES,
+                            ignore: bool = False) -> Iterator[Tuple[str, int]]:
+    """
+    Converteix files en INSERTs multi-fila limitats per mida (bytes UTF-8).
+    
+    Args:
+        table: Taula destí
+        rows: Iterable de dicts (columna -> valor)
+        columns: Columnes a inserir (default: les claus de la primera fila)
+        max_bytes: Mida màxima de cada sentència; una fila més gran va sola
+        ignore: Si True, genera INSERT IGNORE
+    
+    Yields:
+        (sentència, nombre de files que conté)
+    """
+    prefix = None
+    parts = []
+    size = 0
+    
+    for row in rows:
+        if prefix is None:
+            columns = list(columns or row.keys())
+            verb = 'INSERT IGNORE INTO' if ignore else 'INSERT INTO'
+            column_list = ', '.join(sql_identifier(c) for c in columns)
+            prefix = f"{verb} {sql_identifier(table)} ({column_list}) VALUES "
+            size = len(prefix.encode('utf-8'))
+            base_size = size
+        
+        values = '(' + ', '.join(sql_literal(row.get(c)) for c in columns) + ')'
+        values_size = len(values.encode('utf-8')) + 1
+        
+        if parts and size + values_size > max_bytes:
+            yield prefix + ','.join(parts), len(parts)
+            parts = []
+            size = base_size
+        
+        parts.append(values)
+        size += values_size
+    
+    if parts:
+        yield prefix + ','.join(parts), len(parts)
+
+
+def execute_bulk_insert(config: str, table: str, file: str, file_format: str = None,
+                        columns: List[str] = None, delimiter: str = ',', null_value: str = None,
+                        ignore: bool = False, max_statement_bytes: int = DEFAULT_INSERT_MAX_BYTES,
+                        max_chunk_bytes: int = DEFAULT_BATCH_MAX_BYTES, in_flight: int = DEFAULT_IN_FLIGHT,
+                        transaction: bool = False, stop_on_error: bool = False, cleanup: bool = False,
+                        debug: bool = False, pool_size: int = None,
+                        retries: int = DEFAULT_RETRIES, compress: str = None) -> dict:
+    """
+    Insereix un CSV o JSONL sencer amb INSERTs multi-fila, en streaming.
+    
+    Pipeline de generadors: files -> INSERTs limitats per bytes -> lots -> upload
+    + execute_batch, amb fins a in_flight lots en vol. La memòria és constant
+    (com a molt in_flight lots a la vegada) sigui quina sigui la mida del fitxer.
+    
+    Args:
+        config: Configuració BD (tutor, etera, ctponts...)
+        table: Taula destí
+        file: Fitxer .csv o .jsonl
+        file_format: 'csv' o 'jsonl' (default: per extensió)
+        columns: Columnes a inserir (default: capçalera / claus de la primera fila)
+        delimiter: Separador del CSV
+        null_value: Text del CSV que s'insereix com a NULL
+        ignore: Si True, INSERT IGNORE
+        max_statement_bytes: Mida màxima de cada INSERT
+        max_chunk_bytes: Mida màxima de cada lot pujat
+        in_flight: Lots en vol simultanis
+        transaction: Si True, cada lot s'executa dins d'una transacció
+        stop_on_error: Si True, no s'envien més lots després d'un error
+        compress: None, 'auto', 'gzip' o 'zstd' per comprimir cada lot pujat
+    
+    Returns:
+        dict amb success, files llegides/inserides, errors (els primers 20) i temps
+    """
+    file_format = (file_format or os.path.splitext(file)[1].lstrip('.')).lower()
+    if file_format == 'csv':
+        rows = iter_csv_rows(file, delimiter=delimiter, null_value=null_value)
+    elif file_format in ('jsonl', 'ndjson'):
+        rows = iter_jsonl_rows(file)
+    else:
+        return {
+            "success": False,
+            "error": f"Format no suportat: '{file_format}' (cal csv o jsonl)",
+            "step": "read"
+        }
+    
+    totals = {"rows": 0, "statements": 0, "chunks": 0, "affected_rows": 0, "failed_statements": 0}
+    timings = {'connect': None}
+    errors = []
+    start_total = time.perf_counter()
+    
+    try:
+        session = get_session(max(pool_size or DEFAULT_POOL_SIZE, in_flight))
+        connection = _ConnectionStats()
+        
+        statements = build_insert_statements(table, rows, columns, max_statement_bytes, ignore)
+        
+        def counted(statements_with_rows):
+            for statement, row_count in statements_with_rows:
+                totals["rows"] += row_count
+                yield statement
+        
+        chunks = chunk_statements(counted(statements), max_chunk_bytes, DEFAULT_BATCH_MAX_STATEMENTS)
+        
+        with ThreadPoolExecutor(max_workers=in_flight, initializer=_track_connections,
+                                initargs=(connection,)) as executor:
+            pending = {}
+            stop = False
+            
+            def collect(done_futures):
+                nonlocal stop
+                for future in done_futures:
+                    chunk = pending.pop(future)
+                    try:
+                        chunk_results, chunk_timings = future.result()
+                        _merge_timings(timings, chunk_timings)
+                    except requests.exceptions.RequestException as e:
+                        chunk_results = [{"success": False, "affected_rows": 0, "error": f"Error de xarxa: {e}"}
+                                         for _ in chunk]
+                    
+                    for statement, entry in zip(chunk, chunk_results):
+                        totals["affected_rows"] += entry["affected_rows"]
+                        if not entry["success"]:
+                            totals["failed_statements"] += 1
+                            if len(errors) < 20:
+                                errors.append({
+                                    "chunk": chunk.number,
+                                    "error": entry["error"],
+                                    "statement_preview": statement[:200]
+                                })
+                            if stop_on_error:
+                                stop = True
+            
+            for chunk in chunks:
+                totals["chunks"] += 1
+                totals["statements"] += len(chunk)
+                chunk = _NumberedChunk(chunk, totals["chunks"])
+                future = executor.submit(_execute_chunk, session, config, chunk, transaction,
+                                         cleanup, retries, debug, compress)
+                pending[future] = chunk
+                
+                # Limitar els lots en vol: esperar que n'acabi algun
+                if len(pending) >= in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                
                 if debug:
-                    print(f"[DEBUG] Error cleanup local: {e}", file=sys.stderr)
+                    print(f"[DEBUG] Lot {chunk.number} enviat ({len(chunk)} INSERTs, {totals['rows']} files llegides)", file=sys.stderr)
+                
+                if stop:
+                    break
+            
+            done, _ = wait(pending)
+            collect(done)
+    
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "step": "bulk_insert",
+            "type": type(e).__name__,
+            **totals,
+            "errors": errors
+        }
+    
+    timings['connect'] = connection.connect_ms
+    elapsed = time.perf_counter() - start_total
+    bytes_uploaded = timings.pop('bytes_uploaded', 0)
+    compression = _batch_compression_report(timings, compress)
+    
+    return {
+        "success": totals["failed_statements"] == 0,
+        "message": f"{totals['rows']} files llegides, {totals['affected_rows']} inserides en {totals['statements']} INSERTs",
+        "table": table,
+        "rows_read": totals["rows"],
+        "affected_rows": totals["affected_rows"],
+        "statements": totals["statements"],
+        "failed_statements": totals["failed_statements"],
+        "errors": errors,
+        "process": {
+            "chunks": totals["chunks"],
+            "in_flight": in_flight,
+            "transaction": transaction,
+            "bytes_uploaded": bytes_uploaded,
+            "compression": compression,
+            "timings_ms": {k: (round(v, 2) if v is not None else None) for k, v in timings.items()},
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_second": round(totals["rows"] / elapsed, 1) if elapsed > 0 else None
+        }
+    }
+
+
+class _NumberedChunk(list):
+    """Lot de sentències amb el seu número d'ordre (per als errors)"""
+    
+    def __init__(self, statements: List[str], number: int):
+        super().__init__(statements)
+        self.number = number
+
+
+# Executor concurrent de feines SQL independents (execute-many)
+DEFAULT_CONCURRENCY = 8
+# Passos d'error que indiquen un problema de transport/servidor (no de l'SQL)
+FATAL_STEPS = ('upload', 'request', 'general')
 
 
-def test_connection(config: str = 'tutor') -> dict:
+class _HostRateLimiter:
+    """Limita les feines que comencen per segon a cada host (slots espaiats 1/rate)"""
+    
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._locks = {}
+    
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def load_jobs(path: str) -> List[dict]:
+    """
+    Llegeix feines d'un fitxer .json (array) o .jsonl (una per línia).
+    
+    Cada feina és {"config": ..., "sql": ...} o {"config": ..., "file": "ruta.sql"}.
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            jobs = [json.loads(line) for line in f if line.strip()]
+        else:
+            jobs = json.load(f)
+    
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError("Cal una llista de feines {config, sql|file}")
+    return jobs
+
+
+async def execute_many_async(jobs: List[dict], concurrency: int = DEFAULT_CONCURRENCY,
+                             rate_per_host: float = None, stop_on_error: bool = False,
+                             cleanup: bool = False, debug: bool = False, pool_size: int = None,
+                             retries: int = DEFAULT_RETRIES, compress: str = None) -> dict:
+    """
+    Executa moltes feines SQL independents en paral·lel, contra una o més configs.
+    
+    Cada feina és un execute_sql_utf8 complet (upload + execute + cleanup) que
+    s'executa en un fil; asyncio controla quantes n'hi ha en vol, el ritme per
+    host i la cancel·lació. Les feines que ja han començat acaben sempre (l'SQL
+    pot haver arribat al servidor); només es cancel·len les que encara esperen.
+    
+    Args:
+        jobs: Llista de {"config": ..., "sql": ...} o {"config": ..., "file": ...}
+        concurrency: Feines en vol simultànies
+        rate_per_host: Feines màximes que comencen per segon a cada host (None: sense límit)
+        stop_on_error: Si True, qualsevol error cancel·la les pendents; si False,
+            només els errors fatals (upload, xarxa) ho fan i els errors d'SQL no
+        cleanup, debug, retries, compress: Com a execute_sql_utf8
+        pool_size: Connexions keep-alive (default: max(DEFAULT_POOL_SIZE, concurrency))
+    
+    Returns:
+        dict amb success, totals i results en el mateix ordre que jobs
+    """
+    concurrency = max(1, concurrency)
+    pool_size = max(pool_size or DEFAULT_POOL_SIZE, concurrency)
+    get_session(pool_size)
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = _HostRateLimiter(rate_per_host)
+    host = urlsplit(EXECUTE_URL).netloc
+    abort = asyncio.Event()
+    first_error = {}
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='execute-many')
+    
+    async def run_job(index: int, job: dict) -> dict:
+        config = job.get('config')
+        entry = {"index": index, "config": config}
+        if not config or not (job.get('sql') or job.get('file')):
+            return {**entry, "success": False, "error": "Cada feina necessita config i sql o file",
+                    "step": "validate"}
+        
+        async with semaphore:
+            await limiter.wait(host)
+            if abort.is_set():
+                return {**entry, "success": False, "cancelled": True,
+                        "error": f"Cancel·lada per l'error de la feina {first_error.get('index')}"}
+            
+            start = time.perf_counter()
+            result = await loop.run_in_executor(executor, lambda: execute_sql_utf8(
+                config, job.get('sql'), cleanup=cleanup, debug=debug, pool_size=pool_size,
+                retries=retries, compress=compress, sql_path=job.get('file')
+            ))
+        
+        entry.update(result)
+        entry["duration_ms"] = _elapsed_ms(start)
+        if not result.get('success') and (stop_on_error or result.get('step') in FATAL_STEPS):
+            if not abort.is_set():
+                first_error.update(index=index, config=config, error=result.get('error'))
+                abort.set()
+            if debug:
+                print(f"[DEBUG] Error a la feina {index} ({config}): es cancel·len les pendents", file=sys.stderr)
+        return entry
+    
+    start_total = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(run_job(i, job) for i, job in enumerate(jobs)))
+    finally:
+        executor.shutdown(wait=True)
+    elapsed = time.perf_counter() - start_total
+    
+    succeeded = sum(1 for r in results if r.get('success'))
+    cancelled = sum(1 for r in results if r.get('cancelled'))
+    per_config = {}
+    for r in results:
+        counts = per_config.setdefault(r["config"], {"succeeded": 0, "failed": 0, "cancelled": 0})
+        key = "succeeded" if r.get('success') else "cancelled" if r.get('cancelled') else "failed"
+        counts[key] += 1
+    
+    return {
+        "success": succeeded == len(results),
+        "message": f"{succeeded}/{len(results)} feines correctes ({cancelled} cancel·lades) en {round(elapsed, 2)}s",
+        "total_jobs": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded - cancelled,
+        "cancelled": cancelled,
+        "first_error": first_error or None,
+        "per_config": per_config,
+        "results": list(results),
+        "process": {
+            "concurrency": concurrency,
+            "rate_per_host": rate_per_host,
+            "elapsed_s": round(elapsed, 3),
+            "jobs_per_second": round(len(results) / elapsed, 1) if elapsed > 0 else None
+        }
+    }
+
+
+def execute_many(jobs: List[dict], **kwargs) -> dict:
+    """Versió síncrona d'execute_many_async (mateixos arguments)"""
+    return asyncio.run(execute_many_async(jobs, **kwargs))
+
+
+def test_connection(config: str = 'tutor', pool_size: int = None) -> dict:
     """
     Testa la connexió executant un SELECT simple
     """
@@ -186,7 +1440,8 @@ def test_connection(config: str = 'tutor') -> dict:
         config=config,
         sql=test_sql,
         cleanup=True,
-        debug=False
+        debug=False,
+        pool_size=pool_size
     )
     
     if result.get('success'):
@@ -201,7 +1456,8 @@ def test_connection(config: str = 'tutor') -> dict:
                 "message": "Test de connexió OK",
                 "utf8_working": utf8_ok,
                 "emoji_working": emoji_ok,
-                "test_results": first_row
+                "test_results": first_row,
+                "timings_ms": result['process']['timings_ms']
             }
     
     return {
@@ -211,7 +1467,161 @@ def test_connection(config: str = 'tutor') -> dict:
     }
 
 
-if __name__ == "__main__":
+TOOL_INFO = {
+    "nom": "db-insert-utf8",
+    "versio": "1.4",
+    "que_fa": "Executa SQL amb UTF-8 correcte via upload temporal, solucionant problemes d'encoding en URLs llargues i permetent executar SQLs de qualsevol mida.",
+    "com_ho_fa": "1) Prepara el cos des de memòria o directament des del fitxer .sql (sense temporals locals; opcionalment comprimit amb gzip/zstd si el servidor ho suporta), 2) Puja al servidor via upload.php amb nom pel sha256 del contingut (sql_<hash>.txt; se salta si el servidor ja el té), 3) Crida table_editor.php amb sql_file=<nom>, 4) Retorna resultat. Totes les peticions comparteixen una sessió HTTP amb pool de connexions keep-alive; upload i cleanup es reintenten amb backoff.",
+    "que_necessita": [
+        {
+            "nom": "config",
+            "tipus": "string",
+            "descripcio": "Configuració BD (tutor, etera, ctponts...)"
+        },
+        {
+            "nom": "sql",
+            "tipus": "string",
+            "descripcio": "SQL a executar (INSERT, UPDATE, SELECT, DELETE...)"
+        },
+        {
+            "nom": "cleanup",
+            "tipus": "string",
+            "descripcio": "true/false - Esborrar fitxer remot després (opcional, default: false)"
+        },
+        {
+            "nom": "debug",
+            "tipus": "string",
+            "descripcio": "true/false - Mostrar info debug (opcional, default: false)"
+        },
+        {
+            "nom": "base_url",
+            "tipus": "string",
+            "descripcio": "(Opcional, abans de la comanda) URL base de upload.php i table_editor.php (default: $DB_INSERT_BASE_URL o https://www.contratemps.org/claudetools). Per provar en local: db_insert_standin.py"
+        },
+        {
+            "nom": "pool_size",
+            "tipus": "integer",
+            "descripcio": "(Opcional) Connexions keep-alive màximes per host (default: 10)"
+        },
+        {
+            "nom": "retries",
+            "tipus": "integer",
+            "descripcio": "(Opcional) Reintents amb backoff per upload i cleanup (default: 3). execute_sql no es reintenta mai."
+        },
+        {
+            "nom": "file",
+            "tipus": "string",
+            "descripcio": "(batch) Fitxer .sql amb sentències separades per ; o .json amb un array de sentències"
+        },
+        {
+            "nom": "transaction",
+            "tipus": "boolean",
+            "descripcio": "(batch, opcional) Executar cada lot dins d'una transacció"
+        },
+        {
+            "nom": "max_bytes",
+            "tipus": "integer",
+            "descripcio": "(batch, opcional) Mida màxima d'un lot (default: 524288)"
+        },
+        {
+            "nom": "max_statements",
+            "tipus": "integer",
+            "descripcio": "(batch, opcional) Sentències màximes per lot (default: 500)"
+        },
+        {
+            "nom": "stop_on_error",
+            "tipus": "boolean",
+            "descripcio": "(batch, opcional) Aturar després del primer lot amb errors"
+        },
+        {
+            "nom": "compress",
+            "tipus": "string",
+            "descripcio": "(Opcional) none/auto/gzip/zstd - Comprimir el cos pujat; si el servidor no ho suporta s'envia sense comprimir (auto: a partir de 8 KB)"
+        },
+        {
+            "nom": "jobs",
+            "tipus": "string",
+            "descripcio": "(execute-many) Fitxer .json/.jsonl amb feines {config, sql|file}; alternativa: --configs tutor,etera --sql ..."
+        },
+        {
+            "nom": "concurrency",
+            "tipus": "integer",
+            "descripcio": "(execute-many, opcional) Feines en vol simultànies (default: 8)"
+        },
+        {
+            "nom": "rate",
+            "tipus": "number",
+            "descripcio": "(execute-many, opcional) Feines màximes que comencen per segon a cada host"
+        },
+        {
+            "nom": "table",
+            "tipus": "string",
+            "descripcio": "(bulk-insert) Taula destí"
+        },
+        {
+            "nom": "columns",
+            "tipus": "string",
+            "descripcio": "(bulk-insert, opcional) Columnes separades per comes (default: capçalera del CSV / claus de la primera fila)"
+        },
+        {
+            "nom": "in_flight",
+            "tipus": "integer",
+            "descripcio": "(bulk-insert, opcional) Lots en vol simultanis (default: 4)"
+        }
+    ],
+    "que_retorna": "Objecte JSON amb success (bool), message (str), affected_rows (int), query_results (array si SELECT), i informació del procés (process.timings_ms amb connect, upload, execute i cleanup, i process.compression amb ràtio i temps estalviat estimat si es comprimeix).",
+    "funcions_disponibles": [
+        {
+            "nom": "execute",
+            "descripcio": "Executa SQL amb UTF-8 correcte.",
+            "parametres": ["config", "sql", "cleanup", "debug", "pool_size", "retries", "compress"]
+        },
+        {
+            "nom": "execute-file",
+            "descripcio": "Executa un fitxer .sql pujant-lo directament des del disc (sense còpia temporal ni carregar-lo sencer a memòria si no es comprimeix).",
+            "parametres": ["config", "file", "cleanup", "debug", "pool_size", "compress"]
+        },
+        {
+            "nom": "batch",
+            "descripcio": "Executa un fitxer de sentències (.sql o .json) en lots limitats per mida: un upload i un execute_batch per lot, amb affected_rows/error per sentència alineat amb l'entrada i sentències/segon.",
+            "parametres": ["config", "file", "transaction", "max_bytes", "max_statements", "stop_on_error", "cleanup", "debug", "pool_size", "compress"]
+        },
+        {
+            "nom": "bulk-insert",
+            "descripcio": "Insereix un fitxer CSV o JSONL en una taula amb INSERTs multi-fila limitats per bytes, llegint en streaming (memòria constant) i amb N lots en vol.",
+            "parametres": ["config", "table", "file", "format", "columns", "delimiter", "null_value", "ignore", "max_statement_bytes", "max_chunk_bytes", "in_flight", "transaction", "stop_on_error", "cleanup", "debug", "compress"]
+        },
+        {
+            "nom": "execute-many",
+            "descripcio": "Executa moltes feines SQL independents en paral·lel (asyncio) contra una o més configs, amb límit de concurrència, ritme per host, resultats en l'ordre d'entrada i cancel·lació de les pendents al primer error fatal (upload/xarxa) o a qualsevol error amb --stop_on_error.",
+            "parametres": ["jobs", "configs", "sql", "file", "concurrency", "rate", "stop_on_error", "cleanup", "debug", "compress"]
+        },
+        {
+            "nom": "test",
+            "descripcio": "Testa la connexió i verifica que UTF-8 funciona correctament.",
+            "parametres": ["config", "pool_size"]
+        }
+    ],
+    "avantatges": [
+        "UTF-8 perfecte (accents, emojis, caràcters especials)",
+        "Sense límit de mida (SQLs de MB si cal)",
+        "Autònom (Claude pot fer tot el procés)",
+        "Consum mínim de tokens (només SQL, no Base64)",
+        "Retrocompatible (no afecta altres eines)"
+    ],
+    "dependències": [
+        "requests (pip install requests)",
+        "zstandard (opcional, per a --compress zstd)"
+    ],
+    "endpoints": [
+        "https://www.contratemps.org/claudetools/upload.php",
+        "https://www.contratemps.org/claudetools/table_editor.php (execute_sql, execute_batch, capabilities)"
+    ]
+}
+
+
+def main(argv=None):
+    """Punt d'entrada CLI (argv=None llegeix sys.argv)"""
     parser = argparse.ArgumentParser(
         description="Eina per executar SQL amb UTF-8 correcte via upload temporal."
     )
@@ -221,6 +1631,12 @@ if __name__ == "__main__":
         action="store_true", 
         help="Mostra la informació d'autodescripció de la tool."
     )
+    parser.add_argument(
+        "--base_url",
+        type=str,
+        default=None,
+        help=f"URL base de upload.php i table_editor.php (default: ${BASE_URL_ENV} o {DEFAULT_BASE_URL})"
+    )
 
     subparsers = parser.add_subparsers(dest="command", help="Comandes disponibles")
 
@@ -253,6 +1669,286 @@ if __name__ == "__main__":
         default='false',
         help="true/false - Mostrar info debug (opcional)"
     )
+    parser_execute.add_argument(
+        "--pool_size",
+        type=int,
+        default=None,
+        help=f"Connexions keep-alive màximes per host (default: {DEFAULT_POOL_SIZE})"
+    )
+    parser_execute.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f"Reintents per upload i cleanup (default: {DEFAULT_RETRIES})"
+    )
+    parser_execute.add_argument(
+        "--compress",
+        type=str,
+        choices=COMPRESSION_CHOICES,
+        default=None,
+        help="Comprimir el cos pujat (auto: només si és prou gran i el servidor ho suporta)"
+    )
+
+    # Subparser per a execute-file
+    parser_execute_file = subparsers.add_parser(
+        "execute-file",
+        help="Executa un fitxer .sql pujant-lo directament (sense còpia temporal)."
+    )
+    parser_execute_file.add_argument(
+        "config",
+        type=str,
+        help="Configuració BD (tutor, etera, ctponts...)"
+    )
+    parser_execute_file.add_argument(
+        "file",
+        type=str,
+        help="Fitxer .sql a executar"
+    )
+    parser_execute_file.add_argument(
+        "--cleanup",
+        action="store_true",
+        help="Esborrar el fitxer remot després"
+    )
+    parser_execute_file.add_argument(
+        "--debug",
+        action="store_true",
+        help="Mostrar info debug"
+    )
+    parser_execute_file.add_argument(
+        "--pool_size",
+        type=int,
+        default=None,
+        help=f"Connexions keep-alive màximes per host (default: {DEFAULT_POOL_SIZE})"
+    )
+    parser_execute_file.add_argument(
+        "--compress",
+        type=str,
+        choices=COMPRESSION_CHOICES,
+        default=None,
+        help="Comprimir el cos pujat (auto: només si és prou gran i el servidor ho suporta)"
+    )
+
+    # Subparser per a batch
+    parser_batch = subparsers.add_parser(
+        "batch",
+        help="Executa un fitxer de sentències en lots (un upload per lot)."
+    )
+    parser_batch.add_argument(
+        "config",
+        type=str,
+        help="Configuració BD (tutor, etera, ctponts...)"
+    )
+    parser_batch.add_argument(
+        "file",
+        type=str,
+        help="Fitxer .sql (sentències separades per ;) o .json (array de sentències)"
+    )
+    parser_batch.add_argument(
+        "--transaction",
+        action="store_true",
+        help="Executar cada lot dins d'una transacció (tot o res)"
+    )
+    parser_batch.add_argument(
+        "--max_bytes",
+        type=int,
+        default=DEFAULT_BATCH_MAX_BYTES,
+        help=f"Mida màxima d'un lot en bytes (default: {DEFAULT_BATCH_MAX_BYTES})"
+    )
+    parser_batch.add_argument(
+        "--max_statements",
+        type=int,
+        default=DEFAULT_BATCH_MAX_STATEMENTS,
+        help=f"Sentències màximes per lot (default: {DEFAULT_BATCH_MAX_STATEMENTS})"
+    )
+    parser_batch.add_argument(
+        "--stop_on_error",
+        action="store_true",
+        help="No enviar més lots després del primer error"
+    )
+    parser_batch.add_argument(
+        "--cleanup",
+        action="store_true",
+        help="Esborrar el fitxer remot després de cada lot"
+    )
+    parser_batch.add_argument(
+        "--debug",
+        action="store_true",
+        help="Mostrar info debug"
+    )
+    parser_batch.add_argument(
+        "--pool_size",
+        type=int,
+        default=None,
+        help=f"Connexions keep-alive màximes per host (default: {DEFAULT_POOL_SIZE})"
+    )
+    parser_batch.add_argument(
+        "--compress",
+        type=str,
+        choices=COMPRESSION_CHOICES,
+        default=None,
+        help="Comprimir el cos pujat (auto: només si és prou gran i el servidor ho suporta)"
+    )
+
+    # Subparser per a bulk-insert
+    parser_bulk = subparsers.add_parser(
+        "bulk-insert",
+        help="Insereix un CSV/JSONL amb INSERTs multi-fila en streaming."
+    )
+    parser_bulk.add_argument(
+        "config",
+        type=str,
+        help="Configuració BD (tutor, etera, ctponts...)"
+    )
+    parser_bulk.add_argument(
+        "table",
+        type=str,
+        help="Taula destí"
+    )
+    parser_bulk.add_argument(
+        "file",
+        type=str,
+        help="Fitxer .csv (amb capçalera) o .jsonl (un objecte per línia)"
+    )
+    parser_bulk.add_argument(
+        "--format",
+        type=str,
+        choices=["csv", "jsonl"],
+        default=None,
+        help="Format del fitxer (default: per extensió)"
+    )
+    parser_bulk.add_argument(
+        "--columns",
+        type=str,
+        default=None,
+        help="Columnes a inserir separades per comes (default: capçalera)"
+    )
+    parser_bulk.add_argument(
+        "--delimiter",
+        type=str,
+        default=",",
+        help="Separador del CSV (default: ,)"
+    )
+    parser_bulk.add_argument(
+        "--null_value",
+        type=str,
+        default=None,
+        help="Text del CSV que s'insereix com a NULL (ex: \\N)"
+    )
+    parser_bulk.add_argument(
+        "--ignore",
+        action="store_true",
+        help="Generar INSERT IGNORE"
+    )
+    parser_bulk.add_argument(
+        "--max_statement_bytes",
+        type=int,
+        default=DEFAULT_INSERT_MAX_BYTES,
+        help=f"Mida màxima de cada INSERT (default: {DEFAULT_INSERT_MAX_BYTES})"
+    )
+    parser_bulk.add_argument(
+        "--max_chunk_bytes",
+        type=int,
+        default=DEFAULT_BATCH_MAX_BYTES,
+        help=f"Mida màxima de cada lot pujat (default: {DEFAULT_BATCH_MAX_BYTES})"
+    )
+    parser_bulk.add_argument(
+        "--in_flight",
+        type=int,
+        default=DEFAULT_IN_FLIGHT,
+        help=f"Lots en vol simultanis (default: {DEFAULT_IN_FLIGHT})"
+    )
+    parser_bulk.add_argument(
+        "--transaction",
+        action="store_true",
+        help="Executar cada lot dins d'una transacció"
+    )
+    parser_bulk.add_argument(
+        "--stop_on_error",
+        action="store_true",
+        help="No enviar més lots després del primer error"
+    )
+    parser_bulk.add_argument(
+        "--cleanup",
+        action="store_true",
+        help="Esborrar el fitxer remot després de cada lot"
+    )
+    parser_bulk.add_argument(
+        "--debug",
+        action="store_true",
+        help="Mostrar info debug"
+    )
+    parser_bulk.add_argument(
+        "--compress",
+        type=str,
+        choices=COMPRESSION_CHOICES,
+        default=None,
+        help="Comprimir el cos pujat (auto: només si és prou gran i el servidor ho suporta)"
+    )
+
+    # Subparser per a execute-many
+    parser_many = subparsers.add_parser(
+        "execute-many",
+        help="Executa moltes feines SQL independents en paral·lel (una o més configs)."
+    )
+    parser_many.add_argument(
+        "jobs",
+        type=str,
+        nargs='?',
+        default=None,
+        help="Fitxer .json/.jsonl amb feines {config, sql|file} (o usar --configs i --sql)"
+    )
+    parser_many.add_argument(
+        "--configs",
+        type=str,
+        default=None,
+        help="Configs separades per comes on executar el mateix --sql/--file (ex: tutor,etera,ctponts)"
+    )
+    parser_many.add_argument(
+        "--sql",
+        type=str,
+        default=None,
+        help="SQL a executar a cada config de --configs"
+    )
+    parser_many.add_argument(
+        "--file",
+        type=str,
+        default=None,
+        help="Fitxer .sql a executar a cada config de --configs"
+    )
+    parser_many.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Feines en vol simultànies (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser_many.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Feines màximes que comencen per segon a cada host (default: sense límit)"
+    )
+    parser_many.add_argument(
+        "--stop_on_error",
+        action="store_true",
+        help="Cancel·lar les feines pendents al primer error (també d'SQL)"
+    )
+    parser_many.add_argument(
+        "--cleanup",
+        action="store_true",
+        help="Esborrar el fitxer remot després de cada feina"
+    )
+    parser_many.add_argument(
+        "--debug",
+        action="store_true",
+        help="Mostrar info debug"
+    )
+    parser_many.add_argument(
+        "--compress",
+        type=str,
+        choices=COMPRESSION_CHOICES,
+        default=None,
+        help="Comprimir el cos pujat (auto: només si és prou gran i el servidor ho suporta)"
+    )
 
     # Subparser per a test (ARGUMENT POSICIONAL)
     parser_test = subparsers.add_parser(
@@ -266,66 +1962,18 @@ if __name__ == "__main__":
         default="tutor",
         help="Configuració BD (opcional, default: tutor)"
     )
+    parser_test.add_argument(
+        "--pool_size",
+        type=int,
+        default=None,
+        help=f"Connexions keep-alive màximes per host (default: {DEFAULT_POOL_SIZE})"
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    set_base_url(args.base_url)
 
     if args.info:
-        tool_info = {
-            "nom": "db-insert-utf8",
-            "versio": "1.1",
-            "que_fa": "Executa SQL amb UTF-8 correcte via upload temporal, solucionant problemes d'encoding en URLs llargues i permetent executar SQLs de qualsevol mida.",
-            "com_ho_fa": "1) Crea fitxer temporal local amb SQL, 2) Puja fitxer al servidor via upload.php, 3) Crida table_editor.php amb sql_file=temp_sql.txt, 4) Retorna resultat, 5) Neteja fitxers temporals.",
-            "que_necessita": [
-                {
-                    "nom": "config",
-                    "tipus": "string",
-                    "descripcio": "Configuració BD (tutor, etera, ctponts...)"
-                },
-                {
-                    "nom": "sql",
-                    "tipus": "string",
-                    "descripcio": "SQL a executar (INSERT, UPDATE, SELECT, DELETE...)"
-                },
-                {
-                    "nom": "cleanup",
-                    "tipus": "string",
-                    "descripcio": "true/false - Esborrar fitxer remot després (opcional, default: false)"
-                },
-                {
-                    "nom": "debug",
-                    "tipus": "string",
-                    "descripcio": "true/false - Mostrar info debug (opcional, default: false)"
-                }
-            ],
-            "que_retorna": "Objecte JSON amb success (bool), message (str), affected_rows (int), query_results (array si SELECT), i informació del procés.",
-            "funcions_disponibles": [
-                {
-                    "nom": "execute",
-                    "descripcio": "Executa SQL amb UTF-8 correcte.",
-                    "parametres": ["config", "sql", "cleanup", "debug"]
-                },
-                {
-                    "nom": "test",
-                    "descripcio": "Testa la connexió i verifica que UTF-8 funciona correctament.",
-                    "parametres": ["config"]
-                }
-            ],
-            "avantatges": [
-                "UTF-8 perfecte (accents, emojis, caràcters especials)",
-                "Sense límit de mida (SQLs de MB si cal)",
-                "Autònom (Claude pot fer tot el procés)",
-                "Consum mínim de tokens (només SQL, no Base64)",
-                "Retrocompatible (no afecta altres eines)"
-            ],
-            "dependències": [
-                "requests (pip install requests)"
-            ],
-            "endpoints": [
-                "https://www.contratemps.org/claudetools/upload.php",
-                "https://www.contratemps.org/claudetools/table_editor.php"
-            ]
-        }
-        print(json.dumps(tool_info, indent=2, ensure_ascii=False))
+        print(json.dumps(TOOL_INFO, indent=2, ensure_ascii=False))
         
     elif args.command == "execute":
         # Convertir strings "true"/"false" a booleans
@@ -336,13 +1984,88 @@ if __name__ == "__main__":
             config=args.config,
             sql=args.sql,
             cleanup=cleanup_bool,
-            debug=debug_bool
+            debug=debug_bool,
+            pool_size=args.pool_size,
+            retries=args.retries,
+            compress=args.compress
+        )
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        
+    elif args.command == "execute-file":
+        result = execute_sql_utf8(
+            config=args.config,
+            sql=None,
+            sql_path=args.file,
+            cleanup=args.cleanup,
+            debug=args.debug,
+            pool_size=args.pool_size,
+            compress=args.compress
+        )
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        
+    elif args.command == "batch":
+        result = execute_sql_batch(
+            config=args.config,
+            statements=args.file,
+            transaction=args.transaction,
+            max_bytes=args.max_bytes,
+            max_statements=args.max_statements,
+            stop_on_error=args.stop_on_error,
+            cleanup=args.cleanup,
+            debug=args.debug,
+            pool_size=args.pool_size,
+            compress=args.compress
+        )
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        
+    elif args.command == "bulk-insert":
+        result = execute_bulk_insert(
+            config=args.config,
+            table=args.table,
+            file=args.file,
+            file_format=args.format,
+            columns=args.columns.split(',') if args.columns else None,
+            delimiter=args.delimiter,
+            null_value=args.null_value,
+            ignore=args.ignore,
+            max_statement_bytes=args.max_statement_bytes,
+            max_chunk_bytes=args.max_chunk_bytes,
+            in_flight=args.in_flight,
+            transaction=args.transaction,
+            stop_on_error=args.stop_on_error,
+            cleanup=args.cleanup,
+            debug=args.debug,
+            compress=args.compress
+        )
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        
+    elif args.command == "execute-many":
+        if args.jobs:
+            jobs = load_jobs(args.jobs)
+        elif args.configs and (args.sql or args.file):
+            jobs = [{"config": c.strip(), "sql": args.sql, "file": args.file}
+                    for c in args.configs.split(',') if c.strip()]
+        else:
+            parser_many.error("cal un fitxer de feines o --configs amb --sql/--file")
+        
+        result = execute_many(
+            jobs,
+            concurrency=args.concurrency,
+            rate_per_host=args.rate,
+            stop_on_error=args.stop_on_error,
+            cleanup=args.cleanup,
+            debug=args.debug,
+            compress=args.compress
         )
         print(json.dumps(result, indent=2, ensure_ascii=False))
         
     elif args.command == "test":
-        result = test_connection(config=args.config)
+        result = test_connection(config=args.config, pool_size=args.pool_size)
         print(json.dumps(result, indent=2, ensure_ascii=False))
         
     else:
         parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DB Insert Benchmark
+Mesura db-insert-utf8.py en mode single, batch i concurrent
+
+Per defecte arrenca el servidor local db_insert_standin.py (SQLite) en el
+mateix procés, de manera que no es toca producció:
+
+    python db_insert_benchmark.py run --statements 500 --concurrency 8
+    python db_insert_benchmark.py run --base_url http://127.0.0.1:8765 --modes batch
+
+Per a cada mode retorna sentències/segon, percentils de latència per petició
+i mides de payload (bytes pujats).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+# Forçar UTF-8 per stdout/stderr (Windows fix)
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BENCH_TABLE = 'bench_rows'
+MODES = ['single', 'batch', 'concurrent']
+DEFAULT_STATEMENTS = 500
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONCURRENCY = 8
+DEFAULT_ROW_BYTES = 100
+
+
+def _load_module(module_name: str, file_name: str):
+    """Importa una tool pel nom de fitxer (db-insert-utf8 porta guions)"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(TOOLS_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentiles(values: List[float]) -> dict:
+    """Resum de latències (ms): p50, p90, p99 (nearest-rank), mitjana i màxim"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p):
+        index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+        return round(ordered[index], 2)
+
+    return {
+        "p50": rank(50),
+        "p90": rank(90),
+        "p99": rank(99),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2)
+    }
+
+
+def make_statements(count: int, row_bytes: int, offset: int = 0) -> List[str]:
+    """INSERTs d'una fila amb text UTF-8 (accents i emojis) de ~row_bytes bytes"""
+    filler = ('àèéíòú·💙 ' * (row_bytes // 8 + 1)).encode('utf-8')[:row_bytes].decode('utf-8', 'ignore')
+    return [
+        f"INSERT INTO {BENCH_TABLE} (id, payload) VALUES ({offset + i}, '{filler} {offset + i}')"
+        for i in range(count)
+    ]
+
+
+def _summary(mode: str, statements: int, requests_done: int, elapsed: float,
+             latencies: List[float], bytes_uploaded: int, failed: int, **extra) -> dict:
+    return {
+        "mode": mode,
+        "statements": statements,
+        "requests": requests_done,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 3),
+        "statements_per_second": round(statements / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": percentiles(latencies),
+        "payload": {
+            "bytes_uploaded": bytes_uploaded,
+            "bytes_per_request": round(bytes_uploaded / requests_done) if requests_done else 0,
+            "bytes_per_statement": round(bytes_uploaded / statements) if statements else 0
+        },
+        **extra
+    }
+
+
+def bench_single(dbi, config: str, statements: List[str], compress: str = None) -> dict:
+    """Una petició (upload + execute_sql) per sentència, en sèrie"""
+    latencies = []
+    uploaded = 0
+    failed = 0
+    start = time.perf_counter()
+    for sql in statements:
+        call_start = time.perf_counter()
+        result = dbi.execute_sql_utf8(config, sql, compress=compress)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+        if result.get('success'):
+            uploaded += result['process'].get('bytes_uploaded', 0)
+        else:
+            failed += 1
+    return _summary('single', len(statements), len(statements), time.perf_counter() - start,
+                    latencies, uploaded, failed)
+
+
+def bench_batch(dbi, config: str, statements: List[str], batch_size: int,
+                transaction: bool = False, compress: str = None) -> dict:
+    """Lots de batch_size sentències (un upload + execute_batch per lot)"""
+    latencies = []
+    uploaded = 0
+    failed = 0
+    requests_done = 0
+    start = time.perf_counter()
+    for i in range(0, len(statements), batch_size):
+        chunk = statements[i:i + batch_size]
+        call_start = time.perf_counter()
+        result = dbi.execute_sql_batch(config, chunk, transaction=transaction,
+                                       max_statements=batch_size, compress=compress)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+        requests_done += 1
+        failed += result.get('failed', len(chunk))
+        uploaded += result.get('process', {}).get('bytes_uploaded', 0)
+    return _summary('batch', len(statements), requests_done, time.perf_counter() - start,
+                    latencies, uploaded, failed, batch_size=batch_size, transaction=transaction)
+
+
+def bench_concurrent(dbi, config: str, statements: List[str], concurrency: int,
+                     compress: str = None) -> dict:
+    """Una petició per sentència amb concurrency peticions en vol (sessió compartida)"""
+    dbi.get_session(max(concurrency, dbi.DEFAULT_POOL_SIZE))
+
+    def run(sql):
+        call_start = time.perf_counter()
+        result = dbi.execute_sql_utf8(config, sql, pool_size=max(concurrency, dbi.DEFAULT_POOL_SIZE),
+                                      compress=compress)
+        return (time.perf_counter() - call_start) * 1000, result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(run, statements))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _ in outcomes]
+    uploaded = sum(r['process'].get('bytes_uploaded', 0) for _, r in outcomes if r.get('success'))
+    failed = sum(1 for _, r in outcomes if not r.get('success'))
+    return _summary('concurrent', len(statements), len(statements), elapsed,
+                    latencies, uploaded, failed, concurrency=concurrency)
+
+
+def run_benchmark(modes: List[str] = None, statements: int = DEFAULT_STATEMENTS,
+                  batch_size: int = DEFAULT_BATCH_SIZE, concurrency: int = DEFAULT_CONCURRENCY,
+                  row_bytes: int = DEFAULT_ROW_BYTES, config: str = 'bench', base_url: str = None,
+                  transaction: bool = False, compress: str = None) -> dict:
+    """
+    Executa els modes demanats contra base_url, o contra un servidor local
+    db_insert_standin arrencat per a l'ocasió si base_url és None.
+
+    Args:
+        modes: Subconjunt de single, batch, concurrent (default: tots)
+        statements: Sentències (INSERTs d'una fila) per mode
+        batch_size: Sentències per lot en mode batch
+        concurrency: Peticions en vol en mode concurrent
+        row_bytes: Mida aproximada del text de cada fila
+        config: Configuració BD (al servidor local, nom del fitxer SQLite)
+        base_url: URL base de upload.php/table_editor.php (None: servidor local)
+        transaction: Lots transaccionals en mode batch
+        compress: Compressió de db-insert-utf8 (none, auto, gzip, zstd)
+
+    Returns:
+        dict amb success, base_url i un resum per mode
+    """
+    modes = modes or MODES
+    dbi = _load_module('pm_tool_db_insert_utf8', 'db-insert-utf8.py')
+    server = None
+
+    try:
+        if base_url is None:
+            standin = _load_module('pm_tool_db_insert_standin', 'db_insert_standin.py')
+            server = standin.start_server(port=0)
+            base_url = standin.base_url(server)
+        dbi.set_base_url(base_url)
+
+        setup = dbi.execute_sql_batch(config, [
+            f"DROP TABLE IF EXISTS {BENCH_TABLE}",
+            f"CREATE TABLE {BENCH_TABLE} (id INTEGER, payload TEXT)"
+        ])
+        if not setup.get('success'):
+            return {"success": False, "error": "No s'ha pogut crear la taula de benchmark",
+                    "step": "setup", "details": setup}
+
+        results = {}
+        offset = 0
+        for mode in modes:
+            batch = make_statements(statements, row_bytes, offset)
+            offset += statements
+            if mode == 'single':
+                results[mode] = bench_single(dbi, config, batch, compress)
+            elif mode == 'batch':
+                results[mode] = bench_batch(dbi, config, batch, batch_size, transaction, compress)
+            elif mode == 'concurrent':
+                results[mode] = bench_concurrent(dbi, config, batch, concurrency, compress)
+            else:
+                return {"success": False, "error": f"Mode desconegut: {mode}. Disponibles: {', '.join(MODES)}"}
+
+        count = dbi.execute_sql_utf8(config, f"SELECT COUNT(*) AS total FROM {BENCH_TABLE}")
+        rows_in_table = (count.get('query_results') or [{}])[0].get('total')
+
+        return {
+            "success": all(r["failed"] == 0 for r in results.values()) and rows_in_table == offset,
+            "base_url": base_url,
+            "local_standin": server is not None,
+            "statement_bytes": len(batch[0].encode('utf-8')) if statements else 0,
+            "rows_expected": offset,
+            "rows_in_table": rows_in_table,
+            "results": results
+        }
+
+    finally:
+        if server is not None:
+            standin.stop_server(server)
+
+
+TOOL_INFO = {
+    "nom": "db_insert_benchmark",
+    "versio": "1.0",
+    "que_fa": "Benchmark de db-insert-utf8 en mode single (una petició per sentència), batch (lots) i concurrent (N peticions en vol).",
+    "com_ho_fa": "Crea la taula bench_rows, executa N INSERTs d'una fila per mode i mesura sentències/segon, latència per petició (p50/p90/p99) i bytes pujats. Sense --base_url arrenca db_insert_standin (SQLite) en el mateix procés.",
+    "que_necessita": [
+        {
+            "nom": "modes",
+            "tipus": "string",
+            "descripcio": "(Opcional) Modes separats per comes: single,batch,concurrent (default: tots)"
+        },
+        {
+            "nom": "statements",
+            "tipus": "integer",
+            "descripcio": f"(Opcional) Sentències per mode (default: {DEFAULT_STATEMENTS})"
+        },
+        {
+            "nom": "batch_size",
+            "tipus": "integer",
+            "descripcio": f"(Opcional) Sentències per lot en mode batch (default: {DEFAULT_BATCH_SIZE})"
+        },
+        {
+            "nom": "concurrency",
+            "tipus": "integer",
+            "descripcio": f"(Opcional) Peticions en vol en mode concurrent (default: {DEFAULT_CONCURRENCY})"
+        },
+        {
+            "nom": "base_url",
+            "tipus": "string",
+            "descripcio": "(Opcional) Servidor a mesurar; sense valor s'usa el servidor local SQLite. Compte: contra producció escriu a la taula bench_rows."
+        }
+    ],
+    "que_retorna": "JSON amb success, base_url i, per mode: statements_per_second, latency_ms (p50, p90, p99, mean, max), payload (bytes_uploaded, bytes_per_request, bytes_per_statement) i failed.",
+    "funcions_disponibles": [
+        {
+            "nom": "run",
+            "descripcio": "Executa el benchmark.",
+            "parametres": ["modes", "statements", "batch_size", "concurrency", "row_bytes", "config", "base_url", "transaction", "compress"]
+        }
+    ]
+}
+
+
+def main(argv=None):
+    """Punt d'entrada CLI (argv=None llegeix sys.argv)"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark de db-insert-utf8 (single, batch, concurrent)."
+    )
+    parser.add_argument(
+        "--info",
+        action="store_true",
+        help="Mostra la informació d'autodescripció de la tool."
+    )
+
+    subparsers = parser.add_subparsers(dest="command", help="Comandes disponibles")
+
+    parser_run = subparsers.add_parser(
+        "run",
+        help="Executa el benchmark."
+    )
+    parser_run.add_argument(
+        "--modes",
+        type=str,
+        default=','.join(MODES),
+        help=f"Modes separats per comes (default: {','.join(MODES)})"
+    )
+    parser_run.add_argument(
+        "--statements",
+        type=int,
+        default=DEFAULT_STATEMENTS,
+        help=f"Sentències per mode (default: {DEFAULT_STATEMENTS})"
+    )
+    parser_run.add_argument(
+        "--batch_size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Sentències per lot (default: {DEFAULT_BATCH_SIZE})"
+    )
+    parser_run.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Peticions en vol (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser_run.add_argument(
+        "--row_bytes",
+        type=int,
+        default=DEFAULT_ROW_BYTES,
+        help=f"Mida aproximada del text de cada fila (default: {DEFAULT_ROW_BYTES})"
+    )
+    parser_run.add_argument(
+        "--config",
+        type=str,
+        default="bench",
+        help="Configuració BD (default: bench)"
+    )
+    parser_run.add_argument(
+        "--base_url",
+        type=str,
+        default=None,
+        help="URL base a mesurar (default: servidor local SQLite)"
+    )
+    parser_run.add_argument(
+        "--transaction",
+        action="store_true",
+        help="Lots transaccionals en mode batch"
+    )
+    parser_run.add_argument(
+        "--compress",
+        type=str,
+        choices=['none', 'auto', 'gzip', 'zstd'],
+        default=None,
+        help="Compressió del cos pujat"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.info:
+        print(json.dumps(TOOL_INFO, indent=2, ensure_ascii=False))
+
+    elif args.command == "run":
+        result = run_benchmark(
+            modes=[m.strip() for m in args.modes.split(',') if m.strip()],
+            statements=args.statements,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            row_bytes=args.row_bytes,
+            config=args.config,
+            base_url=args.base_url,
+            transaction=args.transaction,
+            compress=args.compress
+        )
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
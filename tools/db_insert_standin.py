@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DB Insert Stand-in
+Servidor local que imita upload.php i table_editor.php amb SQLite
+
+Permet provar i mesurar db-insert-utf8.py sense tocar producció:
+
+    python db_insert_standin.py serve --port 8765
+    python db-insert-utf8.py --base_url http://127.0.0.1:8765 execute bench "SELECT 1"
+
+Contractes implementats (mateixa forma JSON que els PHP):
+- POST upload.php (multipart, camp 'file') i upload.php?action=delete_file&file=<nom>
+- table_editor.php?action=execute_sql | execute_batch | file_exists | capabilities
+
+Cada config és una base de dades SQLite (<data_dir>/<config>.sqlite). Els
+literals amb escapaments MySQL (\\' \\n ...) que genera db-insert-utf8 es
+tradueixen a SQLite abans d'executar.
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import time
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+import threading
+import email.parser
+import email.policy
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Forçar UTF-8 per stdout/stderr (Windows fix)
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Escapaments de MySQL dins de literals de text
+_MYSQL_ESCAPES = {
+    '0': '\0', "'": "'", '"': '"', 'b': '\b', 'n': '\n',
+    'r': '\r', 't': '\t', 'Z': '\x1a', '\\': '\\'
+}
+_INSERT_IGNORE = re.compile(r'^\s*INSERT\s+IGNORE\s+INTO\b', re.IGNORECASE)
+
+
+def mysql_to_sqlite(sql: str) -> str:
+    """
+    Tradueix el dialecte MySQL que genera db-insert-utf8 a SQLite.
+
+    - Literals '...' i "..." amb escapaments \\ -> literals SQLite ('' per a ')
+    - INSERT IGNORE -> INSERT OR IGNORE
+    Els identificadors amb backticks els accepta SQLite tal qual.
+    """
+    sql = _INSERT_IGNORE.sub('INSERT OR IGNORE INTO', sql, count=1)
+
+    out = []
+    i = 0
+    length = len(sql)
+    while i < length:
+        char = sql[i]
+        if char == '`':
+            end = sql.find('`', i + 1)
+            end = length - 1 if end == -1 else end
+            out.append(sql[i:end + 1])
+            i = end + 1
+        elif char in ("'", '"'):
+            quote = char
+            value = []
+            i += 1
+            while i < length:
+                char = sql[i]
+                if char == '\\' and i + 1 < length:
+                    value.append(_MYSQL_ESCAPES.get(sql[i + 1], sql[i + 1]))
+                    i += 2
+                elif char == quote and i + 1 < length and sql[i + 1] == quote:
+                    value.append(quote)
+                    i += 2
+                elif char == quote:
+                    i += 1
+                    break
+                else:
+                    value.append(char)
+                    i += 1
+            out.append("'" + ''.join(value).replace("'", "''") + "'")
+        else:
+            out.append(char)
+            i += 1
+    return ''.join(out)
+
+
+class StandinState:
+    """Fitxers pujats, bases de dades SQLite per config i comptadors"""
+
+    def __init__(self, data_dir: str = None, upload_dir: str = None):
+        self.data_dir = data_dir or tempfile.mkdtemp(prefix='db_standin_')
+        self.upload_dir = upload_dir or os.path.join(self.data_dir, 'uploads')
+        os.makedirs(self.upload_dir, exist_ok=True)
+
+        self._databases = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'uploads': 0,
+            'bytes_uploaded': 0,
+            'deletes': 0,
+            'executes': 0,
+            'statements': 0,
+            'errors': 0,
+            'started': datetime.now().isoformat()
+        }
+
+    def count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def database(self, config: str):
+        """Connexió SQLite de la config i el seu lock (una escriptura a la vegada, com MySQL per fila)"""
+        with self._lock:
+            if config not in self._databases:
+                path = os.path.join(self.data_dir, f"{os.path.basename(config) or 'etera'}.sqlite")
+                connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                connection.row_factory = sqlite3.Row
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('PRAGMA synchronous=NORMAL')
+                self._databases[config] = (connection, threading.Lock(), path)
+            return self._databases[config]
+
+    def upload_path(self, file_name: str) -> str:
+        return os.path.join(self.upload_dir, os.path.basename(file_name))
+
+    def write_upload(self, file_name: str, content: bytes):
+        """Desa un fitxer pujat de forma atòmica (temporal al mateix directori + os.replace)
+
+        Un execute concurrent veu el fitxer sencer anterior o el nou, mai un de mig escrit.
+        """
+        fd, temp_path = tempfile.mkstemp(prefix='.upload_', suffix='.tmp', dir=self.upload_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, self.upload_path(file_name))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def delete_upload(self, file_name: str) -> bool:
+        """Esborra un fitxer pujat; si ja no hi és (neteja concurrent) es considera esborrat"""
+        try:
+            os.remove(self.upload_path(file_name))
+        except (FileNotFoundError, IsADirectoryError):
+            return False
+        self.count('deletes')
+        return True
+
+    def read_upload(self, file_name: str) -> str:
+        """Equivalent a readUploadedFile de table_editor.php (404 si no hi és, descomprimeix .gz/.zst)"""
+        path = self.upload_path(file_name)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            raise StandinError(f"Fitxer pujat no trobat: {os.path.basename(file_name)}", 404)
+
+        if path.endswith('.gz'):
+            content = gzip.decompress(content)
+        elif path.endswith('.zst'):
+            if zstandard is None:
+                raise StandinError(f"No s'ha pogut descomprimir el fitxer pujat: {os.path.basename(file_name)}")
+            content = zstandard.ZstdDecompressor().decompressobj().decompress(content)
+        return content.decode('utf-8')
+
+    def close(self):
+        with self._lock:
+            for connection, _, _ in self._databases.values():
+                connection.close()
+            self._databases.clear()
+
+
+class StandinError(Exception):
+    """Error amb codi HTTP (com les Exception amb codi de table_editor.php)"""
+
+    def __init__(self, message: str, status: int = 500):
+        super().__init__(message)
+        self.status = status
+
+
+def _run_statement(connection: sqlite3.Connection, sql: str) -> dict:
+    """Executa una sentència i retorna affected_rows (i query_results si és SELECT)"""
+    cursor = connection.execute(mysql_to_sqlite(sql))
+    if sql.lstrip()[:6].upper() == 'SELECT':
+        rows = [dict(row) for row in cursor.fetchall()]
+        return {'affected_rows': len(rows), 'query_results': rows}
+    return {'affected_rows': max(cursor.rowcount, 0)}
+
+
+def execute_sql(state: StandinState, config: str, query: dict) -> dict:
+    """action=execute_sql (sql o sql_file)"""
+    sql = query.get('sql') or (state.read_upload(query['sql_file']) if query.get('sql_file') else '')
+    if not sql:
+        raise StandinError("Cal proporcionar SQL per executar")
+
+    connection, lock, _ = state.database(config)
+    with lock:
+        result = _run_statement(connection, sql)
+    state.count('executes')
+    state.count('statements')
+
+    response = {
+        'sql_executed': sql,
+        'message': "SQL executat correctament",
+        'affected_rows': result['affected_rows']
+    }
+    if 'query_results' in result:
+        response['query_results'] = result['query_results']
+        response['result_count'] = len(result['query_results'])
+    return response
+
+
+def execute_batch(state: StandinState, config: str, query: dict) -> dict:
+    """action=execute_batch (array JSON a sql_file, transaction=1 opcional)"""
+    if not query.get('sql_file'):
+        raise StandinError("Cal proporcionar sql_file amb el lot de sentències")
+
+    statements = json.loads(state.read_upload(query['sql_file']))
+    if not isinstance(statements, list):
+        raise StandinError("El lot ha de ser un array JSON de sentències SQL")
+
+    use_transaction = query.get('transaction') == '1'
+    batch_results = []
+    failed = 0
+    response = {}
+
+    connection, lock, _ = state.database(config)
+    with lock:
+        if use_transaction:
+            connection.execute('BEGIN')
+
+        for statement in statements:
+            try:
+                batch_results.append(_run_statement(connection, statement))
+            except sqlite3.Error as e:
+                failed += 1
+                batch_results.append({'affected_rows': 0, 'error': str(e)})
+                if use_transaction:
+                    break
+
+        if use_transaction:
+            connection.execute('ROLLBACK' if failed else 'COMMIT')
+            response['rolled_back'] = failed > 0
+
+    state.count('executes')
+    state.count('statements', len(batch_results))
+    state.count('errors', failed)
+
+    response.update({
+        'message': f"Lot executat amb {failed} error(s)" if failed else "Lot executat correctament",
+        'batch_results': batch_results,
+        'executed': len(batch_results),
+        'failed': failed,
+        'transaction': use_transaction
+    })
+    return response
+
+
+def file_exists(state: StandinState, config: str, query: dict) -> dict:
+    """action=file_exists (amb comprovació de sha256 opcional)"""
+    if not query.get('sql_file'):
+        raise StandinError("Cal proporcionar sql_file")
+
+    path = state.upload_path(query['sql_file'])
+    exists = os.path.isfile(path)
+    if exists and query.get('sha256'):
+        try:
+            with open(path, 'rb') as f:
+                exists = hashlib.sha256(f.read()).hexdigest() == query['sha256'].lower()
+        except FileNotFoundError:
+            exists = False
+
+    return {'file': os.path.basename(query['sql_file']), 'exists': exists}
+
+
+def capabilities(state: StandinState, config: str, query: dict) -> dict:
+    """action=capabilities"""
+    return {'compression': ['gzip', 'zstd'] if zstandard is not None else ['gzip']}
+
+
+TABLE_EDITOR_ACTIONS = {
+    'execute_sql': execute_sql,
+    'execute_batch': execute_batch,
+    'file_exists': file_exists,
+    'capabilities': capabilities
+}
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Rutes /upload.php i /table_editor.php (qualsevol prefix de ruta)"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'DBInsertStandin/1.0'
+    # Capçaleres i cos van en writes separats: sense TCP_NODELAY el delayed ACK
+    # afegeix ~40 ms per resposta i falseja les latències del benchmark
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return os.path.basename(url.path), query
+
+    def do_POST(self):
+        endpoint, query = self._route()
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+
+        if endpoint != 'upload.php':
+            return self._send_json({'error': f"Ruta no trobada: {self.path}"}, 404)
+
+        # Multipart: es reconstrueix el missatge amb la capçalera Content-Type
+        header = f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode('latin-1')
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(header + body)
+
+        uploaded = []
+        if message.is_multipart():
+            for part in message.iter_parts():
+                file_name = part.get_filename()
+                if part.get_param('name', header='content-disposition') != 'file' or not file_name:
+                    continue
+                content = part.get_payload(decode=True) or b''
+                self.server.state.write_upload(file_name, content)
+                self.server.state.count('uploads')
+                self.server.state.count('bytes_uploaded', len(content))
+                uploaded.append({'file': os.path.basename(file_name), 'size': len(content)})
+
+        if not uploaded:
+            return self._send_json({'success': False, 'error': "No s'ha rebut cap fitxer"}, 400)
+
+        self._send_json({'success': True, 'message': "Fitxer pujat correctament", **uploaded[0]})
+
+    def do_GET(self):
+        endpoint, query = self._route()
+        state = self.server.state
+
+        if endpoint == 'upload.php':
+            if query.get('action') == 'delete_file' and query.get('file'):
+                deleted = state.delete_upload(query['file'])
+                return self._send_json({'success': True, 'deleted': deleted, 'file': os.path.basename(query['file'])})
+            if query.get('action') == 'stats':
+                return self._send_json({'success': True, 'stats': state.stats})
+            return self._send_json({'success': False, 'error': "Acció no vàlida (delete_file, stats)"}, 400)
+
+        if endpoint != 'table_editor.php':
+            return self._send_json({'error': f"Ruta no trobada: {self.path}"}, 404)
+
+        action = query.get('action', 'list')
+        config = query.get('config', 'etera')
+        access = {
+            'user_param': query.get('user', ''),
+            'access_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'method': 'standin',
+            'config_used': config,
+            'database_host': 'sqlite',
+            'database_name': config,
+            'action': action
+        }
+
+        try:
+            handler = TABLE_EDITOR_ACTIONS.get(action)
+            if handler is None:
+                raise StandinError(f"Acció no vàlida. Accions disponibles: {', '.join(TABLE_EDITOR_ACTIONS)}")
+            response = {'access': access, **handler(state, config, query)}
+            self._send_json(response)
+        except (StandinError, sqlite3.Error, ValueError) as e:
+            state.count('errors')
+            status = e.status if isinstance(e, StandinError) else 500
+            self._send_json({'error': str(e), 'access': access}, status)
+
+
+def start_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, data_dir: str = None,
+                 upload_dir: str = None, verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Arrenca el servidor en un fil de fons (port=0: port lliure).
+
+    Returns:
+        El servidor; la URL base és http://<host>:<server.server_port>. Aturar amb stop_server().
+    """
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.state = StandinState(data_dir, upload_dir)
+    server.verbose = verbose
+    thread = threading.Thread(target=server.serve_forever, name='db-standin', daemon=True)
+    thread.start()
+    return server
+
+
+def stop_server(server: ThreadingHTTPServer):
+    """Atura un servidor creat amb start_server"""
+    server.shutdown()
+    server.server_close()
+    server.state.close()
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    """URL base per a db-insert-utf8 (--base_url)"""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+TOOL_INFO = {
+    "nom": "db_insert_standin",
+    "versio": "1.0",
+    "que_fa": "Servidor local que imita upload.php i table_editor.php sobre SQLite per provar i fer benchmarks de db-insert-utf8 sense tocar producció.",
+    "com_ho_fa": "Servidor HTTP multifil (http.server). upload.php desa els fitxers pujats en un directori local i implementa delete_file; table_editor.php implementa execute_sql, execute_batch, file_exists i capabilities amb la mateixa forma JSON que el PHP, sobre una base de dades SQLite per config. Els literals amb escapaments MySQL es tradueixen a SQLite.",
+    "que_necessita": [
+        {
+            "nom": "host",
+            "tipus": "string",
+            "descripcio": "(Opcional) Adreça on escoltar (default: 127.0.0.1)"
+        },
+        {
+            "nom": "port",
+            "tipus": "integer",
+            "descripcio": "(Opcional) Port (default: 8765)"
+        },
+        {
+            "nom": "data_dir",
+            "tipus": "string",
+            "descripcio": "(Opcional) Directori de les bases de dades <config>.sqlite (default: directori temporal)"
+        },
+        {
+            "nom": "upload_dir",
+            "tipus": "string",
+            "descripcio": "(Opcional) Directori dels fitxers pujats (default: <data_dir>/uploads)"
+        }
+    ],
+    "que_retorna": "Respostes JSON equivalents a upload.php/table_editor.php. upload.php?action=stats retorna els comptadors del servidor (uploads, bytes, execucions, sentències, errors).",
+    "funcions_disponibles": [
+        {
+            "nom": "serve",
+            "descripcio": "Arrenca el servidor fins a Ctrl+C. Usar amb: db-insert-utf8.py --base_url http://127.0.0.1:8765 ...",
+            "parametres": ["host", "port", "data_dir", "upload_dir", "verbose"]
+        }
+    ],
+    "dependències": [
+        "Cap (llibreria estàndard); zstandard opcional per a pujades .zst"
+    ]
+}
+
+
+def main(argv=None):
+    """Punt d'entrada CLI (argv=None llegeix sys.argv)"""
+    parser = argparse.ArgumentParser(
+        description="Servidor local (SQLite) que imita upload.php i table_editor.php."
+    )
+    parser.add_argument(
+        "--info",
+        action="store_true",
+        help="Mostra la informació d'autodescripció de la tool."
+    )
+
+    subparsers = parser.add_subparsers(dest="command", help="Comandes disponibles")
+
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="Arrenca el servidor local."
+    )
+    parser_serve.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help=f"Adreça on escoltar (default: {DEFAULT_HOST})"
+    )
+    parser_serve.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port (default: {DEFAULT_PORT})"
+    )
+    parser_serve.add_argument(
+        "--data_dir",
+        type=str,
+        default=None,
+        help="Directori de les bases de dades SQLite (default: temporal)"
+    )
+    parser_serve.add_argument(
+        "--upload_dir",
+        type=str,
+        default=None,
+        help="Directori dels fitxers pujats (default: <data_dir>/uploads)"
+    )
+    parser_serve.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Mostrar cada petició"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.info:
+        print(json.dumps(TOOL_INFO, indent=2, ensure_ascii=False))
+
+    elif args.command == "serve":
+        server = start_server(args.host, args.port, args.data_dir, args.upload_dir, args.verbose)
+        print(json.dumps({
+            "success": True,
+            "message": "Servidor local actiu (Ctrl+C per aturar)",
+            "base_url": base_url(server),
+            "data_dir": server.state.data_dir,
+            "upload_dir": server.state.upload_dir
+        }, indent=2, ensure_ascii=False), flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            stop_server(server)
+
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
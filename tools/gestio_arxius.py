@@ -1,11 +1,30 @@
 import os
+import glob
+import time
 import shutil
 import json
+import stat
+import hashlib
+import tempfile
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-def copy_file(source_path: str, dest_path: str) -> dict:
-    """Copia un arxiu d'origen a destí."""
+# Operacions de fitxers: el pool pot ser més gran que les CPU perquè els fils
+# passen la major part del temps esperant el disc
+DEFAULT_BATCH_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+BATCH_OPERATIONS = ('copy', 'move', 'delete', 'backup')
+
+# Backups deduplicats: l'arxiu es talla en trossos de mida fixa i cada tros
+# es desa una sola vegada a DEDUP_DIR/chunks/<sha256>; cada versió és només un
+# manifest JSON amb la llista de trossos. Un arxiu de 500 MB que canvia poc
+# només escriu els trossos que han canviat.
+DEDUP_DIR = '.dedup'
+DEDUP_VERSION = 1
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+def copy_file(source_path: str, dest_path: str, create_dirs: bool = True) -> dict:
+    """Copia un arxiu d'origen a destí (create_dirs=False si el directori ja s'ha creat)."""
     try:
         if not os.path.exists(source_path):
             return {
@@ -25,7 +44,7 @@ def copy_file(source_path: str, dest_path: str) -> dict:
         
         # Crear directori destí si no existeix
         dest_dir = os.path.dirname(dest_path)
-        if dest_dir and not os.path.exists(dest_dir):
+        if create_dirs and dest_dir and not os.path.exists(dest_dir):
             os.makedirs(dest_dir)
         
         shutil.copy2(source_path, dest_path)
@@ -48,8 +67,8 @@ def copy_file(source_path: str, dest_path: str) -> dict:
         }
 
 
-def move_file(source_path: str, dest_path: str) -> dict:
-    """Mou o renombra un arxiu."""
+def move_file(source_path: str, dest_path: str, create_dirs: bool = True) -> dict:
+    """Mou o renombra un arxiu (create_dirs=False si el directori ja s'ha creat)."""
     try:
         if not os.path.exists(source_path):
             return {
@@ -69,16 +88,18 @@ def move_file(source_path: str, dest_path: str) -> dict:
         
         # Crear directori destí si no existeix
         dest_dir = os.path.dirname(dest_path)
-        if dest_dir and not os.path.exists(dest_dir):
+        if create_dirs and dest_dir and not os.path.exists(dest_dir):
             os.makedirs(dest_dir)
         
+        file_size = os.path.getsize(source_path)
         shutil.move(source_path, dest_path)
         
         return {
             "success": True,
             "message": f"Arxiu mogut/renombrat correctament",
             "source": source_path,
-            "destination": dest_path
+            "destination": dest_path,
+            "size_bytes": file_size
         }
         
     except Exception as e:
@@ -143,8 +164,11 @@ def file_exists(file_path: str) -> dict:
     return result
 
 
-def copy_with_timestamp(source_path: str, dest_dir: str, suffix: str = None) -> dict:
-    """Copia un arxiu afegint timestamp al nom (útil per backups)."""
+def copy_with_timestamp(source_path: str, dest_dir: str, suffix: str = None, create_dirs: bool = True,
+                        dedup: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Copia un arxiu afegint timestamp al nom (útil per backups; dedup=True usa el magatzem deduplicat)."""
+    if dedup:
+        return dedup_backup(source_path, dest_dir, suffix, chunk_size)
     try:
         if not os.path.exists(source_path):
             return {
@@ -153,23 +177,19 @@ def copy_with_timestamp(source_path: str, dest_dir: str, suffix: str = None) ->
                 "source": source_path
             }
         
-        # Crear nom amb timestamp
-        filename = os.path.basename(source_path)
-        name, ext = os.path.splitext(filename)
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        
-        if suffix:
-            new_name = f"{name}-{suffix}-{timestamp}{ext}"
-        else:
-            new_name = f"{name}-{timestamp}{ext}"
-        
-        dest_path = os.path.join(dest_dir, new_name)
-        
         # Crear directori destí si no existeix
-        if not os.path.exists(dest_dir):
+        if create_dirs and not os.path.exists(dest_dir):
             os.makedirs(dest_dir)
         
-        shutil.copy2(source_path, dest_path)
+        # Copiar a un temporal i reclamar el nom amb timestamp: dos backups del
+        # mateix segon (p.ex. en un batch) reben noms diferents en lloc de sobreescriure's
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=dest_dir)
+        os.close(fd)
+        try:
+            shutil.copy2(source_path, temp_path)
+            dest_path = _claim_unique(temp_path, dest_dir, _backup_name(source_path, suffix))
+        finally:
+            _remove_quietly(temp_path)
         file_size = os.path.getsize(dest_path)
         
         return {
@@ -188,7 +208,551 @@ def copy_with_timestamp(source_path: str, dest_dir: str, suffix: str = None) ->
         }
 
 
-if __name__ == "__main__":
+def _backup_name(source_path: str, suffix: str = None) -> str:
+    """Nom d'una versió de backup: nom-sufix-timestamp.ext."""
+    name, ext = os.path.splitext(os.path.basename(source_path))
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return f"{name}-{suffix}-{timestamp}{ext}" if suffix else f"{name}-{timestamp}{ext}"
+
+
+def _write_atomic(path: str, data: bytes):
+    """Escriu a un temporal de la mateixa carpeta i el reanomena (mai queda un arxiu a mitges)."""
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _claim_path(temp_path: str, path: str):
+    """
+    Posa temp_path a path només si path no existeix (FileExistsError si ja hi és).
+    
+    Amb os.link el nom es reclama atòmicament; en sistemes de fitxers sense
+    enllaços durs (FAT, exFAT) es reclama amb O_EXCL i després es reemplaça.
+    """
+    try:
+        os.link(temp_path, path)
+    except FileExistsError:
+        raise
+    except OSError:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        os.replace(temp_path, path)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _claim_unique(temp_path: str, directory: str, name: str) -> str:
+    """Dona a temp_path el primer nom lliure de directory (nom, nom-1, nom-2...) i en retorna la ruta."""
+    base, ext = os.path.splitext(name)
+    counter = 0
+    while True:
+        path = os.path.join(directory, f"{base}-{counter}{ext}" if counter else name)
+        try:
+            _claim_path(temp_path, path)
+            return path
+        except FileExistsError:
+            counter += 1
+
+
+def _chunk_path(store: str, digest: str) -> str:
+    return os.path.join(store, 'chunks', digest[:2], digest)
+
+
+def _claim_manifest(versions_dir: str, version: str, manifest: dict) -> str:
+    """Desa el manifest amb el primer nom de versió lliure (backups del mateix segon no es sobreescriuen)."""
+    base, ext = os.path.splitext(version)
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=versions_dir)
+    try:
+        with os.fdopen(fd, 'wb'):
+            pass
+        counter = 0
+        while True:
+            # El nom va dins del manifest: s'ha d'escriure abans de reclamar-lo
+            manifest['name'] = f"{base}-{counter}{ext}" if counter else version
+            with open(temp_path, 'wb') as f:
+                f.write(json.dumps(manifest).encode('utf-8'))
+            path = os.path.join(versions_dir, manifest['name'] + '.json')
+            try:
+                _claim_path(temp_path, path)
+                return path
+            except FileExistsError:
+                counter += 1
+    finally:
+        _remove_quietly(temp_path)
+
+
+def dedup_backup(source_path: str, dest_dir: str, suffix: str = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Backup amb timestamp a un magatzem deduplicat per contingut.
+    
+    L'arxiu es llegeix per trossos de chunk_size bytes; els trossos que ja
+    són al magatzem (mateix sha256) no s'escriuen. La versió queda registrada
+    com un manifest petit a DEDUP_DIR/versions/<nom>.json.
+    
+    Returns:
+        Dict amb success, message, version, manifest, size_bytes, chunks,
+        new_chunks, written_bytes i reused_bytes
+    """
+    try:
+        if not os.path.isfile(source_path):
+            return {
+                "success": False,
+                "message": f"Error: L'arxiu origen no existeix: {source_path}",
+                "source": source_path
+            }
+        if chunk_size < 1:
+            return {
+                "success": False,
+                "message": "Error: chunk_size ha de ser positiu",
+                "source": source_path
+            }
+        
+        store = os.path.join(dest_dir, DEDUP_DIR)
+        versions_dir = os.path.join(store, 'versions')
+        os.makedirs(versions_dir, exist_ok=True)
+        
+        chunks, new_chunks, written = [], 0, 0
+        file_hash = hashlib.sha256()
+        source_stat = os.stat(source_path)
+        with open(source_path, 'rb') as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                file_hash.update(data)
+                digest = hashlib.sha256(data).hexdigest()
+                path = _chunk_path(store, digest)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    _write_atomic(path, data)
+                    new_chunks += 1
+                    written += len(data)
+                chunks.append([digest, len(data)])
+        size = sum(length for _, length in chunks)
+        
+        manifest = {
+            "version": DEDUP_VERSION,
+            "name": None,
+            "source": os.path.abspath(source_path),
+            "created": datetime.now().isoformat(),
+            "mtime": source_stat.st_mtime,
+            "mode": stat.S_IMODE(source_stat.st_mode),
+            "size_bytes": size,
+            "sha256": file_hash.hexdigest(),
+            "chunk_size": chunk_size,
+            "chunks": chunks
+        }
+        manifest_path = _claim_manifest(versions_dir, _backup_name(source_path, suffix), manifest)
+        version = manifest['name']
+        
+        return {
+            "success": True,
+            "message": f"Backup deduplicat creat correctament ({new_chunks} de {len(chunks)} trossos nous)",
+            "source": source_path,
+            "version": version,
+            "manifest": manifest_path,
+            "size_bytes": size,
+            "chunks": len(chunks),
+            "new_chunks": new_chunks,
+            "written_bytes": written,
+            "reused_bytes": size - written
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Error en crear backup deduplicat: {str(e)}",
+            "source": source_path
+        }
+
+
+def list_versions(dest_dir: str, name: str = None) -> dict:
+    """Llista les versions del magatzem deduplicat, de la més antiga a la més nova (filtrades pel nom de l'arxiu original)."""
+    versions_dir = os.path.join(dest_dir, DEDUP_DIR, 'versions')
+    if not os.path.isdir(versions_dir):
+        return {
+            "success": False,
+            "message": f"Error: No hi ha cap magatzem deduplicat a {dest_dir}",
+            "dest_dir": dest_dir
+        }
+    
+    versions = []
+    for entry in sorted(os.listdir(versions_dir)):
+        if not entry.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(versions_dir, entry), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if name and os.path.basename(manifest['source']) != name:
+            continue
+        versions.append({
+            "version": manifest['name'],
+            "source": manifest['source'],
+            "created": manifest['created'],
+            "size_bytes": manifest['size_bytes'],
+            "chunks": len(manifest['chunks'])
+        })
+    # Ordre de creació (l'última versió al final): pel nom, top-…-1 aniria abans de top-…
+    versions.sort(key=lambda v: (v['created'], v['version']))
+    
+    store = os.path.join(dest_dir, DEDUP_DIR, 'chunks')
+    stored = sum(entry.stat().st_size
+                 for folder in (os.scandir(store) if os.path.isdir(store) else [])
+                 for entry in os.scandir(folder.path) if entry.is_file())
+    return {
+        "success": True,
+        "dest_dir": dest_dir,
+        "versions": versions,
+        "logical_bytes": sum(v['size_bytes'] for v in versions),
+        "stored_bytes": stored
+    }
+
+
+def restore_version(dest_dir: str, version: str, dest_path: str) -> dict:
+    """
+    Reconstrueix una versió del magatzem deduplicat a dest_path.
+    
+    Els trossos s'escriuen a un temporal de la carpeta destí; només si el
+    sha256 de tot l'arxiu coincideix amb el del manifest es reanomena.
+    """
+    manifest_path = os.path.join(dest_dir, DEDUP_DIR, 'versions', os.path.basename(version))
+    if not manifest_path.endswith('.json'):
+        manifest_path += '.json'
+    try:
+        if not os.path.isfile(manifest_path):
+            return {
+                "success": False,
+                "message": f"Error: La versió no existeix: {version}",
+                "version": version
+            }
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        store = os.path.join(dest_dir, DEDUP_DIR)
+        target_dir = os.path.dirname(os.path.abspath(dest_path))
+        os.makedirs(target_dir, exist_ok=True)
+        file_hash = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=target_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for digest, length in manifest['chunks']:
+                    with open(_chunk_path(store, digest), 'rb') as chunk:
+                        data = chunk.read()
+                    if len(data) != length:
+                        raise ValueError(f"Tros {digest} incomplet ({len(data)} de {length} bytes)")
+                    file_hash.update(data)
+                    out.write(data)
+            if file_hash.hexdigest() != manifest['sha256']:
+                raise ValueError("El sha256 de l'arxiu restaurat no coincideix amb el del manifest")
+            if 'mode' in manifest:
+                os.chmod(temp_path, manifest['mode'])
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_path, 0o666 & ~umask)  # mkstemp crea amb 0600
+            os.utime(temp_path, (manifest['mtime'], manifest['mtime']))
+            os.replace(temp_path, dest_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        
+        return {
+            "success": True,
+            "message": "Versió restaurada correctament",
+            "version": manifest['name'],
+            "destination": dest_path,
+            "size_bytes": manifest['size_bytes']
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"Error en restaurar la versió: {str(e)}",
+            "version": version,
+            "destination": dest_path
+        }
+
+
+def load_manifest(path: str) -> list:
+    """
+    Llegeix operacions d'un fitxer .json (array) o .jsonl (una per línia).
+    
+    Cada operació és {"op": "copy|move", "source", "destination"},
+    {"op": "delete", "path"} o {"op": "backup", "source", "dest_dir", "suffix"}.
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            operations = [json.loads(line) for line in f if line.strip()]
+        else:
+            operations = json.load(f)
+    
+    if not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+        raise ValueError("Cal una llista d'operacions {op, source, destination|dest_dir|path}")
+    return operations
+
+
+def _glob_base(pattern: str) -> str:
+    """Part fixa d'un patró glob (fins al primer component amb comodins)."""
+    parts = []
+    for part in os.path.normpath(pattern).split(os.sep):
+        if any(c in part for c in '*?['):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or '.'
+
+
+def glob_operations(pattern: str, op: str, dest_dir: str = None, base: str = None, suffix: str = None,
+                    dedup: bool = False) -> list:
+    """
+    Genera operacions per a tots els arxius d'un patró glob (** recursiu).
+    
+    copy/move/backup conserven l'estructura de carpetes relativa a base
+    (per defecte, la part del patró sense comodins) dins de dest_dir.
+    """
+    if op not in BATCH_OPERATIONS:
+        raise ValueError(f"Operació no vàlida: {op} (cal {', '.join(BATCH_OPERATIONS)})")
+    if op != 'delete' and not dest_dir:
+        raise ValueError(f"L'operació {op} necessita dest_dir")
+    
+    base = os.path.abspath(base or _glob_base(pattern))
+    operations = []
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        if not os.path.isfile(path):
+            continue
+        path = os.path.abspath(path)
+        if op == 'delete':
+            operations.append({'op': op, 'path': path})
+            continue
+        relative = os.path.relpath(path, base)
+        if op == 'backup':
+            operations.append({'op': op, 'source': path, 'suffix': suffix, 'dedup': dedup,
+                               'dest_dir': os.path.join(dest_dir, os.path.dirname(relative))})
+        else:
+            operations.append({'op': op, 'source': path, 'destination': os.path.join(dest_dir, relative)})
+    return operations
+
+
+def _operation_dir(operation: dict):
+    """Directori destí que necessita una operació (None si no en necessita)."""
+    if operation.get('op') in ('copy', 'move') and operation.get('destination'):
+        return os.path.dirname(os.path.abspath(operation['destination']))
+    if operation.get('op') == 'backup' and operation.get('dest_dir'):
+        return os.path.abspath(operation['dest_dir'])
+    return None
+
+
+def _run_operation(operation: dict) -> dict:
+    op = operation.get('op')
+    if op == 'copy':
+        return copy_file(operation['source'], operation['destination'], create_dirs=False)
+    if op == 'move':
+        return move_file(operation['source'], operation['destination'], create_dirs=False)
+    if op == 'delete':
+        return delete_file(operation['path'])
+    if op == 'backup':
+        return copy_with_timestamp(operation['source'], operation['dest_dir'], operation.get('suffix'), create_dirs=False,
+                                   dedup=operation.get('dedup', False),
+                                   chunk_size=operation.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    return {
+        "success": False,
+        "message": f"Error: operació desconeguda: {op} (cal {', '.join(BATCH_OPERATIONS)})"
+    }
+
+
+def iter_batch(operations: list, workers: int = DEFAULT_BATCH_WORKERS):
+    """
+    Executa moltes operacions d'arxius amb un pool de fils.
+    
+    Els directoris destí es creen una sola vegada per directori abans de
+    començar (no a cada arxiu). Les operacions han de ser independents entre
+    si: amb workers=1 s'executen en l'ordre del manifest.
+    
+    Yields:
+        Dict del resultat de cada operació (amb index i duration_ms) tan bon punt acaba
+    """
+    for directory in sorted({d for d in map(_operation_dir, operations) if d}):
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            pass  # Les operacions d'aquest directori fallaran amb el seu propi error
+    
+    def run(position, operation):
+        start = time.perf_counter()
+        try:
+            result = _run_operation(operation)
+        except KeyError as e:
+            result = {"success": False, "message": f"Error: falta el camp {e} a l'operació"}
+        except Exception as e:
+            result = {"success": False, "message": str(e)}
+        result = {'index': position, 'op': operation.get('op'), **result}
+        result['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(operations) or 1))) as executor:
+        futures = [executor.submit(run, position, operation) for position, operation in enumerate(operations)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_batch(operations: list, workers: int = DEFAULT_BATCH_WORKERS, on_result=None) -> dict:
+    """
+    Executa un lot d'operacions en paral·lel i en retorna el resum.
+    
+    Args:
+        operations: Llista d'operacions (veure load_manifest)
+        workers: Operacions alhora
+        on_result: Callback cridat amb cada resultat quan acaba (streaming)
+        
+    Returns:
+        Dict amb success, total, failed (índexs), bytes, bytes_per_sec,
+        elapsed_ms i results (en l'ordre del manifest)
+    """
+    start = time.perf_counter()
+    results = []
+    for result in iter_batch(operations, workers):
+        results.append(result)
+        if on_result:
+            on_result(result)
+    elapsed = time.perf_counter() - start
+    
+    # Els moviments dins del mateix disc són un rename: no compten com a bytes transferits
+    copied = sum(r.get('size_bytes', 0) for r in results if r['success'] and r['op'] in ('copy', 'backup'))
+    failed = sorted(r['index'] for r in results if not r['success'])
+    return {
+        "success": not failed,
+        "message": f"{len(results) - len(failed)} de {len(results)} operacions correctes",
+        "total": len(results),
+        "failed": failed,
+        "bytes": copied,
+        "bytes_per_sec": round(copied / elapsed) if elapsed > 0 else 0,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "sum_duration_ms": round(sum(r['duration_ms'] for r in results), 2),
+        "workers": max(1, min(workers, len(operations) or 1)),
+        "results": sorted(results, key=lambda r: r['index'])
+    }
+
+
+TOOL_INFO = {
+    "que_fa": "Permet copiar, moure, renombrar, eliminar i comprovar arxius en Windows, d'un en un o en lot.",
+    "com_ho_fa": "Utilitza les funcions de Python (shutil, os) per manipular arxius de forma segura. Crea directoris destí automàticament si no existeixen. Inclou funció de backup amb timestamp; amb --dedup el backup va a un magatzem per contingut (trossos de mida fixa amb sha256, cada tros desat una vegada i un manifest JSON per versió), de manera que un arxiu gran que canvia poc només escriu els trossos nous. El mode batch executa moltes operacions (manifest JSON/JSONL o patró glob) amb un pool de fils, crea cada directori destí una sola vegada i informa dels bytes per segon.",
+    "que_necessita": [
+        {
+            "nom": "source",
+            "tipus": "string",
+            "descripcio": "Ruta absoluta de l'arxiu origen."
+        },
+        {
+            "nom": "destination",
+            "tipus": "string",
+            "descripcio": "Ruta absoluta de l'arxiu destí."
+        },
+        {
+            "nom": "path",
+            "tipus": "string",
+            "descripcio": "Ruta absoluta de l'arxiu a comprovar/eliminar."
+        },
+        {
+            "nom": "dest_dir",
+            "tipus": "string",
+            "descripcio": "Directori destí per backup."
+        },
+        {
+            "nom": "suffix",
+            "tipus": "string",
+            "descripcio": "(Opcional, per a backup) Sufix a afegir abans del timestamp."
+        },
+        {
+            "nom": "manifest",
+            "tipus": "string",
+            "descripcio": "(batch) Fitxer .json/.jsonl amb operacions {op: copy|move|delete|backup, source, destination | path | dest_dir, suffix}."
+        },
+        {
+            "nom": "glob",
+            "tipus": "string",
+            "descripcio": "(batch, alternativa al manifest) Patró d'arxius (** recursiu) amb --op i --dest_dir; es conserva l'estructura relativa a --base."
+        },
+        {
+            "nom": "workers",
+            "tipus": "integer",
+            "descripcio": f"(batch) Operacions alhora (default: {DEFAULT_BATCH_WORKERS})."
+        },
+        {
+            "nom": "dedup",
+            "tipus": "boolean",
+            "descripcio": "(backup, batch) Desa la versió al magatzem deduplicat de dest_dir en lloc de fer una còpia completa."
+        },
+        {
+            "nom": "version",
+            "tipus": "string",
+            "descripcio": "(restore) Nom de la versió (veure versions)."
+        }
+    ],
+    "que_retorna": "Objecte JSON amb success (bool), message (str) i informació addicional (paths, mides, dates).",
+    "funcions_disponibles": [
+        {
+            "nom": "copy",
+            "descripcio": "Copia un arxiu d'origen a destí.",
+            "parametres": ["source", "destination"]
+        },
+        {
+            "nom": "move",
+            "descripcio": "Mou o renombra un arxiu.",
+            "parametres": ["source", "destination"]
+        },
+        {
+            "nom": "delete",
+            "descripcio": "Elimina un arxiu.",
+            "parametres": ["path"]
+        },
+        {
+            "nom": "exists",
+            "descripcio": "Comprova si un arxiu existeix i mostra informació.",
+            "parametres": ["path"]
+        },
+        {
+            "nom": "backup",
+            "descripcio": "Copia un arxiu afegint timestamp al nom (per backups). Amb --dedup només desa els trossos que han canviat.",
+            "parametres": ["source", "dest_dir", "suffix", "dedup", "chunk_size"]
+        },
+        {
+            "nom": "versions",
+            "descripcio": "Llista les versions del magatzem deduplicat (amb mida lògica i mida realment ocupada).",
+            "parametres": ["dest_dir", "name"]
+        },
+        {
+            "nom": "restore",
+            "descripcio": "Reconstrueix una versió del magatzem deduplicat (verifica el sha256 abans de substituir el destí).",
+            "parametres": ["dest_dir", "version", "destination"]
+        },
+        {
+            "nom": "batch",
+            "descripcio": "Executa moltes operacions en paral·lel des d'un manifest o un glob. Amb --stream escriu una línia JSON per operació quan acaba i el resum (bytes, bytes_per_sec) al final.",
+            "parametres": ["manifest", "glob", "op", "dest_dir", "base", "suffix", "dedup", "workers", "stream"]
+        }
+    ]
+}
+
+
+def main(argv=None):
+    """Punt d'entrada CLI (argv=None llegeix sys.argv)"""
     parser = argparse.ArgumentParser(description="Eina per gestionar arxius (copiar, moure, eliminar).")
     parser.add_argument("--info", action="store_true", help="Mostra la informació d'autodescripció de la tool.")
 
@@ -217,70 +781,36 @@ if __name__ == "__main__":
     parser_backup.add_argument("source", type=str, help="Ruta absoluta de l'arxiu origen.")
     parser_backup.add_argument("dest_dir", type=str, help="Directori destí.")
     parser_backup.add_argument("--suffix", type=str, help="Sufix opcional (ex: v2.2).", default=None)
+    parser_backup.add_argument("--dedup", action="store_true", help="Desa la versió al magatzem deduplicat de dest_dir.")
+    parser_backup.add_argument("--chunk_size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"Mida dels trossos amb --dedup (default: {DEFAULT_CHUNK_SIZE}).")
 
-    args = parser.parse_args()
+    # Subparser per a list_versions
+    parser_versions = subparsers.add_parser("versions", help="Llista les versions del magatzem deduplicat.")
+    parser_versions.add_argument("dest_dir", type=str, help="Directori de backups.")
+    parser_versions.add_argument("--name", type=str, default=None, help="Només les versions d'aquest arxiu (nom original).")
+
+    # Subparser per a restore_version
+    parser_restore = subparsers.add_parser("restore", help="Reconstrueix una versió del magatzem deduplicat.")
+    parser_restore.add_argument("dest_dir", type=str, help="Directori de backups.")
+    parser_restore.add_argument("version", type=str, help="Nom de la versió (veure versions).")
+    parser_restore.add_argument("destination", type=str, help="Ruta absoluta de l'arxiu restaurat.")
+
+    # Subparser per a batch
+    parser_batch = subparsers.add_parser("batch", help="Executa moltes operacions en paral·lel (manifest o glob).")
+    parser_batch.add_argument("manifest", type=str, nargs="?", default=None, help="Fitxer .json/.jsonl amb la llista d'operacions.")
+    parser_batch.add_argument("--glob", type=str, default=None, help="Patró d'arxius (** recursiu) en lloc del manifest.")
+    parser_batch.add_argument("--op", type=str, choices=BATCH_OPERATIONS, default="copy", help="Operació per als arxius del glob (default: copy).")
+    parser_batch.add_argument("--dest_dir", type=str, default=None, help="Directori destí per a copy/move/backup amb --glob.")
+    parser_batch.add_argument("--base", type=str, default=None, help="Carpeta base per a les rutes relatives (default: la part del glob sense comodins).")
+    parser_batch.add_argument("--suffix", type=str, default=None, help="Sufix per a backup amb --glob.")
+    parser_batch.add_argument("--dedup", action="store_true", help="Backups amb --glob al magatzem deduplicat.")
+    parser_batch.add_argument("--workers", type=int, default=DEFAULT_BATCH_WORKERS, help=f"Operacions alhora (default: {DEFAULT_BATCH_WORKERS}).")
+    parser_batch.add_argument("--stream", action="store_true", help="Una línia JSON per operació quan acaba, i el resum al final.")
+
+    args = parser.parse_args(argv)
 
     if args.info:
-        tool_info = {
-            "que_fa": "Permet copiar, moure, renombrar, eliminar i comprovar arxius en Windows.",
-            "com_ho_fa": "Utilitza les funcions de Python (shutil, os) per manipular arxius de forma segura. Crea directoris destí automàticament si no existeixen. Inclou funció de backup amb timestamp.",
-            "que_necessita": [
-                {
-                    "nom": "source",
-                    "tipus": "string",
-                    "descripcio": "Ruta absoluta de l'arxiu origen."
-                },
-                {
-                    "nom": "destination",
-                    "tipus": "string",
-                    "descripcio": "Ruta absoluta de l'arxiu destí."
-                },
-                {
-                    "nom": "path",
-                    "tipus": "string",
-                    "descripcio": "Ruta absoluta de l'arxiu a comprovar/eliminar."
-                },
-                {
-                    "nom": "dest_dir",
-                    "tipus": "string",
-                    "descripcio": "Directori destí per backup."
-                },
-                {
-                    "nom": "suffix",
-                    "tipus": "string",
-                    "descripcio": "(Opcional, per a backup) Sufix a afegir abans del timestamp."
-                }
-            ],
-            "que_retorna": "Objecte JSON amb success (bool), message (str) i informació addicional (paths, mides, dates).",
-            "funcions_disponibles": [
-                {
-                    "nom": "copy",
-                    "descripcio": "Copia un arxiu d'origen a destí.",
-                    "parametres": ["source", "destination"]
-                },
-                {
-                    "nom": "move",
-                    "descripcio": "Mou o renombra un arxiu.",
-                    "parametres": ["source", "destination"]
-                },
-                {
-                    "nom": "delete",
-                    "descripcio": "Elimina un arxiu.",
-                    "parametres": ["path"]
-                },
-                {
-                    "nom": "exists",
-                    "descripcio": "Comprova si un arxiu existeix i mostra informació.",
-                    "parametres": ["path"]
-                },
-                {
-                    "nom": "backup",
-                    "descripcio": "Copia un arxiu afegint timestamp al nom (per backups).",
-                    "parametres": ["source", "dest_dir", "suffix"]
-                }
-            ]
-        }
-        print(json.dumps(tool_info, indent=2, ensure_ascii=False))
+        print(json.dumps(TOOL_INFO, indent=2, ensure_ascii=False))
     elif args.command == "copy":
         result = copy_file(args.source, args.destination)
         print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -294,7 +824,38 @@ if __name__ == "__main__":
         result = file_exists(args.path)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "backup":
-        result = copy_with_timestamp(args.source, args.dest_dir, args.suffix)
+        result = copy_with_timestamp(args.source, args.dest_dir, args.suffix, dedup=args.dedup, chunk_size=args.chunk_size)
         print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "versions":
+        result = list_versions(args.dest_dir, args.name)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "restore":
+        result = restore_version(args.dest_dir, args.version, args.destination)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "batch":
+        try:
+            if args.glob:
+                operations = glob_operations(args.glob, args.op, args.dest_dir, args.base, args.suffix, args.dedup)
+            elif args.manifest:
+                operations = load_manifest(args.manifest)
+            else:
+                raise ValueError("Cal un manifest o --glob")
+        except (OSError, ValueError) as e:
+            print(json.dumps({"success": False, "message": f"Error: {e}"}, indent=2, ensure_ascii=False))
+            return
+        
+        def stream(result):
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        
+        result = run_batch(operations, args.workers, on_result=stream if args.stream else None)
+        if args.stream:
+            result.pop('results', None)
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        else:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
     else:
         parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
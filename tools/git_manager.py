@@ -6,13 +6,20 @@ Sistema d'integració Git per sincronitzar projectes amb repositoris remots.
 Funcions:
 - init: Configura Git per un projecte (crea/actualitza git-config.json)
 - status: Mostra fitxers modificats i estat actual
-- sync_check: Compara local vs remot (fetch + comparació)
+- snapshot: Estat complet (branch, ahead/behind, entrades) amb una sola crida a Git
+- sync_check: Compara local vs remot (fetch si les refs remotes són antigues + comparació)
+- prefetch: Refresca les refs remotes en segon pla o programat
 - pull: Actualitza carpeta local des del remot
 - commit: Crea commit amb missatge descriptiu
 - push: Puja commits locals al remot
 - log: Mostra historial de commits
+- status_all / sync_all: status o sync_check de tots els projectes configurats en paral·lel
+- timings: durada de les últimes comandes Git
 - help: Mostra ajuda detallada
 
+Totes les comandes Git tenen temps màxim (--timeout) i s'executen sense
+prompts de credencials ni pager: un fetch o push penjat es mata.
+
 Workflow recomanat:
 1. Iniciar sessió: sync_check -> pull (si cal)
 2. Durant la feina: status per veure canvis
@@ -23,54 +30,246 @@ Cada projecte té git-config.json amb URL remot, branch, ruta local.
 """
 
 import os
+import sys
+import copy
 import json
+import time
+import errno
+import signal
+import struct
+import hashlib
+import threading
+import tempfile
 import subprocess
 import argparse
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
 
-def run_git_command(command: list, cwd: str) -> dict:
+# Temps màxim per comanda (segons). Les de xarxa poden esperar el remot;
+# la resta són locals i no haurien de trigar mai tant.
+DEFAULT_GIT_TIMEOUT = 60
+NETWORK_GIT_TIMEOUT = 300
+NETWORK_GIT_COMMANDS = ('fetch', 'pull', 'push', 'clone', 'ls-remote')
+SLOW_COMMAND_MS = 2000
+COMMAND_LOG_SIZE = 200
+
+# Cap comanda pot quedar esperant una contrasenya o obrir un pager
+GIT_ENV_OVERRIDES = {
+    'GIT_TERMINAL_PROMPT': '0',
+    'GCM_INTERACTIVE': 'never',
+    'GIT_PAGER': 'cat',
+    'PAGER': 'cat',
+}
+
+# Últimes comandes executades (visibles amb l'acció timings dins del tool_daemon)
+_command_log = deque(maxlen=COMMAND_LOG_SIZE)
+_command_log_lock = threading.Lock()
+_timeout_override = None
+
+
+def set_git_timeout(timeout: float = None):
+    """Força un timeout (segons) per a totes les comandes Git (None = per defecte)."""
+    global _timeout_override
+    _timeout_override = timeout
+
+
+def _git_env() -> dict:
+    """Entorn de Git sense prompts interactius ni pager."""
+    env = dict(os.environ, **GIT_ENV_OVERRIDES)
+    env.setdefault('GIT_SSH_COMMAND', 'ssh -o BatchMode=yes')
+    return env
+
+
+def _git_subcommand(command: list) -> str:
+    """Subcomanda de Git ignorant opcions globals (git -c x=y --no-optional-locks status -> status)."""
+    args = iter(command[1:])
+    for arg in args:
+        if arg in ('-c', '-C'):
+            next(args, None)
+        elif not arg.startswith('-'):
+            return arg
+    return ''
+
+
+def _default_timeout(command: list) -> float:
+    if _timeout_override is not None:
+        return _timeout_override
+    return NETWORK_GIT_TIMEOUT if _git_subcommand(command) in NETWORK_GIT_COMMANDS else DEFAULT_GIT_TIMEOUT
+
+
+def _popen_git(command: list, cwd: str, stdin, stderr=subprocess.PIPE) -> subprocess.Popen:
+    """Popen en un grup de processos propi, perquè el kill arribi també als fills (git-remote-https, ssh)."""
+    kwargs = {}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    return subprocess.Popen(
+        command, cwd=cwd, env=_git_env(), stdin=stdin,
+        stdout=subprocess.PIPE, stderr=stderr, **kwargs
+    )
+
+
+def _kill_process_tree(process: subprocess.Popen):
+    """Mata el procés i tots els seus fills."""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+    if process.poll() is None:
+        process.kill()
+
+
+def _record_command(command: list, cwd: str, duration_ms: float, code: int,
+                    timed_out: bool = False, cancelled: bool = False):
+    with _command_log_lock:
+        _command_log.append({
+            'command': ' '.join(command[:6]) + (' ...' if len(command) > 6 else ''),
+            'cwd': cwd,
+            'duration_ms': duration_ms,
+            'code': code,
+            'timed_out': timed_out,
+            'cancelled': cancelled,
+            'slow': duration_ms >= SLOW_COMMAND_MS,
+            'at': datetime.now().isoformat(timespec='seconds')
+        })
+
+
+def get_command_timings(limit: int = 50, slow_only: bool = False) -> dict:
+    """
+    Durada de les últimes comandes Git executades per aquest procés.
+    
+    Útil dins del tool_daemon, on el mòdul viu entre crides.
+    """
+    with _command_log_lock:
+        commands = list(_command_log)
+    if slow_only:
+        commands = [c for c in commands if c['slow'] or c['timed_out']]
+    commands = commands[-limit:] if limit else commands
+    return {
+        'success': True,
+        'count': len(commands),
+        'slow_threshold_ms': SLOW_COMMAND_MS,
+        'total_ms': round(sum(c['duration_ms'] for c in commands), 1),
+        'commands': commands[::-1]
+    }
+
+
+def run_git_command(command: list, cwd: str, strip: bool = True, input: str = None,
+                    timeout: float = None, cancel_event: threading.Event = None) -> dict:
     """
     Executa una comanda Git i retorna el resultat.
     
+    La comanda s'executa sense prompts ni pager i amb un temps màxim: si
+    s'excedeix (o es demana cancel·lar amb cancel_event) es mata el procés
+    amb tots els seus fills.
+    
     Args:
         command: Llista amb la comanda i arguments ['git', 'status', '--porcelain']
         cwd: Directori de treball on executar la comanda
+        strip: Si False, la sortida es retorna tal qual (necessari amb -z)
+        input: Text per a l'stdin de Git (p.ex. --pathspec-from-file=-)
+        timeout: Segons màxims (default: NETWORK_GIT_TIMEOUT per fetch/pull/push, DEFAULT_GIT_TIMEOUT la resta)
+        cancel_event: Event que, si s'activa, atura la comanda
         
     Returns:
-        Dict amb success, output, code
+        Dict amb success, output (stdout, o stderr si stdout és buit), stdout,
+        stderr, code, duration_ms, timed_out, cancelled
     """
+    timeout = _default_timeout(command) if timeout is None else timeout
+    start = time.perf_counter()
+    deadline = start + timeout if timeout else None
+    timed_out = cancelled = False
+    
     try:
-        result = subprocess.run(
-            command,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
-        )
-        
-        return {
-            'success': result.returncode == 0,
-            'output': result.stdout.strip() if result.stdout else result.stderr.strip(),
-            'code': result.returncode
-        }
+        process = _popen_git(command, cwd, subprocess.PIPE if input is not None else subprocess.DEVNULL)
     except Exception as e:
+        _record_command(command, cwd, 0.0, -1)
         return {
             'success': False,
             'output': str(e),
-            'code': -1
+            'stdout': '',
+            'stderr': str(e),
+            'code': -1,
+            'duration_ms': 0.0,
+            'timed_out': False,
+            'cancelled': False
         }
+    
+    stdin_data = input.encode('utf-8') if input is not None else None
+    while True:
+        wait = 0.2 if cancel_event is not None else None
+        if deadline is not None:
+            remaining = max(deadline - time.perf_counter(), 0)
+            wait = remaining if wait is None else min(wait, remaining)
+        try:
+            stdout, stderr = process.communicate(stdin_data, timeout=wait)
+            break
+        except subprocess.TimeoutExpired:
+            stdin_data = None
+            timed_out = deadline is not None and time.perf_counter() >= deadline
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if timed_out or cancelled:
+                _kill_process_tree(process)
+                stdout, stderr = process.communicate()
+                break
+    
+    duration_ms = round((time.perf_counter() - start) * 1000, 1)
+    code = process.returncode
+    _record_command(command, cwd, duration_ms, code, timed_out, cancelled)
+    
+    stdout = stdout.decode('utf-8', errors='replace')
+    stderr = stderr.decode('utf-8', errors='replace')
+    if timed_out:
+        stderr = (stderr + f'\nTimeout: la comanda ha superat {timeout}s i s\'ha aturat').lstrip()
+    elif cancelled:
+        stderr = (stderr + '\nComanda cancel·lada').lstrip()
+    
+    output = stdout if stdout else stderr
+    return {
+        'success': code == 0 and not timed_out and not cancelled,
+        'output': output.strip() if strip else output,
+        'stdout': stdout.strip() if strip else stdout,
+        'stderr': stderr.strip(),
+        'code': code,
+        'duration_ms': duration_ms,
+        'timed_out': timed_out,
+        'cancelled': cancelled
+    }
+
+
+# Configuracions ja llegides: config_file -> (mtime_ns, size, config)
+# Útil quan el mòdul viu dins del tool_daemon i es reutilitza entre crides.
+_config_cache = {}
 
 
 def load_config(project_path: str) -> dict:
     """Carrega la configuració Git del projecte."""
     config_file = os.path.join(project_path, 'git-config.json')
     
-    if os.path.exists(config_file):
-        with open(config_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return None
+    try:
+        stat = os.stat(config_file)
+    except OSError:
+        _config_cache.pop(config_file, None)
+        return None
+    
+    cached = _config_cache.get(config_file)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return copy.deepcopy(cached[2])
+    
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    
+    _config_cache[config_file] = (stat.st_mtime_ns, stat.st_size, config)
+    return copy.deepcopy(config)
 
 
 def save_config(project_path: str, config: dict):
@@ -101,12 +300,12 @@ def init_project(project_path: str, remote_url: str, branch: str = 'main') -> di
         }
     
     # Verificar si Git està instal·lat
-    git_test = run_git_command(['git', '--version'], project_path)
-    if not git_test['success']:
+    git_version = get_git_version(project_path)
+    if not git_version['success']:
         return {
             'success': False,
             'error': 'Git no està instal·lat o no és accessible',
-            'details': git_test['output']
+            'details': git_version['output']
         }
     
     # Verificar si és un repositori Git
@@ -122,13 +321,9 @@ def init_project(project_path: str, remote_url: str, branch: str = 'main') -> di
                 'details': init_result['output']
             }
     
-    # Configurar remote
-    remote_exists = run_git_command(['git', 'remote', 'get-url', 'origin'], project_path)
-    if remote_exists['success']:
-        # Actualitzar URL
-        run_git_command(['git', 'remote', 'set-url', 'origin', remote_url], project_path)
-    else:
-        # Afegir remote
+    # Configurar remote: actualitzar la URL i, si no existeix, afegir-lo
+    set_url = run_git_command(['git', 'remote', 'set-url', 'origin', remote_url], project_path)
+    if not set_url['success']:
         run_git_command(['git', 'remote', 'add', 'origin', remote_url], project_path)
     
     # Crear/actualitzar configuració
@@ -152,11 +347,443 @@ def init_project(project_path: str, remote_url: str, branch: str = 'main') -> di
         'success': True,
         'message': 'Projecte configurat amb Git correctament',
         'config': config,
-        'git_version': git_test['output']
+        'git_version': git_version['output']
+    }
+
+
+# Versió de Git (no canvia durant la vida del procés)
+_git_version = None
+
+
+def get_git_version(cwd: str) -> dict:
+    """Retorna `git --version` (una sola crida per procés)."""
+    global _git_version
+    if _git_version is None:
+        result = run_git_command(['git', '--version'], cwd)
+        if not result['success']:
+            return result
+        _git_version = result
+    return _git_version
+
+
+def parse_porcelain_v2(output: str) -> dict:
+    """
+    Parseja la sortida de `git status --porcelain=v2 --branch -z`.
+    
+    Els registres van separats per NUL, de manera que els noms amb espais,
+    cometes o caràcters no ASCII arriben tal qual (sense quoting). En els
+    renames (tipus 2), el camí original és el registre següent.
+    
+    Returns:
+        Dict amb branch (oid, head, upstream, ahead, behind) i entries
+        (staged, unstaged, untracked, renamed, conflicted, ignored)
+    """
+    branch = {'oid': None, 'head': None, 'upstream': None, 'ahead': None, 'behind': None}
+    entries = {
+        'staged': [],
+        'unstaged': [],
+        'untracked': [],
+        'renamed': [],
+        'conflicted': [],
+        'ignored': []
+    }
+    
+    records = output.split('\0')
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+        
+        kind = record[0]
+        if kind == '#':
+            key, _, value = record[2:].partition(' ')
+            if key == 'branch.oid':
+                branch['oid'] = None if value == '(initial)' else value
+            elif key == 'branch.head':
+                branch['head'] = None if value == '(detached)' else value
+            elif key == 'branch.upstream':
+                branch['upstream'] = value
+            elif key == 'branch.ab':
+                ahead, behind = value.split()
+                branch['ahead'] = int(ahead)
+                branch['behind'] = abs(int(behind))
+        
+        elif kind == '1':
+            fields = record.split(' ', 8)
+            _add_entry(entries, fields[1], fields[8])
+        
+        elif kind == '2':
+            fields = record.split(' ', 9)
+            original = records[i] if i < len(records) else ''
+            i += 1
+            _add_entry(entries, fields[1], fields[9])
+            entries['renamed'].append({
+                'from': original,
+                'to': fields[9],
+                'type': 'copy' if fields[8][0] == 'C' else 'rename',
+                'score': int(fields[8][1:] or 0)
+            })
+        
+        elif kind == 'u':
+            fields = record.split(' ', 10)
+            entries['conflicted'].append({'path': fields[10], 'xy': fields[1]})
+        
+        elif kind == '?':
+            entries['untracked'].append(record[2:])
+        
+        elif kind == '!':
+            entries['ignored'].append(record[2:])
+    
+    return {'branch': branch, 'entries': entries}
+
+
+def _add_entry(entries: dict, xy: str, path: str):
+    """Classifica una entrada ordinària pel seu XY (X = índex, Y = arbre de treball)."""
+    if xy[0] != '.':
+        entries['staged'].append({'path': path, 'status': xy[0]})
+    if xy[1] != '.':
+        entries['unstaged'].append({'path': path, 'status': xy[1]})
+
+
+def _git_cache_options(cwd: str) -> list:
+    """
+    Opcions -c per accelerar `git status` en arbres grans: untracked cache
+    sempre, i el daemon fsmonitor integrat on existeix (Git >= 2.36 a Windows/macOS).
+    """
+    options = ['-c', 'core.untrackedCache=true']
+    version = get_git_version(cwd)
+    if version['success'] and sys.platform in ('win32', 'darwin'):
+        numbers = version['output'].replace('git version', '').strip().split('.')
+        try:
+            if (int(numbers[0]), int(numbers[1])) >= (2, 36):
+                options += ['-c', 'core.fsmonitor=true']
+        except (ValueError, IndexError):
+            pass
+    return options
+
+
+def get_snapshot(project_path: str, branch: str = None, git_cache: bool = False) -> dict:
+    """
+    Estat complet del repositori amb una sola crida a Git.
+    
+    `git status --porcelain=v2 --branch -z` dóna branch, upstream, ahead/behind
+    i totes les entrades. Només si la branch configurada no és l'upstream de
+    seguiment es fa un `rev-list --left-right --count` contra origin/<branch>.
+    Amb --no-optional-locks, status no reescriu l'índex (ni desperta el watcher).
+    
+    Args:
+        project_path: Ruta del projecte
+        branch: Branch remota a comparar (default: l'upstream de seguiment)
+        git_cache: Activar untracked cache / fsmonitor de Git per a aquesta crida
+        
+    Returns:
+        Dict amb success, branch, oid, upstream, ahead, behind, entries, has_changes
+    """
+    options = _git_cache_options(project_path) if git_cache else []
+    status_result = run_git_command(
+        ['git', '--no-optional-locks', *options, 'status', '--porcelain=v2', '--branch', '-z'],
+        project_path, strip=False
+    )
+    if not status_result['success']:
+        return {
+            'success': False,
+            'error': 'Error obtenint l\'estat del repositori',
+            'details': status_result['output'].strip()
+        }
+    
+    parsed = parse_porcelain_v2(status_result['output'])
+    info = parsed['branch']
+    upstream = info['upstream']
+    ahead, behind = info['ahead'], info['behind']
+    
+    if branch and upstream != f'origin/{branch}':
+        upstream = f'origin/{branch}'
+        counts = run_git_command(
+            ['git', 'rev-list', '--left-right', '--count', f'{upstream}...HEAD'], project_path
+        )
+        if counts['success']:
+            behind, ahead = (int(n) for n in counts['output'].split())
+        else:
+            ahead = behind = None
+    
+    entries = parsed['entries']
+    return {
+        'success': True,
+        'branch': info['head'],
+        'oid': info['oid'],
+        'upstream': upstream,
+        'ahead': ahead,
+        'behind': behind,
+        'entries': entries,
+        'has_changes': any(entries[key] for key in ('staged', 'unstaged', 'untracked', 'conflicted'))
     }
 
 
-def get_status(project_path: str) -> dict:
+# Cache d'estat per projecte, invalidada per un watcher del sistema de fitxers.
+# Només té efecte en processos de llarga durada (tool_daemon): cada entrada és
+# vàlida mentre el watcher no hagi vist cap canvi des que es va calcular.
+# Cada watcher inotify és un fd (i max_user_instances és petit): com a molt
+# MAX_STATUS_WATCHERS projectes vigilats, el menys usat es tanca en superar-lo.
+_status_cache = OrderedDict()
+_status_cache_lock = threading.Lock()
+DEFAULT_POLL_INTERVAL = 2.0
+MAX_STATUS_WATCHERS = 16
+
+# Dins de .git només importen els fitxers que canvien l'estat
+_GIT_STATE_FILES = {'index', 'HEAD', 'packed-refs', 'MERGE_HEAD', 'CHERRY_PICK_HEAD', 'REVERT_HEAD'}
+
+
+def _ignored_dirs(project_path: str) -> set:
+    """Carpetes ignorades per .gitignore (relatives, amb '/'): no cal vigilar-les."""
+    result = run_git_command(
+        ['git', 'ls-files', '-z', '--others', '--ignored', '--exclude-standard', '--directory'],
+        project_path, strip=False
+    )
+    if not result['success']:
+        return set()
+    return {entry.rstrip('/') for entry in result['output'].split('\0') if entry.endswith('/')}
+
+
+def _watched_dirs(project_path: str, ignored: set):
+    """Carpetes de l'arbre de treball a vigilar, més .git i .git/refs."""
+    for dirpath, dirnames, _ in os.walk(project_path):
+        relative = os.path.relpath(dirpath, project_path).replace(os.sep, '/')
+        dirnames[:] = [
+            d for d in dirnames
+            if d != '.git' and (d if relative == '.' else f'{relative}/{d}') not in ignored
+        ]
+        yield dirpath
+    
+    git_dir = os.path.join(project_path, '.git')
+    if os.path.isdir(git_dir):
+        yield git_dir
+        for dirpath, _, _ in os.walk(os.path.join(git_dir, 'refs')):
+            yield dirpath
+
+
+class _InotifyWatcher:
+    """
+    Watcher amb inotify (Linux). Els esdeveniments es llegeixen de manera no
+    bloquejant a cada consulta, de manera que no cal cap fil i no hi ha
+    finestra de lectures obsoletes.
+    """
+    
+    kind = 'inotify'
+    IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x2, 0x4, 0x8
+    IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x40, 0x80, 0x100, 0x200
+    IN_DELETE_SELF, IN_MOVE_SELF = 0x400, 0x800
+    IN_Q_OVERFLOW, IN_ISDIR = 0x4000, 0x40000000
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+            | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+    _EVENT = struct.Struct('iIII')
+    
+    def __init__(self, project_path: str, ignored: set):
+        import ctypes
+        import ctypes.util
+        
+        self.project_path = project_path
+        self.ignored = ignored
+        self.generation = 0
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._ctypes = ctypes
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        self._paths = {}
+        try:
+            for path in _watched_dirs(project_path, ignored):
+                self._add_watch(path)
+        except OSError:
+            self.close()
+            raise
+    
+    def _add_watch(self, path: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            error = self._ctypes.get_errno()
+            if error == errno.ENOENT:
+                return
+            raise OSError(error, f'inotify_add_watch: {path}')
+        self._paths[wd] = path
+    
+    def _relevant(self, directory: str, name: str) -> bool:
+        if directory == os.path.join(self.project_path, '.git'):
+            return name in _GIT_STATE_FILES
+        return True
+    
+    def _watch_new_dir(self, path: str):
+        """Vigila una carpeta nova (i les seves subcarpetes) si afecta l'estat."""
+        relative = os.path.relpath(path, self.project_path).replace(os.sep, '/')
+        if relative in self.ignored or (relative.startswith('.git/') and not relative.startswith('.git/refs')):
+            return
+        for dirpath, dirnames, _ in os.walk(path):
+            dirnames[:] = [d for d in dirnames if d != '.git']
+            try:
+                self._add_watch(dirpath)
+            except OSError:
+                self.generation += 1
+    
+    def current_generation(self) -> int:
+        """Llegeix els esdeveniments pendents i retorna el comptador de canvis."""
+        if self._fd < 0:
+            # Tancat (expulsat de la cache): no es pot garantir que no hi hagi canvis
+            self.generation += 1
+            return self.generation
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+                name = data[offset + self._EVENT.size:offset + self._EVENT.size + length].rstrip(b'\0')
+                offset += self._EVENT.size + length
+                
+                if mask & self.IN_Q_OVERFLOW:
+                    self.generation += 1
+                    continue
+                directory = self._paths.get(wd)
+                if directory is None:
+                    continue
+                name = os.fsdecode(name)
+                if not self._relevant(directory, name):
+                    continue
+                self.generation += 1
+                
+                if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._watch_new_dir(os.path.join(directory, name))
+        return self.generation
+    
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingWatcher:
+    """
+    Watcher de reserva: un fil compara cada interval una signatura de
+    (ruta, mtime, mida) de l'arbre vigilat. Una consulta pot veure un estat
+    com a molt `interval` segons antic.
+    """
+    
+    kind = 'polling'
+    
+    def __init__(self, project_path: str, ignored: set, interval: float = DEFAULT_POLL_INTERVAL):
+        self.project_path = project_path
+        self.ignored = ignored
+        self.interval = interval
+        self.generation = 0
+        self._signature = self._compute_signature()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='git-status-poll', daemon=True)
+        self._thread.start()
+    
+    def _compute_signature(self) -> str:
+        digest = hashlib.sha1()
+        git_dir = os.path.join(self.project_path, '.git')
+        for directory in _watched_dirs(self.project_path, self.ignored):
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in sorted(entries, key=lambda e: e.name):
+                        if directory == git_dir and entry.name not in _GIT_STATE_FILES:
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            digest.update(f'{entry.path}/\0'.encode('utf-8', 'surrogateescape'))
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                        digest.update(f'{entry.path}\0{stat.st_mtime_ns}\0{stat.st_size}\0'.encode('utf-8', 'surrogateescape'))
+            except OSError:
+                continue
+        return digest.hexdigest()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            signature = self._compute_signature()
+            if signature != self._signature:
+                self._signature = signature
+                self.generation += 1
+    
+    def current_generation(self) -> int:
+        return self.generation
+    
+    def close(self):
+        self._stop.set()
+
+
+def _create_watcher(project_path: str, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """inotify a Linux (si es pot), si no polling."""
+    ignored = _ignored_dirs(project_path)
+    if sys.platform.startswith('linux'):
+        try:
+            return _InotifyWatcher(project_path, ignored)
+        except (OSError, AttributeError):
+            pass  # Sense inotify o límit de watches (ENOSPC): polling
+    return _PollingWatcher(project_path, ignored, poll_interval)
+
+
+def get_snapshot_cached(project_path: str, branch: str = None, git_cache: bool = False,
+                        poll_interval: float = DEFAULT_POLL_INTERVAL) -> dict:
+    """
+    get_snapshot amb cache per projecte: si el watcher no ha vist canvis des
+    de l'últim càlcul, es retorna el mateix resultat sense cridar Git.
+    
+    Returns:
+        El snapshot amb una clau cache (hit, watcher, age_ms)
+    """
+    key = os.path.abspath(project_path)
+    evicted = []
+    with _status_cache_lock:
+        entry = _status_cache.get(key)
+        if entry is None:
+            entry = {'watcher': _create_watcher(key, poll_interval), 'results': {}}
+            _status_cache[key] = entry
+            while len(_status_cache) > MAX_STATUS_WATCHERS:
+                evicted.append(_status_cache.popitem(last=False)[1])
+        else:
+            _status_cache.move_to_end(key)
+    for old_entry in evicted:
+        old_entry['watcher'].close()
+    
+    watcher = entry['watcher']
+    generation = watcher.current_generation()
+    cached = entry['results'].get((branch, git_cache))
+    if cached and cached['generation'] == generation:
+        return {
+            **copy.deepcopy(cached['snapshot']),
+            'cache': {
+                'hit': True,
+                'watcher': watcher.kind,
+                'age_ms': round((time.time() - cached['time']) * 1000, 2)
+            }
+        }
+    
+    snapshot = get_snapshot(key, branch, git_cache)
+    if snapshot['success']:
+        entry['results'][(branch, git_cache)] = {
+            'generation': generation,
+            'snapshot': copy.deepcopy(snapshot),
+            'time': time.time()
+        }
+    snapshot['cache'] = {'hit': False, 'watcher': watcher.kind, 'age_ms': 0}
+    return snapshot
+
+
+def invalidate_status_cache(project_path: str = None):
+    """Oblida l'estat en cache d'un projecte (o de tots) i atura els watchers."""
+    with _status_cache_lock:
+        keys = [os.path.abspath(project_path)] if project_path else list(_status_cache)
+        for key in keys:
+            entry = _status_cache.pop(key, None)
+            if entry:
+                entry['watcher'].close()
+
+
+def get_status(project_path: str, cached: bool = False, git_cache: bool = False) -> dict:
     """
     Obté l'estat actual del repositori.
     
@@ -170,51 +797,136 @@ def get_status(project_path: str) -> dict:
             'error': 'Projecte no inicialitzat. Executa action=init primer.'
         }
     
-    status_result = run_git_command(['git', 'status', '--porcelain'], project_path)
-    branch_result = run_git_command(['git', 'branch', '--show-current'], project_path)
+    if cached:
+        snapshot = get_snapshot_cached(project_path, git_cache=git_cache)
+    else:
+        snapshot = get_snapshot(project_path, git_cache=git_cache)
+    if not snapshot['success']:
+        return snapshot
     
-    # Parsejar fitxers modificats
+    # Resum per fitxer (una sola categoria per fitxer, com abans)
     files = {
         'modified': [],
         'added': [],
         'deleted': [],
-        'untracked': []
+        'renamed': [],
+        'untracked': [],
+        'conflicted': []
     }
     
-    if status_result['success'] and status_result['output']:
-        for line in status_result['output'].split('\n'):
-            if not line.strip():
-                continue
-            
-            status = line[:2]
-            file = line[3:].strip()
-            
-            if 'M' in status:
-                files['modified'].append(file)
-            elif 'A' in status:
-                files['added'].append(file)
-            elif 'D' in status:
-                files['deleted'].append(file)
-            elif '?' in status:
-                files['untracked'].append(file)
+    entries = snapshot['entries']
+    renamed_paths = {r['to'] for r in entries['renamed']}
+    seen = set()
+    for entry in entries['staged'] + entries['unstaged']:
+        path = entry['path']
+        if path in seen:
+            continue
+        seen.add(path)
+        if path in renamed_paths:
+            continue
+        if entry['status'] == 'A':
+            files['added'].append(path)
+        elif entry['status'] == 'D':
+            files['deleted'].append(path)
+        else:
+            files['modified'].append(path)
     
-    has_changes = any(files.values())
+    files['renamed'] = [f"{r['from']} -> {r['to']}" for r in entries['renamed']]
+    files['untracked'] = entries['untracked']
+    files['conflicted'] = [c['path'] for c in entries['conflicted']]
     
     return {
         'success': True,
-        'branch': branch_result['output'],
+        'branch': snapshot['branch'],
+        'upstream': snapshot['upstream'],
+        'ahead': snapshot['ahead'],
+        'behind': snapshot['behind'],
         'files': files,
-        'has_changes': has_changes,
+        'has_changes': snapshot['has_changes'],
+        'cache': snapshot.get('cache'),
         'config': config
     }
 
 
-def sync_check(project_path: str) -> dict:
+# Fetch programat: les refs remotes es consideren prou recents durant
+# DEFAULT_FETCH_MAX_AGE segons; el prefetch les refresca cada interval.
+DEFAULT_FETCH_MAX_AGE = 300
+DEFAULT_PREFETCH_INTERVAL = 120
+# Dins del directori .git: no embruta l'arbre de treball ni desperta el watcher
+FETCH_STATE_FILE = 'git_manager_fetch.json'
+_fetch_state_lock = threading.Lock()
+
+
+def _git_dir(project_path: str) -> str:
+    """Directori .git del projecte (també per worktrees/submòduls, on .git és un fitxer)."""
+    git_dir = os.path.join(project_path, '.git')
+    if os.path.isdir(git_dir):
+        return git_dir
+    result = run_git_command(['git', 'rev-parse', '--absolute-git-dir'], project_path)
+    return result['output'] if result['success'] else None
+
+
+def load_fetch_state(project_path: str) -> dict:
     """
-    Comprova si hi ha diferències entre local i remot.
+    Estat de l'últim fetch del projecte (last_fetch en epoch, branch,
+    remote_oid, duration_ms, last_error...). Buit si no n'hi ha cap.
+    """
+    git_dir = _git_dir(project_path)
+    if not git_dir:
+        return {}
+    try:
+        with open(os.path.join(git_dir, FETCH_STATE_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_fetch_state(project_path: str, **changes) -> dict:
+    git_dir = _git_dir(project_path)
+    if not git_dir:
+        return {}
+    with _fetch_state_lock:
+        state = load_fetch_state(project_path)
+        state.update(changes)
+        state_file = os.path.join(git_dir, FETCH_STATE_FILE)
+        with open(state_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        os.replace(state_file + '.tmp', state_file)
+    return state
+
+
+def _remote_ref(project_path: str, branch: str) -> str:
+    result = run_git_command(['git', 'rev-parse', '--verify', '-q', f'refs/remotes/origin/{branch}'], project_path)
+    return result['output'] if result['success'] else None
+
+
+def _record_fetch(project_path: str, branch: str, duration_ms: float, before: str = None) -> dict:
+    """Desa un fetch correcte i invalida l'estat en cache si la ref remota ha canviat."""
+    remote_oid = _remote_ref(project_path, branch)
+    if remote_oid != before:
+        invalidate_status_cache(project_path)
+    return _save_fetch_state(
+        project_path,
+        branch=branch,
+        last_fetch=time.time(),
+        last_fetch_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        remote_oid=remote_oid,
+        duration_ms=duration_ms,
+        last_error=None
+    )
+
+
+def fetch_branch(project_path: str, timeout: float = None) -> dict:
+    """
+    Fetch només de la branch configurada
+    (+refs/heads/<branch>:refs/remotes/origin/<branch>) i registre del moment.
+    
+    Args:
+        project_path: Ruta del projecte
+        timeout: Segons màxims per al fetch (default: NETWORK_GIT_TIMEOUT)
     
     Returns:
-        Dict amb success, behind, ahead, needs_pull, needs_push, in_sync, message
+        Dict amb success, branch, updated, duration_ms, timed_out, stderr, last_fetch_at
     """
     config = load_config(project_path)
     if not config:
@@ -223,22 +935,76 @@ def sync_check(project_path: str) -> dict:
             'error': 'Projecte no inicialitzat'
         }
     
-    # Fetch per actualitzar referències
-    fetch_result = run_git_command(['git', 'fetch', 'origin'], project_path)
+    branch = config['git']['branch']
+    before = _remote_ref(project_path, branch)
+    refspec = f'+refs/heads/{branch}:refs/remotes/origin/{branch}'
+    fetch_result = run_git_command(['git', 'fetch', 'origin', refspec], project_path, timeout=timeout)
+    
+    if fetch_result['success']:
+        state = _record_fetch(project_path, branch, fetch_result['duration_ms'], before)
+    else:
+        state = _save_fetch_state(
+            project_path,
+            last_error=fetch_result['stderr'],
+            last_error_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+    
+    return {
+        'success': fetch_result['success'],
+        'branch': branch,
+        'refspec': refspec,
+        'updated': fetch_result['success'] and state.get('remote_oid') != before,
+        'duration_ms': fetch_result['duration_ms'],
+        'timed_out': fetch_result['timed_out'],
+        'stderr': fetch_result['stderr'],
+        'last_fetch_at': state.get('last_fetch_at')
+    }
+
+
+def sync_check(project_path: str, timeout: float = None, max_age: float = DEFAULT_FETCH_MAX_AGE) -> dict:
+    """
+    Comprova si hi ha diferències entre local i remot.
+    
+    Si l'últim fetch de la branch (d'un sync_check anterior, un pull o el
+    prefetch) té menys de max_age segons, respon a l'instant amb les refs
+    que ja hi ha; si no, fa abans un fetch de la branch configurada.
+    
+    Args:
+        project_path: Ruta del projecte
+        timeout: Segons màxims per al fetch (default: NETWORK_GIT_TIMEOUT)
+        max_age: Antiguitat màxima (segons) de les refs remotes; 0 = fetch sempre
+    
+    Returns:
+        Dict amb success, behind, ahead, needs_pull, needs_push, in_sync, message, fetch
+    """
+    config = load_config(project_path)
+    if not config:
+        return {
+            'success': False,
+            'error': 'Projecte no inicialitzat'
+        }
     
-    # Comparar local amb remot
     branch = config['git']['branch']
-    behind_result = run_git_command(
-        ['git', 'rev-list', '--count', f'HEAD..origin/{branch}'],
-        project_path
-    )
-    ahead_result = run_git_command(
-        ['git', 'rev-list', '--count', f'origin/{branch}..HEAD'],
-        project_path
-    )
+    state = load_fetch_state(project_path)
+    age = None
+    if state.get('last_fetch') and state.get('branch') == branch:
+        age = max(time.time() - state['last_fetch'], 0)
     
-    behind = int(behind_result['output']) if behind_result['success'] else 0
-    ahead = int(ahead_result['output']) if ahead_result['success'] else 0
+    # Fetch només si les refs remotes són massa antigues (o no n'hi ha registre)
+    if age is None or not max_age or age > max_age:
+        fetch = fetch_branch(project_path, timeout)
+        fetch['performed'] = True
+        if fetch['success']:
+            age = 0.0
+    else:
+        fetch = {'performed': False, 'success': True, 'last_fetch_at': state.get('last_fetch_at')}
+    fetch['age_s'] = round(age, 1) if age is not None else None
+    
+    # Comparar local amb remot (ahead/behind surten del mateix status)
+    snapshot = get_snapshot(project_path, branch)
+    
+    behind = snapshot.get('behind') or 0
+    ahead = snapshot.get('ahead') or 0
     
     # Generar missatge descriptiu
     if behind == 0 and ahead == 0:
@@ -249,6 +1015,8 @@ def sync_check(project_path: str) -> dict:
         message = f"Tens {ahead} commit(s) locals pendents de pujar. Executa push."
     else:
         message = f"Hi ha divergencies: {behind} commits al remot, {ahead} locals. Pot requerir merge."
+    if not fetch['success']:
+        message += ' (ATENCIO: el fetch ha fallat, es compara amb les referències remotes anteriors)'
     
     return {
         'success': True,
@@ -257,16 +1025,21 @@ def sync_check(project_path: str) -> dict:
         'needs_pull': behind > 0,
         'needs_push': ahead > 0,
         'in_sync': behind == 0 and ahead == 0,
-        'message': message
+        'message': message,
+        'fetch': fetch
     }
 
 
-def pull_changes(project_path: str) -> dict:
+def pull_changes(project_path: str, timeout: float = None) -> dict:
     """
     Actualitza el repositori local des del remot.
     
+    Args:
+        project_path: Ruta del projecte
+        timeout: Segons màxims per al pull (default: NETWORK_GIT_TIMEOUT)
+    
     Returns:
-        Dict amb success, output, message
+        Dict amb success, output, stderr, duration_ms, timed_out, message
     """
     config = load_config(project_path)
     if not config:
@@ -276,29 +1049,121 @@ def pull_changes(project_path: str) -> dict:
         }
     
     branch = config['git']['branch']
-    pull_result = run_git_command(['git', 'pull', 'origin', branch], project_path)
+    before = _remote_ref(project_path, branch)
+    pull_result = run_git_command(['git', 'pull', 'origin', branch], project_path, timeout=timeout)
+    if pull_result['success']:
+        _record_fetch(project_path, branch, pull_result['duration_ms'], before)
     
     # Actualitzar last_sync
     config['git']['last_sync'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     save_config(project_path, config)
+    invalidate_status_cache(project_path)
     
     return {
         'success': pull_result['success'],
         'output': pull_result['output'],
-        'message': 'Pull completat correctament' if pull_result['success'] else 'Error en el pull'
+        'stderr': pull_result['stderr'],
+        'duration_ms': pull_result['duration_ms'],
+        'timed_out': pull_result['timed_out'],
+        'message': 'Pull completat correctament' if pull_result['success'] else
+                   ('Pull aturat per timeout' if pull_result['timed_out'] else 'Error en el pull')
     }
 
 
-def commit_changes(project_path: str, message: str) -> dict:
+# Staging per lots: fitxers per crida a `git add` i mida màxima per defecte
+DEFAULT_STAGE_BATCH = 1000
+DEFAULT_MAX_FILE_SIZE = 50 * 1024 * 1024
+# Pathspecs per crida a `git status` en seleccionar (límit de línia de comandes a Windows)
+_SELECT_PATHSPEC_CHUNK = 200
+
+
+def _to_pathspec(path: str) -> str:
+    """Camí literal o glob (si conté * ? [) com a pathspec amb màgia explícita."""
+    path = path.replace('\\', '/')
+    return f':(glob){path}' if any(c in path for c in '*?[') else f':(literal){path}'
+
+
+def select_changed_files(project_path: str, paths: list = None) -> dict:
     """
-    Fa commit dels canvis actuals.
+    Fitxers amb canvis al working tree (modificats, esborrats, no seguits i en
+    conflicte, un per un) que coincideixen amb paths. Els que ja són a l'índex no cal tornar-los a afegir.
+    
+    Args:
+        paths: Camins o globs (src/*.py, docs/**); None = tots els canvis
+        
+    Returns:
+        Dict amb success, files [{path, status}] o error
+    """
+    pathspecs = [_to_pathspec(p) for p in paths] if paths else [None]
+    chunks = [pathspecs[i:i + _SELECT_PATHSPEC_CHUNK] for i in range(0, len(pathspecs), _SELECT_PATHSPEC_CHUNK)]
+    
+    files = {}
+    for chunk in chunks:
+        command = ['git', '--no-optional-locks', 'status', '--porcelain=v2', '-z', '--untracked-files=all']
+        if chunk != [None]:
+            command += ['--', *chunk]
+        result = run_git_command(command, project_path, strip=False)
+        if not result['success']:
+            return {'success': False, 'error': 'Error seleccionant fitxers', 'details': result['output'].strip()}
+        
+        entries = parse_porcelain_v2(result['output'])['entries']
+        for entry in entries['unstaged']:
+            files[entry['path']] = entry['status']
+        for path in entries['untracked']:
+            files[path] = '?'
+        # Conflictes resolts al working tree: cal git add perquè el commit no falli amb "U <path>"
+        for entry in entries['conflicted']:
+            files[entry['path']] = entry['xy']
+    
+    return {'success': True, 'files': [{'path': p, 'status': st} for p, st in files.items()]}
+
+
+def _staged_matching(project_path: str, paths: list) -> list:
+    """Fitxers de l'índex amb canvis respecte HEAD que coincideixen amb paths (None si Git falla)."""
+    pathspecs = [_to_pathspec(p) for p in paths]
+    staged = []
+    for i in range(0, len(pathspecs), _SELECT_PATHSPEC_CHUNK):
+        result = run_git_command(
+            ['git', 'diff', '--cached', '--name-only', '--no-renames', '--relative', '-z',
+             '--', *pathspecs[i:i + _SELECT_PATHSPEC_CHUNK]],
+            project_path, strip=False
+        )
+        if not result['success']:
+            return None
+        staged.extend(path for path in result['output'].split('\0') if path)
+    return list(dict.fromkeys(staged))
+
+
+def _objects_count(project_path: str) -> int:
+    """Objectes del repositori (solts + empaquetats) segons `git count-objects -v`."""
+    result = run_git_command(['git', 'count-objects', '-v'], project_path)
+    if not result['success']:
+        return None
+    values = dict(line.split(': ', 1) for line in result['output'].splitlines() if ': ' in line)
+    return int(values.get('count', 0)) + int(values.get('in-pack', 0))
+
+
+def commit_changes(project_path: str, message: str, paths: list = None,
+                   max_file_size: int = DEFAULT_MAX_FILE_SIZE, large: str = 'abort',
+                   batch_size: int = DEFAULT_STAGE_BATCH) -> dict:
+    """
+    Fa commit dels canvis actuals (tots o només els de paths).
+    
+    Fases: selecció dels fitxers canviats, control de mida (abans que Git els
+    hashegi), staging per lots amb `git add --pathspec-from-file=- --pathspec-file-nul`
+    i commit. Amb paths, el commit és `git commit --only` dels fitxers de l'índex
+    que hi coincideixen: el que ja hi hagués a l'índex fora de paths no s'hi inclou.
     
     Args:
         project_path: Ruta del projecte
         message: Missatge de commit
+        paths: Camins o globs a incloure (default: tots els canvis)
+        max_file_size: Mida màxima (bytes) d'un fitxer a afegir
+        large: Què fer amb fitxers massa grans: 'abort' (no fer res), 'skip' (deixar-los fora) o 'allow'
+        batch_size: Fitxers per crida a git add
         
     Returns:
-        Dict amb success, output, message
+        Dict amb success, output, message, staged, oversized, objects_written, timings_ms
     """
     config = load_config(project_path)
     if not config:
@@ -313,31 +1178,118 @@ def commit_changes(project_path: str, message: str) -> dict:
             'error': 'Cal proporcionar un missatge de commit'
         }
     
-    # Afegir tots els fitxers
-    add_result = run_git_command(['git', 'add', '.'], project_path)
-    if not add_result['success']:
+    timings = {}
+    start = time.perf_counter()
+    
+    def phase(name, since):
+        timings[name] = round((time.perf_counter() - since) * 1000, 2)
+        return time.perf_counter()
+    
+    # 1. Seleccionar fitxers
+    selection = select_changed_files(project_path, paths)
+    if not selection['success']:
+        return selection
+    files = selection['files']
+    mark = phase('select', start)
+    
+    # 2. Control de mida abans de hashejar
+    oversized = []
+    for entry in files:
+        if entry['status'] == 'D':
+            continue
+        try:
+            size = os.lstat(os.path.join(project_path, entry['path'])).st_size
+        except OSError:
+            continue
+        if max_file_size and size > max_file_size:
+            oversized.append({'path': entry['path'], 'size': size})
+    mark = phase('size_check', mark)
+    
+    if oversized and large == 'abort':
         return {
             'success': False,
-            'error': 'Error afegint fitxers',
-            'details': add_result['output']
+            'error': f'{len(oversized)} fitxer(s) superen {max_file_size} bytes. Usa paths per excloure\'ls, large=skip o large=allow.',
+            'oversized': oversized,
+            'timings_ms': timings
         }
     
-    # Fer commit
-    commit_result = run_git_command(['git', 'commit', '-m', message], project_path)
+    skipped = {o['path'] for o in oversized} if large == 'skip' else set()
+    to_stage = [entry['path'] for entry in files if entry['path'] not in skipped]
+    
+    # 3. Staging per lots (NUL-delimitat per stdin, camins literals)
+    objects_before = _objects_count(project_path)
+    for i in range(0, len(to_stage), max(1, batch_size)):
+        batch = to_stage[i:i + batch_size]
+        add_result = run_git_command(
+            ['git', '--literal-pathspecs', 'add', '--all',
+             '--pathspec-from-file=-', '--pathspec-file-nul'],
+            project_path, input='\0'.join(batch) + '\0'
+        )
+        if not add_result['success']:
+            return {
+                'success': False,
+                'error': 'Error afegint fitxers',
+                'details': add_result['stderr'] or add_result['output'],
+                'staged': i,
+                'timings_ms': timings
+            }
+    mark = phase('stage', mark)
+    
+    # 4. Fer commit (amb paths, només dels fitxers seleccionats)
+    commit_command, commit_input = ['git', 'commit', '-m', message], None
+    if paths:
+        selected = _staged_matching(project_path, paths)
+        if selected is None:
+            return {
+                'success': False,
+                'error': 'Error llegint l\'índex',
+                'staged': len(to_stage),
+                'timings_ms': timings
+            }
+        selected = [path for path in selected if path not in skipped]
+        if not selected:
+            return {
+                'success': False,
+                'error': 'No hi ha canvis als paths indicats',
+                'staged': len(to_stage),
+                'timings_ms': timings
+            }
+        commit_command = ['git', '--literal-pathspecs', 'commit', '--only', '-m', message,
+                          '--pathspec-from-file=-', '--pathspec-file-nul']
+        commit_input = '\0'.join(selected) + '\0'
+    commit_result = run_git_command(commit_command, project_path, input=commit_input)
+    invalidate_status_cache(project_path)
+    objects_after = _objects_count(project_path)
+    phase('commit', mark)
+    timings['total'] = round((time.perf_counter() - start) * 1000, 2)
+    
+    objects_written = None
+    if objects_before is not None and objects_after is not None:
+        objects_written = objects_after - objects_before
     
     return {
         'success': commit_result['success'],
         'output': commit_result['output'],
-        'message': 'Commit creat correctament' if commit_result['success'] else 'Error en el commit (potser no hi ha canvis?)'
+        'message': 'Commit creat correctament' if commit_result['success'] else 'Error en el commit (potser no hi ha canvis?)',
+        'staged': len(to_stage),
+        'batches': -(-len(to_stage) // max(1, batch_size)),
+        'skipped_oversized': oversized if skipped else [],
+        'oversized_allowed': oversized if large == 'allow' else [],
+        'objects_written': objects_written,
+        'timings_ms': timings
     }
 
 
-def push_changes(project_path: str) -> dict:
+def push_changes(project_path: str, timeout: float = None) -> dict:
     """
     Puja els commits locals al remot.
     
+    Args:
+        project_path: Ruta del projecte
+        timeout: Segons màxims per al push (default: NETWORK_GIT_TIMEOUT)
+    
     Returns:
-        Dict amb success, output, message
+        Dict amb success, output, stderr, duration_ms, timed_out, message
     """
     config = load_config(project_path)
     if not config:
@@ -347,12 +1299,22 @@ def push_changes(project_path: str) -> dict:
         }
     
     branch = config['git']['branch']
-    push_result = run_git_command(['git', 'push', 'origin', branch], project_path)
+    push_result = run_git_command(['git', 'push', 'origin', branch], project_path, timeout=timeout)
+    
+    if push_result['success']:
+        message = 'Push completat correctament'
+    elif push_result['timed_out']:
+        message = 'Push aturat per timeout (remot lent o credencials no disponibles?)'
+    else:
+        message = 'Error en el push'
     
     return {
         'success': push_result['success'],
         'output': push_result['output'],
-        'message': 'Push completat correctament' if push_result['success'] else 'Error en el push'
+        'stderr': push_result['stderr'],
+        'duration_ms': push_result['duration_ms'],
+        'timed_out': push_result['timed_out'],
+        'message': message
     }
 
 
@@ -390,6 +1352,456 @@ def get_log(project_path: str, limit: int = 10, show_full: bool = False) -> dict
     }
 
 
+# Directoris que no es recorren en buscar projectes
+DISCOVERY_SKIP_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv', 'vendor'}
+DEFAULT_DISCOVERY_DEPTH = 3
+DEFAULT_WORKERS = 8
+
+
+def discover_projects(root: str = None, registry: str = None,
+                      max_depth: int = DEFAULT_DISCOVERY_DEPTH) -> list:
+    """
+    Troba els projectes configurats (carpetes amb git-config.json).
+    
+    Args:
+        root: Carpeta on buscar (fins a max_depth nivells; no entra dins d'un projecte trobat)
+        registry: Fitxer JSON amb una llista de rutes o {"projects": [...]}
+        max_depth: Profunditat màxima de la cerca sota root
+        
+    Returns:
+        Llista de rutes (sense duplicats, en ordre)
+    """
+    projects = []
+    
+    if registry:
+        with open(registry, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = data.get('projects', []) if isinstance(data, dict) else data
+        for entry in entries:
+            path = entry.get('project_path') if isinstance(entry, dict) else entry
+            if path:
+                projects.append(os.path.abspath(path))
+    
+    if root:
+        root = os.path.abspath(root)
+        base_depth = root.rstrip(os.sep).count(os.sep)
+        for dirpath, dirnames, filenames in os.walk(root):
+            if 'git-config.json' in filenames:
+                projects.append(dirpath)
+                dirnames[:] = []
+                continue
+            if dirpath.count(os.sep) - base_depth >= max_depth:
+                dirnames[:] = []
+                continue
+            dirnames[:] = sorted(d for d in dirnames if d not in DISCOVERY_SKIP_DIRS)
+    
+    return list(dict.fromkeys(projects))
+
+
+def iter_all(projects: list, action: str = 'status', workers: int = DEFAULT_WORKERS, **options):
+    """
+    Executa status, sync_check o fetch_branch a molts projectes amb un pool de fils.
+    
+    Els subprocessos de Git s'executen en paral·lel (el temps total s'acosta
+    al del repositori més lent) i cada resultat es retorna tan bon punt acaba.
+    
+    Args:
+        options: Arguments extra per a la funció (p.ex. max_age per a sync)
+    
+    Yields:
+        Dict del resultat de cada projecte amb project_path i duration_ms
+    """
+    function = {'sync': sync_check, 'fetch': fetch_branch}.get(action, get_status)
+    
+    def run(project_path):
+        start = time.perf_counter()
+        try:
+            result = function(project_path, **options)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        result = {'project_path': project_path, **result}
+        result['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(projects) or 1))) as executor:
+        futures = [executor.submit(run, path) for path in projects]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_all(action: str = 'status', root: str = None, registry: str = None,
+            workers: int = DEFAULT_WORKERS, max_depth: int = DEFAULT_DISCOVERY_DEPTH,
+            on_result=None, **options) -> dict:
+    """
+    status_all / sync_all: descobreix els projectes i els processa en paral·lel.
+    
+    Args:
+        action: 'status' o 'sync'
+        root, registry, max_depth: Com a discover_projects
+        workers: Projectes processats alhora
+        on_result: Callback cridat amb cada resultat quan acaba (streaming)
+        options: Arguments extra per a cada crida (p.ex. max_age per a sync)
+        
+    Returns:
+        Dict amb success, projects (en ordre d'acabament) i temps total vs suma
+    """
+    if not root and not registry:
+        return {
+            'success': False,
+            'error': 'Cal indicar root o registry'
+        }
+    
+    projects = discover_projects(root, registry, max_depth)
+    start = time.perf_counter()
+    results = []
+    for result in iter_all(projects, action, workers, **options):
+        results.append(result)
+        if on_result:
+            on_result(result)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    
+    failed = [r['project_path'] for r in results if not r.get('success')]
+    summary = {
+        'success': not failed,
+        'action': f'{action}_all',
+        'total': len(results),
+        'failed': failed,
+        'elapsed_ms': elapsed_ms,
+        'sum_duration_ms': round(sum(r['duration_ms'] for r in results), 2),
+        'slowest_ms': max((r['duration_ms'] for r in results), default=0)
+    }
+    if action == 'sync':
+        summary['needs_pull'] = [r['project_path'] for r in results if r.get('needs_pull')]
+        summary['needs_push'] = [r['project_path'] for r in results if r.get('needs_push')]
+    else:
+        summary['with_changes'] = [r['project_path'] for r in results if r.get('has_changes')]
+    summary['projects'] = results
+    return summary
+
+
+class _Prefetcher:
+    """
+    Fil en segon pla que fa fetch_branch de tots els projectes cada interval.
+    
+    Només té sentit dins d'un procés resident (tool_daemon); fora, usar el
+    mode loop o cridar el mode once des del programador de tasques.
+    """
+    
+    def __init__(self, projects: list, interval: float, workers: int, timeout: float = None):
+        self.projects = projects
+        self.interval = interval
+        self.workers = workers
+        self.timeout = timeout
+        self.cycles = 0
+        self.last_cycle = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='git-prefetch', daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.last_cycle = prefetch_once(self.projects, self.workers, self.timeout)
+            self.cycles += 1
+            self._stop.wait(self.interval)
+    
+    def running(self) -> bool:
+        return self._thread.is_alive()
+    
+    def stop(self):
+        self._stop.set()
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def prefetch_once(projects: list, workers: int = DEFAULT_WORKERS, timeout: float = None) -> dict:
+    """Un cicle de prefetch: fetch de la branch configurada de cada projecte, en paral·lel."""
+    start = time.perf_counter()
+    results = list(iter_all(projects, 'fetch', workers, timeout=timeout))
+    return {
+        'success': all(r.get('success') for r in results),
+        'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+        'updated': [r['project_path'] for r in results if r.get('updated')],
+        'failed': [r['project_path'] for r in results if not r.get('success')],
+        'projects': results
+    }
+
+
+def start_prefetch(projects: list, interval: float = DEFAULT_PREFETCH_INTERVAL,
+                   workers: int = DEFAULT_WORKERS, timeout: float = None) -> dict:
+    """Engega (o substitueix) el prefetch en segon pla d'aquest procés."""
+    global _prefetcher
+    if not projects:
+        return {
+            'success': False,
+            'error': 'No s\'ha trobat cap projecte per fer prefetch'
+        }
+    with _prefetcher_lock:
+        if _prefetcher:
+            _prefetcher.stop()
+        _prefetcher = _Prefetcher(projects, max(interval, 1), workers, timeout)
+    return {
+        'success': True,
+        'message': f'Prefetch actiu cada {interval}s per {len(projects)} projecte(s)',
+        'projects': projects,
+        'interval': interval
+    }
+
+
+def stop_prefetch() -> dict:
+    """Atura el prefetch en segon pla."""
+    global _prefetcher
+    with _prefetcher_lock:
+        running = _prefetcher is not None and _prefetcher.running()
+        if _prefetcher:
+            _prefetcher.stop()
+        _prefetcher = None
+    return {
+        'success': True,
+        'message': 'Prefetch aturat' if running else 'No hi havia cap prefetch actiu'
+    }
+
+
+def prefetch_status(projects: list = None) -> dict:
+    """
+    Estat del prefetch d'aquest procés i antiguitat de l'últim fetch de cada
+    projecte (llegit del disc, per tant també vàlid des d'un altre procés).
+    """
+    with _prefetcher_lock:
+        prefetcher = _prefetcher if _prefetcher and _prefetcher.running() else None
+    if projects is None:
+        projects = prefetcher.projects if prefetcher else []
+    
+    now = time.time()
+    states = []
+    for project_path in projects:
+        state = load_fetch_state(project_path)
+        states.append({
+            'project_path': project_path,
+            'branch': state.get('branch'),
+            'last_fetch_at': state.get('last_fetch_at'),
+            'age_s': round(now - state['last_fetch'], 1) if state.get('last_fetch') else None,
+            'last_error': state.get('last_error')
+        })
+    
+    return {
+        'success': True,
+        'running': prefetcher is not None,
+        'interval': prefetcher.interval if prefetcher else None,
+        'cycles': prefetcher.cycles if prefetcher else 0,
+        'last_cycle_at': prefetcher.last_cycle['at'] if prefetcher and prefetcher.last_cycle else None,
+        'projects': states
+    }
+
+
+# Log estructurat: camps separats per \x1f, cada commit comença amb \x1e (-z separa per NUL)
+LOG_FORMAT = '%x1e%H%x1f%P%x1f%an%x1f%ae%x1f%aI%x1f%s'
+LOG_FIELDS = ('hash', 'parents', 'author', 'email', 'date', 'subject')
+DEFAULT_LOG_PAGE = 50
+MAX_LOG_PAGE = 1000
+
+
+def _feed_stdin(stdin, data: bytes):
+    """Escriu l'input d'un procés i tanca stdin (ignora que el procés hagi acabat abans)."""
+    try:
+        stdin.write(data)
+    except (BrokenPipeError, OSError, ValueError):
+        pass
+    finally:
+        try:
+            stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+
+def stream_git_command(command: list, cwd: str, input: str = None, separator: bytes = b'\0',
+                       timeout: float = None):
+    """
+    Executa una comanda Git i en retorna la sortida registre a registre a
+    mesura que arriba (sense carregar-la sencera a memòria).
+    
+    Si el consumidor deixa d'iterar abans d'hora, o se supera el timeout
+    (mateixos valors per defecte que run_git_command), el procés es mata.
+    
+    Yields:
+        Cada registre (str) separat per separator
+    
+    Raises:
+        RuntimeError: si Git acaba amb error o per timeout
+    """
+    timeout = _default_timeout(command) if timeout is None else timeout
+    start = time.perf_counter()
+    # stderr a un fitxer temporal: amb una PIPE que només es llegeix al final, Git
+    # es bloquejaria escrivint-hi avisos mentre aquí s'espera stdout
+    stderr_file = tempfile.TemporaryFile()
+    try:
+        process = _popen_git(command, cwd, subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                             stderr=stderr_file)
+    except BaseException:
+        stderr_file.close()
+        raise
+    timer = threading.Timer(timeout, _kill_process_tree, args=(process,)) if timeout else None
+    if timer:
+        timer.daemon = True
+        timer.start()
+    finished = False
+    try:
+        if input is not None:
+            # En un fil: si Git escriu a stdout abans de llegir tot l'input, no ens bloquegem
+            threading.Thread(target=_feed_stdin, args=(process.stdin, input.encode('utf-8')),
+                             daemon=True).start()
+        
+        pending = b''
+        while True:
+            chunk = process.stdout.read1(65536) if hasattr(process.stdout, 'read1') else process.stdout.read(65536)
+            if not chunk:
+                break
+            pending += chunk
+            *records, pending = pending.split(separator)
+            for record in records:
+                yield record.decode('utf-8', errors='replace')
+        if pending:
+            yield pending.decode('utf-8', errors='replace')
+        
+        process.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode('utf-8', errors='replace')
+        if process.returncode != 0:
+            if timer and not timer.is_alive() and process.returncode < 0:
+                raise RuntimeError(f'Timeout: la comanda ha superat {timeout}s i s\'ha aturat')
+            raise RuntimeError(stderr.strip() or f'git ha acabat amb codi {process.returncode}')
+        finished = True
+    finally:
+        if timer:
+            timer.cancel()
+        if not finished and process.poll() is None:
+            _kill_process_tree(process)
+        process.wait()
+        process.stdout.close()
+        stderr_file.close()
+        _record_command(command, cwd, round((time.perf_counter() - start) * 1000, 1), process.returncode)
+
+
+def parse_log_records(records, numstat: bool = False):
+    """
+    Converteix els registres de `git log -z --format=LOG_FORMAT [--numstat]`
+    en commits, en streaming.
+    
+    Amb --numstat, cada fitxer és 'afegides\tesborrades\tcamí'; en un rename el
+    camí és buit i els dos registres següents són l'origen i el destí.
+    
+    Yields:
+        Dict per commit: hash, parents, author, email, date, subject (i files)
+    """
+    commit = None
+    records = iter(records)
+    for record in records:
+        record = record.lstrip('\n')
+        if record.startswith('\x1e'):
+            if commit is not None:
+                yield commit
+            values = record[1:].split('\x1f', len(LOG_FIELDS) - 1)
+            commit = dict(zip(LOG_FIELDS, values))
+            commit['parents'] = commit.get('parents', '').split()
+            if numstat:
+                commit['files'] = []
+        elif record and commit is not None and numstat:
+            added, deleted, path = record.split('\t', 2)
+            entry = {
+                'added': None if added == '-' else int(added),
+                'deleted': None if deleted == '-' else int(deleted),
+                'path': path
+            }
+            if not path:
+                entry['from'] = next(records, '')
+                entry['path'] = next(records, '')
+            commit['files'].append(entry)
+    if commit is not None:
+        yield commit
+
+
+def get_log_page(project_path: str, limit: int = DEFAULT_LOG_PAGE, after: str = None,
+                 numstat: bool = False, rev: str = 'HEAD') -> dict:
+    """
+    Pàgina del log estructurat amb cursor.
+    
+    1) `git rev-list` (en streaming) troba els hashes de la pàgina: els limit
+       commits que venen després de `after` en l'ordre del log; el procés es
+       talla tan bon punt n'hi ha prou.
+    2) `git log --no-walk=unsorted --stdin` dóna el detall només d'aquests
+       commits, de manera que --numstat no calcula diffs dels commits saltats.
+    
+    Args:
+        project_path: Ruta del projecte
+        limit: Commits per pàgina (màx. MAX_LOG_PAGE)
+        after: Hash de l'últim commit de la pàgina anterior (cursor)
+        numstat: Incloure línies afegides/esborrades per fitxer
+        rev: Revisió d'inici (default: HEAD)
+        
+    Returns:
+        Dict amb success, commits, has_more, next_cursor
+    """
+    config = load_config(project_path)
+    if not config:
+        return {
+            'success': False,
+            'error': 'Projecte no inicialitzat'
+        }
+    
+    limit = max(1, min(limit, MAX_LOG_PAGE))
+    hashes = []
+    found = after is None
+    try:
+        for commit_hash in stream_git_command(['git', 'rev-list', rev], project_path, separator=b'\n'):
+            if not found:
+                found = commit_hash == after or (len(after) >= 4 and commit_hash.startswith(after))
+                continue
+            hashes.append(commit_hash)
+            if len(hashes) > limit:
+                break
+    except RuntimeError as e:
+        return {
+            'success': False,
+            'error': 'Error llegint l\'historial',
+            'details': str(e)
+        }
+    
+    if not found:
+        return {
+            'success': False,
+            'error': f'Cursor no trobat a l\'historial de {rev}: {after}'
+        }
+    
+    has_more = len(hashes) > limit
+    hashes = hashes[:limit]
+    commits = []
+    if hashes:
+        command = ['git', 'log', '--no-walk=unsorted', '--stdin', '-z', f'--format={LOG_FORMAT}']
+        if numstat:
+            command += ['--numstat', '-M']
+        try:
+            records = stream_git_command(command, project_path, input='\n'.join(hashes) + '\n')
+            commits = list(parse_log_records(records, numstat))
+        except RuntimeError as e:
+            return {
+                'success': False,
+                'error': 'Error llegint els commits',
+                'details': str(e)
+            }
+    
+    return {
+        'success': True,
+        'rev': rev,
+        'after': after,
+        'count': len(commits),
+        'commits': commits,
+        'has_more': has_more,
+        'next_cursor': commits[-1]['hash'] if has_more and commits else None
+    }
+
+
 def show_help() -> dict:
     """Mostra ajuda detallada del tool."""
     return {
@@ -397,27 +1809,200 @@ def show_help() -> dict:
         'tool': 'Git Manager per Project Manager',
         'description': 'Gestiona repositoris Git per sincronitzar projectes amb GitHub/GitLab',
         'workflow': {
-            '1. Iniciar sessió': 'sync_check -> pull (si cal)',
+            '1. Iniciar sessió': 'sync_check -> pull (si cal); amb prefetch actiu el sync_check és immediat',
             '2. Durant la feina': 'status per veure canvis',
             '3. Checkpoint': 'commit amb missatge descriptiu',
             '4. Final sessió': 'push per pujar canvis'
         },
         'actions': {
             'init': 'Configura Git per un projecte (requereix remote_url)',
-            'status': 'Mostra fitxers modificats i estat actual',
-            'sync_check': 'Compara local vs remot (fetch + comparació)',
+            'status': 'Mostra fitxers modificats i estat actual (--cached: estat en cache invalidat per watcher)',
+            'snapshot': 'Estat complet en una crida: branch, upstream, ahead/behind, staged/unstaged/untracked/renamed/conflicted',
+            'sync_check': 'Compara local vs remot (fetch només si les refs tenen més de --max_age segons)',
             'pull': 'Actualitza carpeta local des del remot',
-            'commit': 'Crea commit amb missatge (requereix message)',
+            'commit': 'Crea commit amb missatge (requereix message; opcional paths/globs, control de mida)',
             'push': 'Puja commits locals al remot',
-            'log': 'Mostra historial de commits',
+            'log': 'Mostra historial de commits (--structured: pàgines amb cursor --after)',
+            'status_all': 'Status de tots els projectes sota --root o del --registry, en paral·lel',
+            'sync_all': 'sync_check (fetch + comparació) de tots els projectes, en paral·lel',
+            'prefetch': 'Refresca les refs remotes: start/stop/status (segon pla al tool_daemon), once, loop',
+            'timings': 'Durada de les últimes comandes Git (les lentes marcades amb slow)',
             'help': 'Mostra aquesta ajuda'
         }
     }
 
 
-if __name__ == "__main__":
+TOOL_INFO = {
+    "que_fa": "Gestiona repositoris Git per sincronitzar projectes amb GitHub/GitLab. Cada projecte te git-config.json amb configuracio.",
+    "com_ho_fa": "Executa comandes Git (init, status, fetch, pull, commit, push) amb temps màxim per comanda, sense prompts de credencials ni pager, i guarda configuració en JSON. Compara local vs remot per sincronització.",
+    "que_necessita": [
+        {
+            "nom": "project_path",
+            "tipus": "string",
+            "descripcio": "Ruta absoluta del projecte."
+        },
+        {
+            "nom": "remote_url",
+            "tipus": "string",
+            "descripcio": "URL del repositori remot (per init)."
+        },
+        {
+            "nom": "branch",
+            "tipus": "string",
+            "descripcio": "Branch a utilitzar (default: main)."
+        },
+        {
+            "nom": "message",
+            "tipus": "string",
+            "descripcio": "Missatge de commit (per commit)."
+        },
+        {
+            "nom": "limit",
+            "tipus": "integer",
+            "descripcio": "Número de commits a mostrar (per log)."
+        },
+        {
+            "nom": "show_full",
+            "tipus": "boolean",
+            "descripcio": "Mostrar log complet (per log)."
+        },
+        {
+            "nom": "after",
+            "tipus": "string",
+            "descripcio": "Cursor de paginació: next_cursor de la pàgina anterior (per log structured)."
+        },
+        {
+            "nom": "paths",
+            "tipus": "array",
+            "descripcio": "Camins o globs a incloure al commit (per commit, default: tots els canvis)."
+        },
+        {
+            "nom": "max_file_size",
+            "tipus": "integer",
+            "descripcio": "Mida màxima d'un fitxer a afegir en bytes (per commit, default: 50 MB)."
+        },
+        {
+            "nom": "large",
+            "tipus": "string",
+            "descripcio": "abort/skip/allow - Què fer amb fitxers massa grans (per commit, default: abort)."
+        },
+        {
+            "nom": "cached",
+            "tipus": "boolean",
+            "descripcio": "Reutilitzar l'estat en cache mentre el watcher no vegi canvis (per status/snapshot; útil amb tool_daemon)."
+        },
+        {
+            "nom": "git_cache",
+            "tipus": "boolean",
+            "descripcio": "Activar core.untrackedCache (i core.fsmonitor a Windows/macOS amb Git >= 2.36) per a la crida (per status/snapshot)."
+        },
+        {
+            "nom": "root",
+            "tipus": "string",
+            "descripcio": "Carpeta on buscar projectes amb git-config.json (per status_all/sync_all)."
+        },
+        {
+            "nom": "registry",
+            "tipus": "string",
+            "descripcio": "Fitxer JSON amb la llista de rutes de projectes (per status_all/sync_all)."
+        },
+        {
+            "nom": "workers",
+            "tipus": "integer",
+            "descripcio": "Projectes processats alhora (per status_all/sync_all, default: 8)."
+        },
+        {
+            "nom": "max_age",
+            "tipus": "number",
+            "descripcio": "Antiguitat màxima en segons de les refs remotes per a sync_check (default: 300; 0 = fetch sempre)."
+        },
+        {
+            "nom": "interval",
+            "tipus": "number",
+            "descripcio": "Segons entre cicles de prefetch (default: 120)."
+        },
+        {
+            "nom": "timeout",
+            "tipus": "number",
+            "descripcio": "Segons màxims per comanda Git (default: 300 per fetch/pull/push, 60 la resta). En superar-lo es mata el procés i el resultat porta timed_out=true."
+        }
+    ],
+    "que_retorna": "Objecte JSON amb success (bool), informació detallada segons l'acció.",
+    "funcions_disponibles": [
+        {
+            "nom": "init",
+            "descripcio": "Configura Git per un projecte (crea git-config.json).",
+            "parametres": ["project_path", "remote_url", "branch"]
+        },
+        {
+            "nom": "status",
+            "descripcio": "Mostra fitxers modificats i estat actual. Amb cached=true, dins del tool_daemon, l'estat es guarda per projecte i un watcher (inotify a Linux, polling a la resta) l'invalida quan canvia l'arbre: consultes repetides sense canvis tornen en mil·lisegons.",
+            "parametres": ["project_path", "cached", "git_cache"]
+        },
+        {
+            "nom": "snapshot",
+            "descripcio": "Estat complet amb una sola crida (git status --porcelain=v2 --branch -z): branch, upstream, ahead/behind i entrades staged/unstaged/untracked/renamed/conflicted.",
+            "parametres": ["project_path", "branch", "cached", "git_cache"]
+        },
+        {
+            "nom": "sync_check",
+            "descripcio": "Compara local vs remot. Si l'últim fetch (sync_check, pull o prefetch) té menys de max_age segons respon a l'instant amb les refs remotes que ja hi ha; si no, fa fetch només de la branch configurada. Si el fetch falla o es talla per timeout es compara amb les referències anteriors i ho indica.",
+            "parametres": ["project_path", "max_age", "timeout"]
+        },
+        {
+            "nom": "pull",
+            "descripcio": "Actualitza carpeta local des del remot.",
+            "parametres": ["project_path", "timeout"]
+        },
+        {
+            "nom": "commit",
+            "descripcio": "Crea commit amb missatge descriptiu. Afegeix només els fitxers canviats (o els de paths/globs) per lots via --pathspec-from-file, i atura el commit si algun fitxer supera max_file_size abans de hashejar-lo. Retorna temps per fase i objectes escrits.",
+            "parametres": ["project_path", "message", "paths", "max_file_size", "large", "batch_size"]
+        },
+        {
+            "nom": "push",
+            "descripcio": "Puja commits locals al remot.",
+            "parametres": ["project_path", "timeout"]
+        },
+        {
+            "nom": "log",
+            "descripcio": "Mostra historial de commits. Amb structured=true retorna una pàgina de commits estructurats (hash, parents, author, email, date, subject i, amb numstat, fitxers amb línies afegides/esborrades) i next_cursor per demanar la següent amb after=<hash>.",
+            "parametres": ["project_path", "limit", "show_full", "structured", "after", "numstat", "rev"]
+        },
+        {
+            "nom": "status_all",
+            "descripcio": "Status de tots els projectes configurats (git-config.json) sota root o d'un registre, amb un pool de fils. Amb --stream escriu una línia JSON per projecte quan acaba i el resum al final.",
+            "parametres": ["root", "registry", "workers", "max_depth", "stream"]
+        },
+        {
+            "nom": "sync_all",
+            "descripcio": "sync_check de tots els projectes en paral·lel: el temps total s'acosta al del repositori més lent.",
+            "parametres": ["root", "registry", "workers", "max_depth", "stream", "max_age"]
+        },
+        {
+            "nom": "prefetch",
+            "descripcio": "Refresca les refs remotes (fetch de la branch configurada) i en desa el moment a .git/git_manager_fetch.json. Modes: start/stop/status (fil en segon pla dins del tool_daemon), once (un cicle, per al programador de tasques) i loop (cicles en primer pla cada interval).",
+            "parametres": ["mode", "project_paths", "root", "registry", "interval", "workers"]
+        },
+        {
+            "nom": "timings",
+            "descripcio": "Durada de les últimes comandes Git executades (dins del tool_daemon, on el mòdul persisteix entre crides); slow_only mostra només les lentes o tallades per timeout.",
+            "parametres": ["limit", "slow_only"]
+        },
+        {
+            "nom": "help",
+            "descripcio": "Mostra ajuda detallada.",
+            "parametres": []
+        }
+    ]
+}
+
+
+def main(argv=None):
+    """Punt d'entrada CLI (argv=None llegeix sys.argv)"""
     parser = argparse.ArgumentParser(description="Gestor de Repositoris Git per Project Manager")
     parser.add_argument("--info", action="store_true", help="Mostra la informació d'autodescripció de la tool.")
+    parser.add_argument("--timeout", type=float, default=None, help=f"Segons màxims per comanda Git (default: {NETWORK_GIT_TIMEOUT} xarxa, {DEFAULT_GIT_TIMEOUT} la resta).")
 
     subparsers = parser.add_subparsers(dest="command", help="Comandes disponibles")
 
@@ -430,10 +2015,20 @@ if __name__ == "__main__":
     # Subparser per status
     parser_status = subparsers.add_parser("status", help="Mostra fitxers modificats i estat actual.")
     parser_status.add_argument("project_path", type=str, help="Ruta absoluta del projecte.")
+    parser_status.add_argument("--cached", action="store_true", help="Reutilitzar l'estat si el watcher no ha vist canvis (dins del tool_daemon).")
+    parser_status.add_argument("--git_cache", action="store_true", help="Usar untracked cache / fsmonitor de Git.")
+
+    # Subparser per snapshot
+    parser_snapshot = subparsers.add_parser("snapshot", help="Estat complet amb una sola crida a Git.")
+    parser_snapshot.add_argument("project_path", type=str, help="Ruta absoluta del projecte.")
+    parser_snapshot.add_argument("--branch", type=str, default=None, help="Branch remota a comparar (default: upstream de seguiment).")
+    parser_snapshot.add_argument("--cached", action="store_true", help="Reutilitzar l'estat si el watcher no ha vist canvis (dins del tool_daemon).")
+    parser_snapshot.add_argument("--git_cache", action="store_true", help="Usar untracked cache / fsmonitor de Git.")
 
     # Subparser per sync_check
     parser_sync = subparsers.add_parser("sync_check", help="Compara local vs remot.")
     parser_sync.add_argument("project_path", type=str, help="Ruta absoluta del projecte.")
+    parser_sync.add_argument("--max_age", type=float, default=DEFAULT_FETCH_MAX_AGE, help=f"Fer fetch només si l'últim té més d'aquests segons (default: {DEFAULT_FETCH_MAX_AGE}, 0 = sempre).")
 
     # Subparser per pull
     parser_pull = subparsers.add_parser("pull", help="Actualitza carpeta local des del remot.")
@@ -443,6 +2038,10 @@ if __name__ == "__main__":
     parser_commit = subparsers.add_parser("commit", help="Crea commit amb missatge.")
     parser_commit.add_argument("project_path", type=str, help="Ruta absoluta del projecte.")
     parser_commit.add_argument("message", type=str, help="Missatge de commit.")
+    parser_commit.add_argument("--paths", nargs="+", default=None, help="Camins o globs a incloure (default: tots els canvis).")
+    parser_commit.add_argument("--max_file_size", type=int, default=DEFAULT_MAX_FILE_SIZE, help=f"Mida màxima d'un fitxer en bytes (default: {DEFAULT_MAX_FILE_SIZE}, 0 = sense límit).")
+    parser_commit.add_argument("--large", choices=["abort", "skip", "allow"], default="abort", help="Fitxers massa grans: abort, skip o allow (default: abort).")
+    parser_commit.add_argument("--batch_size", type=int, default=DEFAULT_STAGE_BATCH, help=f"Fitxers per crida a git add (default: {DEFAULT_STAGE_BATCH}).")
 
     # Subparser per push
     parser_push = subparsers.add_parser("push", help="Puja commits locals al remot.")
@@ -453,116 +2052,122 @@ if __name__ == "__main__":
     parser_log.add_argument("project_path", type=str, help="Ruta absoluta del projecte.")
     parser_log.add_argument("--limit", type=int, default=10, help="Número de commits a mostrar.")
     parser_log.add_argument("--show_full", action="store_true", help="Mostrar log complet.")
+    parser_log.add_argument("--structured", action="store_true", help="Log estructurat per pàgines (hash, parents, author, date, subject).")
+    parser_log.add_argument("--after", type=str, default=None, help="Cursor: hash de l'últim commit de la pàgina anterior (amb --structured).")
+    parser_log.add_argument("--numstat", action="store_true", help="Incloure fitxers amb línies afegides/esborrades (amb --structured).")
+    parser_log.add_argument("--rev", type=str, default="HEAD", help="Revisió d'inici (amb --structured, default: HEAD).")
+
+    # Subparsers per status_all / sync_all
+    for name, help_text in (("status_all", "Status de tots els projectes en paral·lel."),
+                            ("sync_all", "sync_check de tots els projectes en paral·lel.")):
+        parser_all = subparsers.add_parser(name, help=help_text)
+        parser_all.add_argument("--root", type=str, default=None, help="Carpeta on buscar projectes (git-config.json).")
+        parser_all.add_argument("--registry", type=str, default=None, help="Fitxer JSON amb la llista de projectes.")
+        parser_all.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Projectes alhora (default: {DEFAULT_WORKERS}).")
+        parser_all.add_argument("--max_depth", type=int, default=DEFAULT_DISCOVERY_DEPTH, help=f"Profunditat de cerca sota root (default: {DEFAULT_DISCOVERY_DEPTH}).")
+        parser_all.add_argument("--stream", action="store_true", help="Una línia JSON per projecte quan acaba, i el resum al final.")
+        if name == "sync_all":
+            parser_all.add_argument("--max_age", type=float, default=DEFAULT_FETCH_MAX_AGE, help=f"Fer fetch només si l'últim té més d'aquests segons (default: {DEFAULT_FETCH_MAX_AGE}, 0 = sempre).")
+
+    # Subparser per prefetch
+    parser_prefetch = subparsers.add_parser("prefetch", help="Refresca les refs remotes en segon pla o programat.")
+    parser_prefetch.add_argument("mode", choices=["start", "stop", "status", "once", "loop"],
+                                 help="start/stop/status: fil en segon pla (dins del tool_daemon); once: un cicle; loop: cicles en primer pla.")
+    parser_prefetch.add_argument("project_paths", nargs="*", help="Projectes (a més dels de --root / --registry).")
+    parser_prefetch.add_argument("--root", type=str, default=None, help="Carpeta on buscar projectes (git-config.json).")
+    parser_prefetch.add_argument("--registry", type=str, default=None, help="Fitxer JSON amb la llista de projectes.")
+    parser_prefetch.add_argument("--max_depth", type=int, default=DEFAULT_DISCOVERY_DEPTH, help=f"Profunditat de cerca sota root (default: {DEFAULT_DISCOVERY_DEPTH}).")
+    parser_prefetch.add_argument("--interval", type=float, default=DEFAULT_PREFETCH_INTERVAL, help=f"Segons entre cicles (default: {DEFAULT_PREFETCH_INTERVAL}).")
+    parser_prefetch.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Projectes alhora (default: {DEFAULT_WORKERS}).")
+
+    # Subparser per timings
+    parser_timings = subparsers.add_parser("timings", help="Durada de les últimes comandes Git.")
+    parser_timings.add_argument("--limit", type=int, default=50, help="Comandes a mostrar (default: 50).")
+    parser_timings.add_argument("--slow_only", action="store_true", help=f"Només les que superen {SLOW_COMMAND_MS} ms o s'han tallat.")
 
     # Subparser per help
     parser_help = subparsers.add_parser("help", help="Mostra ajuda detallada.")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    set_git_timeout(args.timeout)
 
     if args.info:
-        tool_info = {
-            "que_fa": "Gestiona repositoris Git per sincronitzar projectes amb GitHub/GitLab. Cada projecte te git-config.json amb configuracio.",
-            "com_ho_fa": "Executa comandes Git (init, status, fetch, pull, commit, push) i guarda configuració en JSON. Compara local vs remot per sincronització.",
-            "que_necessita": [
-                {
-                    "nom": "project_path",
-                    "tipus": "string",
-                    "descripcio": "Ruta absoluta del projecte."
-                },
-                {
-                    "nom": "remote_url",
-                    "tipus": "string",
-                    "descripcio": "URL del repositori remot (per init)."
-                },
-                {
-                    "nom": "branch",
-                    "tipus": "string",
-                    "descripcio": "Branch a utilitzar (default: main)."
-                },
-                {
-                    "nom": "message",
-                    "tipus": "string",
-                    "descripcio": "Missatge de commit (per commit)."
-                },
-                {
-                    "nom": "limit",
-                    "tipus": "integer",
-                    "descripcio": "Número de commits a mostrar (per log)."
-                },
-                {
-                    "nom": "show_full",
-                    "tipus": "boolean",
-                    "descripcio": "Mostrar log complet (per log)."
-                }
-            ],
-            "que_retorna": "Objecte JSON amb success (bool), informació detallada segons l'acció.",
-            "funcions_disponibles": [
-                {
-                    "nom": "init",
-                    "descripcio": "Configura Git per un projecte (crea git-config.json).",
-                    "parametres": ["project_path", "remote_url", "branch"]
-                },
-                {
-                    "nom": "status",
-                    "descripcio": "Mostra fitxers modificats i estat actual.",
-                    "parametres": ["project_path"]
-                },
-                {
-                    "nom": "sync_check",
-                    "descripcio": "Compara local vs remot (fetch + comparació).",
-                    "parametres": ["project_path"]
-                },
-                {
-                    "nom": "pull",
-                    "descripcio": "Actualitza carpeta local des del remot.",
-                    "parametres": ["project_path"]
-                },
-                {
-                    "nom": "commit",
-                    "descripcio": "Crea commit amb missatge descriptiu.",
-                    "parametres": ["project_path", "message"]
-                },
-                {
-                    "nom": "push",
-                    "descripcio": "Puja commits locals al remot.",
-                    "parametres": ["project_path"]
-                },
-                {
-                    "nom": "log",
-                    "descripcio": "Mostra historial de commits.",
-                    "parametres": ["project_path", "limit", "show_full"]
-                },
-                {
-                    "nom": "help",
-                    "descripcio": "Mostra ajuda detallada.",
-                    "parametres": []
-                }
-            ]
-        }
-        print(json.dumps(tool_info, indent=2, ensure_ascii=False))
+        print(json.dumps(TOOL_INFO, indent=2, ensure_ascii=False))
     elif args.command == "init":
         result = init_project(args.project_path, args.remote_url, args.branch)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "status":
-        result = get_status(args.project_path)
+        result = get_status(args.project_path, args.cached, args.git_cache)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "snapshot":
+        if args.cached:
+            result = get_snapshot_cached(args.project_path, args.branch, args.git_cache)
+        else:
+            result = get_snapshot(args.project_path, args.branch, args.git_cache)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "sync_check":
-        result = sync_check(args.project_path)
+        result = sync_check(args.project_path, max_age=args.max_age)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "pull":
         result = pull_changes(args.project_path)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "commit":
-        result = commit_changes(args.project_path, args.message)
+        result = commit_changes(args.project_path, args.message, args.paths,
+                                args.max_file_size, args.large, args.batch_size)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "push":
         result = push_changes(args.project_path)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "log":
-        result = get_log(args.project_path, args.limit, args.show_full)
+        if args.structured or args.after or args.numstat:
+            result = get_log_page(args.project_path, args.limit, args.after, args.numstat, args.rev)
+        else:
+            result = get_log(args.project_path, args.limit, args.show_full)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command in ("status_all", "sync_all"):
+        def stream(result):
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        
+        options = {'max_age': args.max_age} if args.command == "sync_all" else {}
+        result = run_all('sync' if args.command == "sync_all" else 'status', args.root, args.registry,
+                         args.workers, args.max_depth, on_result=stream if args.stream else None, **options)
+        if args.stream:
+            result.pop('projects', None)
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        else:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "prefetch":
+        projects = [os.path.abspath(p) for p in args.project_paths]
+        if args.root or args.registry:
+            projects = list(dict.fromkeys(projects + discover_projects(args.root, args.registry, args.max_depth)))
+        
+        if args.mode == "start":
+            result = start_prefetch(projects, args.interval, args.workers)
+        elif args.mode == "stop":
+            result = stop_prefetch()
+        elif args.mode == "status":
+            result = prefetch_status(projects or None)
+        elif args.mode == "once":
+            result = prefetch_once(projects, args.workers)
+        else:
+            try:
+                while True:
+                    cycle = prefetch_once(projects, args.workers)
+                    cycle.pop('projects')
+                    print(json.dumps(cycle, ensure_ascii=False), flush=True)
+                    time.sleep(args.interval)
+            except KeyboardInterrupt:
+                result = {'success': True, 'message': 'Prefetch aturat'}
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "timings":
+        result = get_command_timings(args.limit, args.slow_only)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "help":
         result = show_help()
         print(json.dumps(result, indent=2, ensure_ascii=False))
     else:
         parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
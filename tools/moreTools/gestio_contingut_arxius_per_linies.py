@@ -1,15 +1,335 @@
 import os
-from typing import Optional
+import re
+import sys
 import json
+import time
+import codecs
+import bisect
+import shutil
+import hashlib
+import tempfile
 import argparse
+from array import array
+from collections import deque
+from typing import Optional
+
+# Índex de línies dispers: una entrada (línia, offset) per bloc de INDEX_BLOCK
+# bytes. Llegir una línia = bisect + seek + escanejar com a molt un bloc, de
+# manera que la latència i la memòria no creixen amb la mida del fitxer.
+CHUNK_SIZE = 1024 * 1024
+INDEX_BLOCK = 64 * 1024
+INDEX_VERSION = 2
+# Els índexs de fitxers a partir d'aquesta mida es desen a disc per a crides posteriors
+INDEX_PERSIST_MIN = 4 * 1024 * 1024
+INDEX_DIR = os.environ.get('GESTIO_LINIES_INDEX_DIR', os.path.join(tempfile.gettempdir(), 'gestio_linies_index'))
+INDEX_MEMORY_ENTRIES = 32
+TAIL_DIGEST_BYTES = 4096
+# Límits per defecte de search: coincidències retornades i caràcters per línia mostrada
+DEFAULT_MAX_MATCHES = 100
+MAX_MATCH_LINE_CHARS = 1000
+
+# Codificació: es detecta una sola vegada per fitxer (BOM o mostra inicial),
+# es guarda a l'índex i només es descodifica el rang demanat. Els bytes que no
+# són UTF-8 vàlid (un Latin-1 perdut en un fitxer de Windows) es llegeixen com
+# a cp1252 en lloc de fer fallar tota la lectura.
+ENCODING_SAMPLE = 64 * 1024
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+# El motor de línies treballa amb b'\n': les codificacions de 2 i 4 bytes no hi encaixen
+UNSUPPORTED_ENCODINGS = ('utf-16-le', 'utf-16-be', 'utf-32-le', 'utf-32-be')
+DECODE_FALLBACK = 'gestio_linies_cp1252'
+# Seqüències multibyte UTF-8 vàlides: si la mostra en té, el fitxer és UTF-8
+# (encara que hi hagi bytes solts d'una altra codificació)
+UTF8_MULTIBYTE = re.compile(rb'[\xc2-\xdf][\x80-\xbf]|[\xe0-\xef][\x80-\xbf]{2}|[\xf0-\xf4][\x80-\xbf]{3}')
+
+# Índexs ja carregats en aquest procés: ruta absoluta -> índex
+_index_cache = {}
+
+_CP1252_CHARS = [bytes([b]).decode('cp1252', errors='ignore') or chr(b) for b in range(256)]
+
+
+def _decode_fallback(error):
+    """Error handler: els bytes no descodificables es llegeixen com a cp1252 (o Latin-1)."""
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    bad = error.object[error.start:error.end]
+    return ''.join(_CP1252_CHARS[b] for b in bad), error.end
+
+
+codecs.register_error(DECODE_FALLBACK, _decode_fallback)
+
+
+def _sniff_encoding(f) -> str:
+    """
+    Codificació del fitxer segons el BOM o, si no n'hi ha, una mostra de l'inici.
+
+    Sense BOM el fitxer es tracta com a UTF-8 (els bytes invàlids es llegeixen
+    com a cp1252 un per un); només és cp1252 sencer si la mostra té bytes no
+    UTF-8 i cap seqüència multibyte UTF-8 vàlida.
+    """
+    f.seek(0)
+    head = f.read(ENCODING_SAMPLE)
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        # final=False: la mostra pot tallar un caràcter multibyte pel mig
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'utf-8' if UTF8_MULTIBYTE.search(head) else 'cp1252'
+
+
+def _bom_length(encoding: str) -> int:
+    return len(codecs.BOM_UTF8) if encoding == 'utf-8-sig' else 0
+
+
+def _decode(data: bytes, encoding: str) -> str:
+    """Descodifica un rang de bytes; utf-8-sig només treu el BOM si el rang comença a l'inici."""
+    return data.decode(encoding, errors=DECODE_FALLBACK)
+
+
+def _file_encoding(f, index: Optional[dict] = None) -> str:
+    """Codificació guardada a l'índex o, si no n'hi ha, detectada ara."""
+    if index is not None and index.get('encoding'):
+        return index['encoding']
+    encoding = _sniff_encoding(f)
+    if index is not None:
+        index['encoding'] = encoding
+    return encoding
+
+
+def _unsupported(encoding: str) -> Optional[str]:
+    if encoding in UNSUPPORTED_ENCODINGS:
+        return f"Error: codificació {encoding} no suportada per a operacions per línies (converteix el fitxer a UTF-8)."
+    return None
+
+
+def _tail_digest(f, end: int) -> str:
+    """Hash dels últims bytes indexats: detecta si un fitxer que creix només ha afegit contingut."""
+    start = max(0, end - TAIL_DIGEST_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(end - start)).hexdigest()
+
+
+def _index_chunk(index: dict, chunk: bytes, pos: int, newlines: int) -> int:
+    """Afegeix a l'índex les entrades d'un tros llegit a l'offset pos; retorna els salts de línia acumulats."""
+    lines, offsets = index['lines'], index['offsets']
+    for block_start in range(0, len(chunk), INDEX_BLOCK):
+        block_end = min(block_start + INDEX_BLOCK, len(chunk))
+        first = chunk.find(b'\n', block_start, block_end)
+        if first != -1:
+            line_no = newlines + chunk.count(b'\n', block_start, first) + 2
+            if line_no > lines[-1]:
+                lines.append(line_no)
+                offsets.append(pos + first + 1)
+        newlines += chunk.count(b'\n', block_start, block_end)
+    return newlines
+
+
+def _finish_index(f, index: dict, pos: int, newlines: int, last_byte: bytes) -> dict:
+    """Tanca un índex escanejat fins a pos (final del fitxer): comptador de línies, mida i digest."""
+    lines, offsets = index['lines'], index['offsets']
+    if pos > 0 and not last_byte:
+        f.seek(pos - 1)
+        last_byte = f.read(1)
+    index['newlines'] = newlines
+    index['line_count'] = newlines + (1 if pos > 0 and last_byte != b'\n' else 0)
+    # Una entrada que apunta al final del fitxer no correspon a cap línia
+    while len(lines) > 1 and lines[-1] > index['line_count']:
+        lines.pop()
+        offsets.pop()
+    index['size'] = pos
+    index['tail_digest'] = _tail_digest(f, pos)
+    return index
+
+
+def _scan_into_index(f, index: dict, pos: int, newlines: int) -> dict:
+    """Escaneja des de pos (amb newlines salts de línia abans) i afegeix entrades a l'índex."""
+    f.seek(pos)
+    last_byte = b''
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        newlines = _index_chunk(index, chunk, pos, newlines)
+        pos += len(chunk)
+        last_byte = chunk[-1:]
+    return _finish_index(f, index, pos, newlines, last_byte)
+
+
+def _new_index(path: str, mtime_ns: int) -> dict:
+    return {
+        'path': path,
+        'mtime_ns': mtime_ns,
+        'lines': array('Q', [1]),
+        'offsets': array('Q', [0])
+    }
+
+
+def build_line_index(file_path: str) -> dict:
+    """Construeix l'índex de línies d'un fitxer llegint-lo per blocs (memòria constant)."""
+    index = _new_index(os.path.abspath(file_path), os.stat(file_path).st_mtime_ns)
+    with open(file_path, 'rb') as f:
+        _scan_into_index(f, index, 0, 0)
+        index['encoding'] = _sniff_encoding(f)
+    index['mtime_ns'] = os.stat(file_path).st_mtime_ns
+    return index
+
+
+def _index_file(file_path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(INDEX_DIR, key + '.idx')
+
+
+def _save_index(index: dict):
+    """Desa l'índex: una línia JSON de metadades i després els dos arrays en binari."""
+    meta = {k: v for k, v in index.items() if k not in ('lines', 'offsets')}
+    meta.update(version=INDEX_VERSION, byteorder=sys.byteorder, entries=len(index['lines']))
+    try:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        path = _index_file(index['path'])
+        with open(path + '.tmp', 'wb') as f:
+            f.write(json.dumps(meta).encode('utf-8') + b'\n')
+            index['lines'].tofile(f)
+            index['offsets'].tofile(f)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass  # L'índex és només una cache
+
+
+def _load_index(file_path: str) -> Optional[dict]:
+    try:
+        with open(_index_file(file_path), 'rb') as f:
+            meta = json.loads(f.readline())
+            if meta.get('version') != INDEX_VERSION or meta.get('path') != os.path.abspath(file_path):
+                return None
+            index = dict(meta, lines=array('Q'), offsets=array('Q'))
+            index['lines'].fromfile(f, meta['entries'])
+            index['offsets'].fromfile(f, meta['entries'])
+    except (OSError, ValueError, EOFError):
+        return None
+    if meta['byteorder'] != sys.byteorder:
+        index['lines'].byteswap()
+        index['offsets'].byteswap()
+    for key in ('version', 'byteorder', 'entries'):
+        index.pop(key)
+    return index
+
+
+def _remember_index(index: dict):
+    _index_cache.pop(index['path'], None)
+    _index_cache[index['path']] = index
+    while len(_index_cache) > INDEX_MEMORY_ENTRIES:
+        _index_cache.pop(next(iter(_index_cache)))
+
+
+def get_line_index(file_path: str, rebuild: bool = False, build: bool = True) -> Optional[dict]:
+    """
+    Índex de línies vàlid per al fitxer.
+
+    Es reutilitza el de memòria o el de disc si mtime i mida coincideixen; si
+    el fitxer només ha crescut (p.ex. un log), s'indexa només la part nova.
+
+    Args:
+        build: Si és False i no hi ha cap índex reutilitzable, retorna None en
+            lloc de llegir tot el fitxer.
+
+    Returns:
+        Dict amb lines/offsets (arrays), line_count, size, mtime_ns i source
+        (memory, disk, extended o built)
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    index = None if rebuild else (_index_cache.get(path) or _load_index(path))
+    source = 'memory' if index is not None and path in _index_cache else 'disk'
+
+    if index is not None and (index['size'], index['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+        grew = stat.st_size > index['size']
+        with open(path, 'rb') as f:
+            if grew and _tail_digest(f, index['size']) == index['tail_digest']:
+                _scan_into_index(f, index, index['size'], index['newlines'])
+                index['mtime_ns'] = stat.st_mtime_ns
+                source = 'extended'
+            else:
+                index = None
+
+    if index is None:
+        if not build:
+            return None
+        index = build_line_index(path)
+        source = 'built'
+
+    if source in ('built', 'extended', 'disk'):
+        _remember_index(index)
+        if source != 'disk' and index['size'] >= INDEX_PERSIST_MIN:
+            _save_index(index)
+    index['source'] = source
+    return index
+
+
+def _line_offset(f, index: dict, line_no: int) -> int:
+    """Offset en bytes de l'inici de la línia line_no (base 1); la mida del fitxer si és més enllà del final."""
+    if line_no > index['line_count']:
+        return index['size']
+    entry = bisect.bisect_right(index['lines'], line_no) - 1
+    current, pos = index['lines'][entry], index['offsets'][entry]
+    f.seek(pos)
+    while current < line_no:
+        chunk = f.read(INDEX_BLOCK)
+        if not chunk:
+            return index['size']
+        found = -1
+        while current < line_no:
+            found = chunk.find(b'\n', found + 1)
+            if found == -1:
+                break
+            current += 1
+        if current == line_no:
+            return pos + found + 1
+        pos += len(chunk)
+    return pos
+
+
+def _tail_offset(f, size: int, count: int) -> int:
+    """Offset de l'inici de les últimes count línies, llegint blocs des del final."""
+    pos = size
+    f.seek(max(size - 1, 0))
+    # Un salt de línia final tanca l'última línia, no en comença una de nova
+    needed = count + (1 if size and f.read(1) == b'\n' else 0)
+    while pos > 0:
+        start = max(0, pos - INDEX_BLOCK)
+        f.seek(start)
+        block = f.read(pos - start)
+        end = len(block)
+        while True:
+            found = block.rfind(b'\n', 0, end)
+            if found == -1:
+                break
+            needed -= 1
+            if needed == 0:
+                return start + found + 1
+            end = found
+        pos = start
+    return 0
+
 
 def read_lines(file_path: str, start_line: int, end_line: Optional[int] = None) -> str:
     """Llegeix línies específiques d'un fitxer de text.
 
+    Només es llegeixen els bytes del rang: amb l'índex de línies (cache per
+    mtime/mida) per als números positius, i des del final per a la cua. Només
+    es descodifica aquest rang, amb la codificació detectada del fitxer.
+
     Args:
         file_path: La ruta absoluta al fitxer.
-        start_line: El número de la primera línia a llegir (base 1).
-        end_line: El número de la darrera línia a llegir (base 1). Si és None, llegeix fins al final.
+        start_line: El número de la primera línia a llegir (base 1). Negatiu compta des del final (-10 = les 10 últimes).
+        end_line: El número de la darrera línia a llegir (base 1, negatiu des del final). Si és None, llegeix fins al final.
 
     Returns:
         El contingut de les línies especificades com una cadena, o un missatge d'error.
@@ -18,104 +338,512 @@ def read_lines(file_path: str, start_line: int, end_line: Optional[int] = None)
         return f"Error: El fitxer no existeix a {file_path}"
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        # Ajustar a índex base 0
-        start_idx = start_line - 1
-        end_idx = end_line - 1 if end_line is not None else len(lines)
-
-        if not (0 <= start_idx < len(lines)):
-            return f"Error: start_line ({start_line}) fora de rang. El fitxer té {len(lines)} línies."
-        if end_idx < start_idx:
-            return f"Error: end_line ({end_line}) és anterior a start_line ({start_line})."
-        if end_idx >= len(lines):
-            end_idx = len(lines) - 1 # Ajustar end_idx si supera el final del fitxer
-
-        selected_lines = lines[start_idx : end_idx + 1]
-        return "".join(selected_lines)
+        with open(file_path, 'rb') as f:
+            if start_line < 0 and end_line is None:
+                # Cua: no cal indexar el fitxer
+                encoding = _file_encoding(f)
+                size = os.fstat(f.fileno()).st_size
+                start = _tail_offset(f, size, -start_line)
+                f.seek(start)
+                data = f.read(size - start)
+            else:
+                index = get_line_index(file_path)
+                encoding = _file_encoding(f, index)
+                total = index['line_count']
+                if start_line < 0:
+                    start_line = max(total + start_line + 1, 1)
+                if end_line is not None and end_line < 0:
+                    end_line = total + end_line + 1
+
+                if not (1 <= start_line <= total):
+                    return f"Error: start_line ({start_line}) fora de rang. El fitxer té {total} línies."
+                if end_line is not None and end_line < start_line:
+                    return f"Error: end_line ({end_line}) és anterior a start_line ({start_line})."
+                if end_line is None or end_line > total:
+                    end_line = total  # Ajustar end_line si supera el final del fitxer
+
+                start = _line_offset(f, index, start_line)
+                end = _line_offset(f, index, end_line + 1)
+                f.seek(start)
+                data = f.read(end - start)
+
+        return _unsupported(encoding) or _decode(data, encoding).replace('\r\n', '\n')
 
     except Exception as e:
         return f"Error en llegir el fitxer: {e}"
 
-def insert_lines(file_path: str, content: str, line_number: int) -> bool:
-    """Insereix contingut en una línia específica d'un fitxer de text.
+
+def index_info(file_path: str, rebuild: bool = False) -> dict:
+    """Construeix (o reutilitza) l'índex de línies i en retorna les dades."""
+    if not os.path.exists(file_path):
+        return {"success": False, "message": f"Error: El fitxer no existeix a {file_path}"}
+    start = time.perf_counter()
+    index = get_line_index(file_path, rebuild)
+    with open(file_path, 'rb') as f:
+        encoding = _file_encoding(f, index)
+        newline = _detect_newline(f)
+    return {
+        "success": True,
+        "file_path": index['path'],
+        "line_count": index['line_count'],
+        "size_bytes": index['size'],
+        "encoding": encoding,
+        "newline": 'CRLF' if newline == b'\r\n' else 'LF',
+        "entries": len(index['lines']),
+        "index_bytes": index['lines'].itemsize * len(index['lines']) * 2,
+        "source": index['source'],
+        "persisted": index['size'] >= INDEX_PERSIST_MIN,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
+def _clip_line(text: str) -> str:
+    if len(text) > MAX_MATCH_LINE_CHARS:
+        return text[:MAX_MATCH_LINE_CHARS] + '…'
+    return text
+
+
+def _first_lines(text: str, count: int) -> list:
+    """Primeres count línies completes d'un bloc que acaba en salt de línia."""
+    result, pos = [], 0
+    while len(result) < count and pos < len(text):
+        end = text.find('\n', pos)
+        result.append(_clip_line(text[pos:end]))
+        pos = end + 1
+    return result
+
+
+def search(file_path: str, pattern: str, regex: bool = False, ignore_case: bool = False,
+           context: int = 0, max_matches: int = DEFAULT_MAX_MATCHES,
+           start_line: Optional[int] = None, end_line: Optional[int] = None) -> dict:
+    """
+    Cerca un text o una expressió regular i retorna les línies que coincideixen.
+
+    El fitxer es llegeix per blocs tallats en salts de línia (memòria acotada
+    per CHUNK_SIZE i per max_matches), i el context es guarda amb una finestra
+    de les últimes línies. Si ja hi ha un índex de línies vàlid s'aprofita per
+    començar directament a start_line; si no n'hi ha, el mateix recorregut el
+    construeix perquè el read_lines posterior sigui immediat.
 
     Args:
         file_path: La ruta absoluta al fitxer.
-        content: El contingut a inserir.
-        line_number: El número de línia on inserir el contingut (base 1).
+        pattern: Text literal o, amb regex=True, expressió regular (re de Python).
+        regex: Interpreta pattern com a expressió regular.
+        ignore_case: Cerca sense distingir majúscules i minúscules.
+        context: Línies de context abans i després de cada coincidència.
+        max_matches: Màxim de línies retornades (truncated indica si n'hi havia més).
+        start_line: Primera línia on cercar (base 1).
+        end_line: Última línia on cercar (base 1).
 
     Returns:
-        True si la inserció és exitosa, False en cas contrari.
+        Dict amb success, matches [{line, column, text, before, after}],
+        match_count, truncated, lines_scanned, bytes_scanned, index i elapsed_ms
     """
+    if not os.path.exists(file_path):
+        return {"success": False, "message": f"Error: El fitxer no existeix a {file_path}"}
+    if max_matches < 1 or context < 0:
+        return {"success": False, "message": "Error: max_matches ha de ser positiu i context no pot ser negatiu."}
     try:
-        if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-        else:
-            lines = []
+        compiled = re.compile(pattern if regex else re.escape(pattern),
+                              re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+    except re.error as e:
+        return {"success": False, "message": f"Error: expressió regular no vàlida: {e}"}
+
+    started = time.perf_counter()
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    ranged = (start_line or 1) > 1 or end_line is not None
+    index = get_line_index(path, build=ranged)
+    # Sense índex reutilitzable, el recorregut complet en construeix un de nou
+    new_index = _new_index(path, stat.st_mtime_ns) if index is None else None
+    newlines = 0
+
+    matches, pending = [], []
+    before = deque(maxlen=context or 1)
+    truncated = False
+    searching = True
 
-        # Ajustar a índex base 0
-        insert_idx = line_number - 1
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            encoding = _file_encoding(f, index if index is not None else new_index)
+            if _unsupported(encoding):
+                return {"success": False, "message": _unsupported(encoding)}
+            first_line, pos, end = 1, 0, size
+            if index is not None:
+                total = index['line_count']
+                first_line = start_line or 1
+                if not (1 <= first_line <= total):
+                    return {"success": False, "message": f"Error: start_line ({first_line}) fora de rang. El fitxer té {total} línies."}
+                if end_line is not None and end_line < first_line:
+                    return {"success": False, "message": f"Error: end_line ({end_line}) és anterior a start_line ({first_line})."}
+                pos = _line_offset(f, index, first_line)
+                if end_line is not None:
+                    end = _line_offset(f, index, end_line + 1)
+            f.seek(pos)
+            scan_start = pos
+
+            line_no = first_line
+            carry = b''
+            last_byte = b''
+            while searching or pending:
+                raw = f.read(min(CHUNK_SIZE, end - pos))
+                if new_index is not None and raw:
+                    newlines = _index_chunk(new_index, raw, pos, newlines)
+                    last_byte = raw[-1:]
+                pos += len(raw)
+                buffer = carry + raw
+                if raw:
+                    cut = buffer.rfind(b'\n') + 1
+                    if cut == 0:
+                        carry = buffer
+                        continue
+                    block, carry = buffer[:cut], buffer[cut:]
+                elif buffer:
+                    # Última línia sense salt de línia final
+                    block, carry = buffer + b'\n', b''
+                else:
+                    break
+                text = _decode(block, encoding).replace('\r\n', '\n')
+
+                if pending:
+                    head = _first_lines(text, context)
+                    for match in pending:
+                        match['after'].extend(head[:context - len(match['after'])])
+                    pending = [m for m in pending if len(m['after']) < context]
+
+                offset, counted = 0, 0
+                while searching:
+                    found = compiled.search(text, offset)
+                    if found is None or found.start() >= len(text):
+                        break
+                    if len(matches) == max_matches:
+                        truncated, searching = True, False
+                        break
+                    line_no += text.count('\n', counted, found.start())
+                    line_start = text.rfind('\n', 0, found.start()) + 1
+                    line_end = text.find('\n', found.start())
+                    match = {
+                        "line": line_no,
+                        "column": found.start() - line_start + 1,
+                        "text": _clip_line(text[line_start:line_end])
+                    }
+                    if context:
+                        previous, cursor = [], line_start
+                        while len(previous) < context and cursor > 0:
+                            prev_start = text.rfind('\n', 0, cursor - 1) + 1
+                            previous.append(_clip_line(text[prev_start:cursor - 1]))
+                            cursor = prev_start
+                        previous.reverse()
+                        if len(previous) < context and before:
+                            previous = list(before)[len(previous) - context:] + previous
+                        match['before'] = previous
+                        match['after'] = _first_lines(text[line_end + 1:], context)
+                        if len(match['after']) < context:
+                            pending.append(match)
+                    matches.append(match)
+                    offset = counted = line_end + 1
+                    line_no += 1
+                line_no += text.count('\n', counted)
+                if context:
+                    before.extend(_clip_line(line) for line in text[:-1].rsplit('\n', context)[-context:])
+
+            complete = pos >= size and not carry
+            if new_index is not None and complete:
+                _finish_index(f, new_index, pos, newlines, last_byte)
+    except Exception as e:
+        return {"success": False, "message": f"Error en cercar al fitxer: {e}"}
+
+    index_source = index['source'] if index is not None else None
+    if new_index is not None and complete and os.stat(path).st_mtime_ns == stat.st_mtime_ns:
+        new_index['source'] = index_source = 'built'
+        _remember_index(new_index)
+        if new_index['size'] >= INDEX_PERSIST_MIN:
+            _save_index(new_index)
+
+    return {
+        "success": True,
+        "file_path": path,
+        "pattern": pattern,
+        "matches": matches,
+        "match_count": len(matches),
+        "truncated": truncated,
+        "encoding": encoding,
+        "lines_scanned": line_no - first_line,
+        "bytes_scanned": pos - scan_start,
+        "index": index_source,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+def _forget_index(file_path: str):
+    """Descarta l'índex d'un fitxer que hem reescrit (la detecció de creixement no serveix per a edicions al mig)."""
+    path = os.path.abspath(file_path)
+    _index_cache.pop(path, None)
+    try:
+        os.remove(_index_file(path))
+    except OSError:
+        pass
 
-        if insert_idx < 0:
-            insert_idx = 0
-        if insert_idx > len(lines):
-            insert_idx = len(lines) # Si el número de línia és més gran que el fitxer, afegir al final
 
-        new_lines = lines[:insert_idx] + [content + '\n'] + lines[insert_idx:]
+def _copy_range(src, dst, start: int, end: int):
+    """Copia els bytes [start, end) de src a dst per blocs de CHUNK_SIZE."""
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        dst.write(chunk)
+        remaining -= len(chunk)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
-        return True
 
-    except Exception as e:
-        print(f"Error en inserir línies al fitxer {file_path}: {e}")
-        return False
+def _atomic_splice(file_path: str, splices: list):
+    """
+    Reescriu el fitxer substituint rangs de bytes, sense carregar-lo a memòria.
 
-def delete_lines(file_path: str, start_line: int, end_line: Optional[int] = None) -> bool:
-    """Esborra línies específiques d'un fitxer de text.
+    Es copia per blocs a un temporal de la mateixa carpeta, intercalant el
+    contingut nou a cada offset; després fsync i os.replace. Si alguna cosa
+    falla, l'original queda intacte i el temporal s'esborra. Si file_path és
+    un enllaç simbòlic, s'edita el fitxer al qual apunta i l'enllaç es conserva.
+
+    Args:
+        file_path: Fitxer a reescriure (pot no existir si l'únic canvi és a l'offset 0)
+        splices: Llista de (inici, final, bytes_nous) ordenada i sense solapaments
+    """
+    link_path, file_path = file_path, os.path.realpath(file_path)
+    directory = os.path.dirname(file_path)
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as dst:
+            if os.path.exists(file_path):
+                with open(file_path, 'rb') as src:
+                    size = os.fstat(src.fileno()).st_size
+                    pos = 0
+                    for start, end, data in splices:
+                        _copy_range(src, dst, pos, start)
+                        dst.write(data)
+                        pos = end
+                    _copy_range(src, dst, pos, size)
+                shutil.copymode(file_path, temp_path)
+            else:
+                for _, _, data in splices:
+                    dst.write(data)
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_path, 0o666 & ~umask)  # mkstemp crea amb 0600
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        _forget_index(file_path)
+        _forget_index(link_path)
+
+    if os.name != 'nt':
+        # El rename només és durable quan la carpeta també s'ha escrit a disc
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _detect_newline(f) -> bytes:
+    """Salt de línia del fitxer segons la primera línia (\\n per defecte)."""
+    f.seek(0)
+    head = f.read(INDEX_BLOCK)
+    first = head.find(b'\n')
+    return b'\r\n' if first > 0 and head[first - 1:first] == b'\r' else b'\n'
+
+
+EDIT_OPERATIONS = ('insert', 'delete', 'replace')
+
+
+def _edit_bytes(content: str, newline: bytes, encoding: str = 'utf-8') -> bytes:
+    """Contingut d'una edició en bytes, amb la codificació i el salt de línia del fitxer."""
+    text = (content or '').replace('\r\n', '\n')
+    try:
+        data = text.encode('utf-8' if encoding == 'utf-8-sig' else encoding)
+    except UnicodeEncodeError as e:
+        raise ValueError(f"El contingut no es pot escriure en la codificació del fitxer ({encoding}): {e.object[e.start:e.end]!r}")
+    return data.replace(b'\n', newline) + newline
+
+
+def _plan_edits(file_path: str, edits: list) -> list:
+    """
+    Converteix les edicions (numeració de línies original) en splices de bytes.
+
+    Llança ValueError si alguna edició no és vàlida o si dos rangs a
+    esborrar/reemplaçar se solapen; en aquest cas no s'ha escrit res.
+    """
+    exists = os.path.exists(file_path)
+    index = get_line_index(file_path) if exists else None
+    total = index['line_count'] if index else 0
+    planned = []
+
+    with open(file_path, 'rb') if exists else open(os.devnull, 'rb') as f:
+        newline = _detect_newline(f) if exists else b'\n'
+        encoding = _file_encoding(f, index) if exists else 'utf-8'
+        if _unsupported(encoding):
+            raise ValueError(_unsupported(encoding))
+        # El BOM és a l'offset 0 però no forma part de la primera línia
+        bom = _bom_length(encoding)
+        missing_final_newline = False
+        if exists and index['size'] > 0:
+            f.seek(index['size'] - 1)
+            missing_final_newline = f.read(1) != b'\n'
+
+        for order, edit in enumerate(edits):
+            op = edit.get('op')
+            start_line = edit.get('line', edit.get('start_line'))
+            if op not in EDIT_OPERATIONS:
+                raise ValueError(f"Edició {order + 1}: op ha de ser {', '.join(EDIT_OPERATIONS)} (rebut: {op})")
+            if not isinstance(start_line, int):
+                raise ValueError(f"Edició {order + 1}: cal 'line' (enter, base 1)")
+
+            if op == 'insert':
+                # Si el número de línia és més gran que el fitxer, afegir al final
+                insert_at = min(max(start_line, 1), total + 1)
+                offset = max(_line_offset(f, index, insert_at), bom) if exists else 0
+                data = _edit_bytes(edit.get('content'), newline, encoding)
+                planned.append((offset, offset, 0, order, data, insert_at, insert_at - 1))
+                continue
+
+            end_line = edit.get('end_line')
+            end_line = start_line if end_line is None else end_line
+            if not (1 <= start_line <= total):
+                raise ValueError(f"Error: start_line ({start_line}) fora de rang. El fitxer té {total} línies.")
+            if end_line < start_line:
+                raise ValueError(f"Error: end_line ({end_line}) és anterior a start_line ({start_line}).")
+            end_line = min(end_line, total)  # Ajustar end_line si supera el final del fitxer
+
+            start = max(_line_offset(f, index, start_line), bom)
+            end = _line_offset(f, index, end_line + 1)
+            data = _edit_bytes(edit.get('content'), newline, encoding) if op == 'replace' else None
+            if op == 'replace' and end == index['size'] and missing_final_newline:
+                data = data[:-len(newline)]  # Conservar l'absència de salt de línia final
+            planned.append((start, end, 1, order, data, start_line, end_line))
+
+    # Les insercions a l'inici d'un rang van abans del rang; a igual posició, en l'ordre rebut
+    planned.sort(key=lambda item: item[:4])
+    if missing_final_newline:
+        planned = _separate_final_line(planned, index['size'], newline)
+    last_end, last_range = 0, None
+    for start, end, kind, order, data, first, last in planned:
+        if start < last_end and (kind == 1 or start > last_range[0]):
+            raise ValueError(f"Edicions solapades: línies {first}-{last} i {last_range[1]}-{last_range[2]}")
+        if kind == 1:
+            last_end, last_range = end, (start, first, last)
+    return [(start, end, data or b'') for start, end, _, _, data, _, _ in planned]
+
+
+def _separate_final_line(planned: list, size: int, newline: bytes) -> list:
+    """
+    Afegeix una sola vegada el salt de línia que falta a l'última línia si s'hi insereix al darrere.
+
+    Si un rang arriba fins al final, ell decideix: un esborrat deixa el fitxer
+    acabat en salt de línia (no cal res) i un reemplaçament recupera el seu.
+    """
+    appends = [i for i, item in enumerate(planned) if item[0] == size and item[2] == 0]
+    if not appends:
+        return planned
+    planned = list(planned)
+    last_range = next((i for i, item in enumerate(planned) if item[2] == 1 and item[1] == size), None)
+    if last_range is None:
+        index = appends[0]
+        start, end, kind, order, data, first, last = planned[index]
+        planned[index] = (start, end, kind, order, newline + data, first, last)
+    else:
+        start, end, kind, order, data, first, last = planned[last_range]
+        if data is not None:
+            planned[last_range] = (start, end, kind, order, data + newline, first, last)
+    return planned
+
+
+def apply_edits(file_path: str, edits: list) -> dict:
+    """Aplica diverses edicions amb una sola reescriptura del fitxer.
+
+    Totes les edicions es refereixen a la numeració de línies ORIGINAL (no cal
+    compensar els desplaçaments entre elles) i es validen abans d'escriure res.
 
     Args:
         file_path: La ruta absoluta al fitxer.
-        start_line: El número de la primera línia a esborrar (base 1).
-        end_line: El número de la darrera línia a esborrar (base 1). Si és None, esborra només start_line.
+        edits: Llista d'operacions:
+            {"op": "insert", "line": N, "content": "..."} - insereix abans de la línia N
+            {"op": "delete", "line": N, "end_line": M} - esborra N..M (M opcional)
+            {"op": "replace", "line": N, "end_line": M, "content": "..."} - substitueix N..M
 
     Returns:
-        True si l'esborrat és exitós, False en cas contrari.
+        Dict amb success, message i, si s'ha escrit, edits, lines_before i size_bytes.
     """
-    if not os.path.exists(file_path):
-        print(f"Error: El fitxer no existeix a {file_path}")
-        return False
+    if not isinstance(edits, list) or not edits:
+        return {"success": False, "message": "Error: cal una llista d'edicions no buida"}
+    if not os.path.exists(file_path) and any(e.get('op') != 'insert' for e in edits if isinstance(e, dict)):
+        return {"success": False, "message": f"Error: El fitxer no existeix a {file_path}"}
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        lines_before = get_line_index(file_path)['line_count'] if os.path.exists(file_path) else 0
+        splices = _plan_edits(file_path, [e if isinstance(e, dict) else {} for e in edits])
+        _atomic_splice(file_path, splices)
+    except ValueError as e:
+        return {"success": False, "message": str(e), "file_path": file_path}
+    except Exception as e:
+        return {"success": False, "message": f"Error en editar el fitxer {file_path}: {e}", "file_path": file_path}
 
-        # Ajustar a índex base 0
-        start_idx = start_line - 1
-        end_idx = end_line - 1 if end_line is not None else start_idx
+    return {
+        "success": True,
+        "message": f"{len(edits)} edicions aplicades amb una sola escriptura",
+        "file_path": file_path,
+        "edits": len(edits),
+        "lines_before": lines_before,
+        "size_bytes": os.path.getsize(file_path)
+    }
 
-        if not (0 <= start_idx < len(lines)):
-            print(f"Error: start_line ({start_line}) fora de rang. El fitxer té {len(lines)} línies.")
-            return False
-        if end_idx < start_idx:
-            print(f"Error: end_line ({end_line}) és anterior a start_line ({start_line}).")
-            return False
-        if end_idx >= len(lines):
-            end_idx = len(lines) - 1 # Ajustar end_idx si supera el final del fitxer
 
-        new_lines = lines[:start_idx] + lines[end_idx + 1:]
+def insert_lines(file_path: str, content: str, line_number: int) -> bool:
+    """Insereix contingut en una línia específica d'un fitxer de text.
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
-        return True
+    El fitxer es copia per blocs a un temporal amb el contingut intercalat i es
+    reemplaça atòmicament: la memòria no depèn de la mida del fitxer i un error
+    a mig camí no deixa mai el fitxer a mitges.
 
-    except Exception as e:
-        print(f"Error en esborrar línies del fitxer {file_path}: {e}")
-        return False
+    Args:
+        file_path: La ruta absoluta al fitxer.
+        content: El contingut a inserir.
+        line_number: El número de línia on inserir el contingut (base 1).
+
+    Returns:
+        True si la inserció és exitosa, False en cas contrari.
+    """
+    result = apply_edits(file_path, [{'op': 'insert', 'line': line_number, 'content': content}])
+    if not result['success']:
+        print(result['message'] if result['message'].startswith('Error') else
+              f"Error en inserir línies al fitxer {file_path}: {result['message']}")
+    return result['success']
+
+def delete_lines(file_path: str, start_line: int, end_line: Optional[int] = None) -> bool:
+    """Esborra línies específiques d'un fitxer de text.
 
+    Igual que insert_lines, copia per blocs saltant el rang i reemplaça el
+    fitxer atòmicament.
+
+    Args:
+        file_path: La ruta absoluta al fitxer.
+        start_line: El número de la primera línia a esborrar (base 1).
+        end_line: El número de la darrera línia a esborrar (base 1). Si és None, esborra només start_line.
+
+    Returns:
+        True si l'esborrat és exitós, False en cas contrari.
+    """
+    result = apply_edits(file_path, [{'op': 'delete', 'line': start_line, 'end_line': end_line}])
+    if not result['success']:
+        print(result['message'])
+    return result['success']
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Eina per manipular fitxers de text per línies.")
@@ -126,8 +854,25 @@ if __name__ == "__main__":
     # Subparser per a read_lines
     parser_read = subparsers.add_parser("read_lines", help="Llegeix línies d'un fitxer.")
     parser_read.add_argument("file_path", type=str, help="La ruta absoluta al fitxer.")
-    parser_read.add_argument("start_line", type=int, help="El número de la primera línia a llegir (base 1).")
-    parser_read.add_argument("--end_line", type=int, help="El número de la darrera línia a llegir (base 1).", default=None)
+    parser_read.add_argument("start_line", type=int, nargs="?", default=1, help="El número de la primera línia a llegir (base 1; negatiu compta des del final).")
+    parser_read.add_argument("--end_line", type=int, help="El número de la darrera línia a llegir (base 1; negatiu compta des del final).", default=None)
+    parser_read.add_argument("--tail", type=int, help="Llegeix les últimes N línies (equival a start_line = -N).", default=None)
+
+    # Subparser per a index
+    parser_index = subparsers.add_parser("index", help="Construeix o mostra l'índex de línies d'un fitxer.")
+    parser_index.add_argument("file_path", type=str, help="La ruta absoluta al fitxer.")
+    parser_index.add_argument("--rebuild", action="store_true", help="Torna a construir l'índex encara que sigui vàlid.")
+
+    # Subparser per a search
+    parser_search = subparsers.add_parser("search", help="Cerca un text o una expressió regular i retorna les línies que coincideixen.")
+    parser_search.add_argument("file_path", type=str, help="La ruta absoluta al fitxer.")
+    parser_search.add_argument("pattern", type=str, help="El text a cercar (o l'expressió regular amb --regex).")
+    parser_search.add_argument("--regex", action="store_true", help="Interpreta pattern com a expressió regular de Python.")
+    parser_search.add_argument("--ignore_case", action="store_true", help="No distingeix majúscules i minúscules.")
+    parser_search.add_argument("--context", type=int, default=0, help="Línies de context abans i després de cada coincidència.")
+    parser_search.add_argument("--max_matches", type=int, default=DEFAULT_MAX_MATCHES, help=f"Màxim de coincidències retornades (per defecte {DEFAULT_MAX_MATCHES}).")
+    parser_search.add_argument("--start_line", type=int, default=None, help="Primera línia on cercar (base 1).")
+    parser_search.add_argument("--end_line", type=int, default=None, help="Última línia on cercar (base 1).")
 
     # Subparser per a insert_lines
     parser_insert = subparsers.add_parser("insert_lines", help="Insereix contingut en una línia específica d'un fitxer.")
@@ -141,12 +886,18 @@ if __name__ == "__main__":
     parser_delete.add_argument("start_line", type=int, help="El número de la primera línia a esborrar (base 1).")
     parser_delete.add_argument("--end_line", type=int, help="El número de la darrera línia a esborrar (base 1).", default=None)
 
+    # Subparser per a apply_edits
+    parser_edits = subparsers.add_parser("apply_edits", help="Aplica diverses edicions amb una sola escriptura.")
+    parser_edits.add_argument("file_path", type=str, help="La ruta absoluta al fitxer.")
+    parser_edits.add_argument("edits", type=str, nargs="?", default=None, help="Llista JSON d'edicions (numeració original): [{\"op\": \"insert|delete|replace\", \"line\": N, \"end_line\": M, \"content\": \"...\"}].")
+    parser_edits.add_argument("--edits_file", type=str, default=None, help="Fitxer JSON amb la llista d'edicions (en lloc de l'argument edits).")
+
     args = parser.parse_args()
 
     if args.info:
         tool_info = {
-            "que_fa": "Permet llegir, inserir i esborrar línies de fitxers de text.",
-            "com_ho_fa": "Accedeix al fitxer, llegeix el seu contingut línia per línia, realitza la modificació sol·licitada (lectura, inserció o esborrat) i reescriu el fitxer si cal. Utilitza rutes absolutes per als fitxers.",
+            "que_fa": "Permet llegir, cercar, inserir i esborrar línies de fitxers de text.",
+            "com_ho_fa": "Accedeix al fitxer, llegeix el seu contingut línia per línia, realitza la modificació sol·licitada (lectura, inserció o esborrat) i reescriu el fitxer si cal. La lectura usa un índex de línies dispers (cache per mtime/mida, a disc per a fitxers grans) i només llegeix i descodifica els bytes del rang, amb la codificació detectada una vegada per fitxer (BOM o mostra: UTF-8, o cp1252 per a fitxers de Windows; els bytes no UTF-8 solts es llegeixen com a cp1252 en lloc de fallar); la cua es llegeix des del final. La cerca recorre el fitxer per blocs amb memòria acotada, aprofita l'índex si ja existeix i, si no, el construeix en el mateix recorregut. Insercions i esborrats copien el fitxer per blocs a un temporal (memòria constant), conserven els salts de línia (LF/CRLF), la codificació i el BOM, i el reemplacen atòmicament amb fsync + rename: un error no deixa mai el fitxer a mitges. Utilitza rutes absolutes per als fitxers.",
             "que_necessita": [
                 {
                     "nom": "file_path",
@@ -156,7 +907,7 @@ if __name__ == "__main__":
                 {
                     "nom": "start_line",
                     "tipus": "integer",
-                    "descripcio": "El número de línia inicial (base 1) per a l'operació."
+                    "descripcio": "El número de línia inicial (base 1) per a l'operació. A read_lines, negatiu compta des del final (-20 = les 20 últimes)."
                 },
                 {
                     "nom": "end_line",
@@ -167,15 +918,40 @@ if __name__ == "__main__":
                     "nom": "content",
                     "tipus": "string",
                     "descripcio": "(Opcional, només per a 'insert_lines') El contingut de text a inserir."
+                },
+                {
+                    "nom": "pattern",
+                    "tipus": "string",
+                    "descripcio": "(Només per a 'search') El text o l'expressió regular a cercar."
+                },
+                {
+                    "nom": "edits",
+                    "tipus": "array",
+                    "descripcio": "(Només per a 'apply_edits') Llista d'operacions {op: insert|delete|replace, line, end_line, content} referides a la numeració ORIGINAL del fitxer."
                 }
             ],
-            "que_retorna": "Depèn de la funció: el contingut llegit (read_lines), True/False (insert_lines, delete_lines) o un missatge d'error.",
+            "que_retorna": "Depèn de la funció: el contingut llegit (read_lines), True/False (insert_lines, delete_lines), un objecte JSON amb success i message (apply_edits, index, search) o un missatge d'error.",
             "funcions_disponibles": [
                 {
                     "nom": "read_lines",
-                    "descripcio": "Llegeix línies d'un fitxer.",
+                    "descripcio": "Llegeix línies d'un fitxer (rangs negatius o --tail per a la cua).",
                     "parametres": ["file_path", "start_line", "end_line"]
                 },
+                {
+                    "nom": "search",
+                    "descripcio": "Cerca un text literal o una expressió regular (--regex, --ignore_case) i retorna número de línia, columna i context (--context N), amb un màxim de coincidències (--max_matches) i un rang opcional (--start_line/--end_line).",
+                    "parametres": ["file_path", "pattern", "regex", "ignore_case", "context", "max_matches", "start_line", "end_line"]
+                },
+                {
+                    "nom": "apply_edits",
+                    "descripcio": "Aplica una llista d'insercions, esborrats i substitucions (numeració original, sense compensar desplaçaments) validant-les abans i reescrivint el fitxer una sola vegada.",
+                    "parametres": ["file_path", "edits"]
+                },
+                {
+                    "nom": "index",
+                    "descripcio": "Construeix o mostra l'índex de línies (línies, entrades, origen memòria/disc/ampliat/construït).",
+                    "parametres": ["file_path"]
+                },
                 {
                     "nom": "insert_lines",
                     "descripcio": "Insereix contingut en una línia específica.",
@@ -190,11 +966,32 @@ if __name__ == "__main__":
         }
         print(json.dumps(tool_info, indent=2, ensure_ascii=False))
     elif args.command == "read_lines":
-        result = read_lines(args.file_path, args.start_line, args.end_line)
-        print(result)
+        start_line = -args.tail if args.tail else args.start_line
+        result = read_lines(args.file_path, start_line, args.end_line)
+        print(result, end="" if result.endswith("\n") else "\n")
+    elif args.command == "index":
+        result = index_info(args.file_path, args.rebuild)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif args.command == "search":
+        result = search(args.file_path, args.pattern, args.regex, args.ignore_case,
+                        args.context, args.max_matches, args.start_line, args.end_line)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
     elif args.command == "insert_lines":
         result = insert_lines(args.file_path, args.content, args.line_number)
         print(result)
     elif args.command == "delete_lines":
-        result = delete_lines(.file_path, args.start_line, args.end_line)
+        result = delete_lines(args.file_path, args.start_line, args.end_line)
         print(result)
+    elif args.command == "apply_edits":
+        try:
+            if args.edits_file:
+                with open(args.edits_file, 'r', encoding='utf-8') as f:
+                    edits = json.load(f)
+            else:
+                edits = json.loads(args.edits or '[]')
+        except (OSError, ValueError) as e:
+            edits = None
+            result = {"success": False, "message": f"Error: no s'han pogut llegir les edicions: {e}"}
+        if edits is not None:
+            result = apply_edits(args.file_path, edits)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,576 @@
+"""
+Snapshots Git dels projectes del Project Manager
+
+Cada projecte viu com un sol JSON a projects.data i els canvis a
+version_history; reconstruir una versió antiga vol dir reaplicar canvis.
+Aquesta tool exporta cada versió com a JSON canònic (claus ordenades,
+indentat) a un repositori Git nu, amb un commit per versió:
+
+- Branch per projecte: refs/heads/projects/<project_id> (fitxer project.json)
+- Tag per versió: <project_id>/v<N>
+- Autor i data del commit: device i timestamp de la versió
+
+L'exportació és incremental: només es demanen els projectes amb versió més
+nova que l'últim tag exportat, i tots els commits s'escriuen amb una sola
+crida a `git fast-import`. Si entre dues exportacions hi ha hagut més d'una
+versió, les intermèdies es reconstrueixen reaplicant els canvis de
+version_history sobre l'última exportada (com applyChange de
+project_manager.php); la darrera sempre és el data real de la BD.
+
+Funcions:
+- export: Exporta les versions noves de tots els projectes (o dels indicats)
+- versions: Llista les versions exportades d'un projecte
+- show: JSON d'un projecte en una versió (git show, sense tocar la BD)
+- diff: Diferències entre dues versions (git diff)
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import requests
+from datetime import datetime, timezone
+
+from git_manager import run_git_command
+
+try:
+    from zoneinfo import ZoneInfo
+    SERVER_TIMEZONE = ZoneInfo('Europe/Madrid')
+except Exception:
+    SERVER_TIMEZONE = None
+
+
+DEFAULT_API_URL = 'https://www.contratemps.org/claudetools/project_manager.php'
+API_URL_ENV = 'PROJECT_MANAGER_URL'
+DEFAULT_CONFIG = 'project_manager'
+HISTORY_PAGE = 500
+REQUEST_TIMEOUT = 60
+# fast-import d'una exportació inicial gran pot trigar més que una comanda Git normal
+IMPORT_TIMEOUT = 1800
+
+BRANCH_PREFIX = 'refs/heads/projects/'
+TAG_PATTERN = re.compile(r'^refs/tags/(?P<project_id>[a-z0-9-]+)/v(?P<version>\d+)$')
+PROJECT_ID_PATTERN = re.compile(r'^[a-z0-9-]+$')
+SNAPSHOT_FILE = 'project.json'
+
+
+def canonical_json(data) -> str:
+    """JSON canònic: claus ordenades, indentat i UTF-8 (diffs estables línia a línia)."""
+    return json.dumps(data, sort_keys=True, indent=2, ensure_ascii=False) + '\n'
+
+
+# ==================== API PROJECT MANAGER ====================
+
+def _api_url(api_url: str = None) -> str:
+    return api_url or os.environ.get(API_URL_ENV) or DEFAULT_API_URL
+
+
+def _api_get(session: requests.Session, api_url: str, action: str, config: str, **params) -> dict:
+    """Crida GET a project_manager.php; llança RuntimeError si l'API retorna error."""
+    response = session.get(
+        api_url,
+        params={'action': action, 'config': config, **params},
+        timeout=REQUEST_TIMEOUT
+    )
+    try:
+        payload = response.json()
+    except ValueError:
+        raise RuntimeError(f'{action}: resposta no JSON (HTTP {response.status_code})')
+    if response.status_code != 200 or not payload.get('success'):
+        raise RuntimeError(f"{action}: {payload.get('error', f'HTTP {response.status_code}')}")
+    return payload
+
+
+def fetch_history_since(session: requests.Session, api_url: str, config: str,
+                        project_id: str, since_version: int) -> dict:
+    """
+    Canvis de version_history posteriors a since_version, agrupats per versió.
+
+    Pagina amb el cursor de fila (version, id) de l'API: una versió amb més
+    de HISTORY_PAGE canvis continua a la pàgina següent sense perdre'n cap.
+
+    Returns:
+        Dict versió -> llista de files (id, timestamp, device, change_type, change_data),
+        en l'ordre en què es van aplicar
+    """
+    by_version = {}
+    cursor = {'since_version': since_version}
+    while True:
+        rows = _api_get(session, api_url, 'history', config, project_id=project_id,
+                        limit=HISTORY_PAGE, **cursor).get('history', [])
+        for row in rows:
+            by_version.setdefault(int(row['version']), []).append(row)
+        if len(rows) < HISTORY_PAGE:
+            break
+        last = rows[-1]
+        if last.get('id') is None:
+            raise RuntimeError('history: la resposta no porta id de fila (cal actualitzar project_manager.php)')
+        cursor = {'since_version': int(last['version']), 'since_id': int(last['id'])}
+    return by_version
+
+
+# ==================== REPLAY (com applyChange de project_manager.php) ====================
+
+def _iter_tasks(tasks: list):
+    for task in tasks or []:
+        yield task
+        yield from _iter_tasks(task.get('subtasks'))
+
+
+def _find_task(data: dict, task_id: str) -> dict:
+    for phase in (data.get('structure') or {}).get('phases') or []:
+        for task in _iter_tasks(phase.get('tasks')):
+            if task.get('id') == task_id:
+                return task
+    return None
+
+
+def apply_change(data: dict, change: dict):
+    """Aplica un canvi de version_history a data (mateixos tipus que applyChange en PHP)."""
+    change_type = change.get('type')
+
+    if change_type == 'answer_question':
+        for question in (data.get('development') or {}).get('questions') or []:
+            if question.get('id') == change.get('questionId'):
+                question['answer'] = change.get('answer')
+                break
+    elif change_type == 'update_task_status':
+        task = _find_task(data, change.get('taskId'))
+        if task is not None:
+            task['status'] = change.get('status')
+    elif change_type == 'toggle_checklist':
+        task = _find_task(data, change.get('taskId'))
+        for item in (task or {}).get('checklist') or []:
+            if item.get('id') == change.get('itemId'):
+                item['checked'] = not item.get('checked', False)
+                break
+    elif change_type == 'update_memory':
+        task = _find_task(data, change.get('taskId'))
+        if task is not None:
+            task['memory'] = change.get('memory')
+
+
+# ==================== REPOSITORI GIT ====================
+
+def _ensure_repo(repo: str) -> dict:
+    """Crea el repositori nu si no existeix."""
+    if os.path.isdir(repo):
+        # Comprovar que el repositori és el mateix directori (no un repo pare)
+        git_dir = run_git_command(['git', 'rev-parse', '--absolute-git-dir'], repo)
+        if git_dir['success'] and os.path.realpath(git_dir['output']) in (
+                os.path.realpath(repo), os.path.realpath(os.path.join(repo, '.git'))):
+            return {'success': True, 'created': False}
+    os.makedirs(repo, exist_ok=True)
+    result = run_git_command(['git', 'init', '--bare', '-q', repo], repo)
+    return {'success': result['success'], 'created': True, 'details': result['stderr']}
+
+
+def exported_versions(repo: str) -> dict:
+    """Última versió exportada de cada projecte (llegida dels tags <id>/v<N>)."""
+    result = run_git_command(['git', 'for-each-ref', '--format=%(refname)', 'refs/tags/'], repo)
+    latest = {}
+    if result['success']:
+        for refname in result['output'].splitlines():
+            match = TAG_PATTERN.match(refname)
+            if match:
+                project_id, version = match['project_id'], int(match['version'])
+                latest[project_id] = max(version, latest.get(project_id, 0))
+    return latest
+
+
+def _read_snapshot(repo: str, rev: str) -> dict:
+    result = run_git_command(['git', 'show', f'{rev}:{SNAPSHOT_FILE}'], repo, strip=False)
+    if not result['success']:
+        return None
+    return json.loads(result['stdout'])
+
+
+def _git_time(timestamp: str) -> str:
+    """Data de MySQL ('YYYY-MM-DD HH:MM:SS', hora del servidor) en format raw de Git."""
+    try:
+        moment = datetime.strptime(str(timestamp), '%Y-%m-%d %H:%M:%S')
+        moment = moment.replace(tzinfo=SERVER_TIMEZONE) if SERVER_TIMEZONE else moment.astimezone()
+    except ValueError:
+        moment = datetime.now(timezone.utc)
+    offset = int(moment.utcoffset().total_seconds() // 60)
+    sign = '+' if offset >= 0 else '-'
+    return f"{int(moment.timestamp())} {sign}{abs(offset) // 60:02d}{abs(offset) % 60:02d}"
+
+
+def _fast_import_data(text: str) -> bytes:
+    payload = text.encode('utf-8')
+    return b'data %d\n' % len(payload) + payload + b'\n'
+
+
+def _commit_block(project_id: str, version: int, data: dict, device: str, timestamp: str,
+                  changes: list, source: str, mark: int, parent: str = None) -> bytes:
+    """Commit + tag d'una versió en format fast-import."""
+    device = re.sub(r'[<>\n]', '', device or 'unknown') or 'unknown'
+    change_types = ', '.join(dict.fromkeys(c.get('change_type') or 'unknown' for c in changes)) or 'snapshot'
+    message = (
+        f"{project_id} v{version}: {change_types}\n\n"
+        f"Version: {version}\n"
+        f"Device: {device}\n"
+        f"Source: {source}\n"
+    )
+    ident = f"{device} <{device}@project-manager> {_git_time(timestamp)}"
+
+    block = (
+        f"commit {BRANCH_PREFIX}{project_id}\n"
+        f"mark :{mark}\n"
+        f"author {ident}\n"
+        f"committer {ident}\n"
+    ).encode('utf-8')
+    block += _fast_import_data(message)
+    if parent:
+        block += f"from {parent}\n".encode('utf-8')
+    block += f"M 644 inline {SNAPSHOT_FILE}\n".encode('utf-8') + _fast_import_data(canonical_json(data))
+    block += f"reset refs/tags/{project_id}/v{version}\nfrom :{mark}\n\n".encode('utf-8')
+    return block
+
+
+def _plan_project(session: requests.Session, api_url: str, config: str, repo: str,
+                  project_id: str, last_version: int) -> tuple:
+    """
+    Versions a exportar d'un projecte: (llista de commits, informe).
+
+    Sense exportació prèvia només es pot desar la versió actual (base);
+    amb exportació prèvia es reconstrueixen les intermèdies amb version_history.
+    """
+    project = _api_get(session, api_url, 'get', config, project_id=project_id)['project']
+    current_version = int(project['version'])
+    report = {'project_id': project_id, 'from_version': last_version, 'to_version': current_version,
+              'exported': [], 'replayed': [], 'empty': [], 'gaps': []}
+    if last_version and current_version <= last_version:
+        return [], report
+
+    history = fetch_history_since(session, api_url, config, project_id,
+                                  last_version or current_version - 1)
+
+    commits = []
+    data = _read_snapshot(repo, f'refs/tags/{project_id}/v{last_version}') if last_version else None
+    replay_ok = data is not None
+    for version in range((last_version or current_version - 1) + 1, current_version):
+        if not replay_ok:
+            # Sense el snapshot de partida no es pot reconstruir: s'exporta fins a la versió actual
+            report['gaps'].append(version)
+            continue
+        # Un update amb changes buit incrementa la versió sense files a version_history:
+        # la versió existeix amb les mateixes dades que l'anterior
+        rows = history.get(version, [])
+        if not rows:
+            report['empty'].append(version)
+        for row in rows:
+            change = row.get('change_data')
+            if isinstance(change, str):
+                change = json.loads(change)
+            apply_change(data, dict(change or {}, type=row.get('change_type')))
+        commits.append({'version': version, 'data': json.loads(json.dumps(data)), 'rows': rows, 'source': 'replay'})
+        report['replayed'].append(version)
+
+    rows = history.get(current_version, [])
+    commits.append({
+        'version': current_version,
+        'data': project['data'],
+        'rows': rows,
+        'source': 'db',
+        'device': project.get('modified_by'),
+        'timestamp': project.get('last_modified')
+    })
+    if replay_ok:
+        # Comprovació: el replay de l'última versió ha de coincidir amb la BD
+        for row in rows:
+            change = row.get('change_data')
+            if isinstance(change, str):
+                change = json.loads(change)
+            apply_change(data, dict(change or {}, type=row.get('change_type')))
+        report['replay_matches_db'] = canonical_json(data) == canonical_json(project['data'])
+
+    report['exported'] = [commit['version'] for commit in commits]
+    return commits, report
+
+
+def export_projects(repo: str, config: str = DEFAULT_CONFIG, api_url: str = None,
+                    project_ids: list = None) -> dict:
+    """
+    Exporta les versions noves dels projectes al repositori Git.
+
+    Args:
+        repo: Ruta del repositori nu (es crea si no existeix)
+        config: Configuració BD de project_manager.php
+        api_url: URL de project_manager.php (default: PROJECT_MANAGER_URL o el servidor de producció)
+        project_ids: Només aquests projectes (default: tots)
+
+    Returns:
+        Dict amb success, commits, projects (informe per projecte), timings_ms
+    """
+    start = time.perf_counter()
+    api_url = _api_url(api_url)
+
+    init = _ensure_repo(repo)
+    if not init['success']:
+        return {
+            'success': False,
+            'error': f'No s\'ha pogut crear el repositori: {repo}',
+            'details': init.get('details')
+        }
+
+    session = requests.Session()
+    try:
+        listed = _api_get(session, api_url, 'list', config)['projects']
+    except (requests.exceptions.RequestException, RuntimeError) as e:
+        return {
+            'success': False,
+            'error': 'Error llistant projectes',
+            'details': str(e)
+        }
+
+    latest = exported_versions(repo)
+    if project_ids:
+        listed = [p for p in listed if p['project_id'] in project_ids]
+    pending = [p for p in listed if int(p['version']) > latest.get(p['project_id'], 0)]
+
+    stream = b''
+    reports = []
+    errors = []
+    mark = 0
+    for project in pending:
+        project_id = project['project_id']
+        if not PROJECT_ID_PATTERN.match(project_id):
+            errors.append({'project_id': project_id, 'error': 'project_id no vàlid com a nom de branch'})
+            continue
+        try:
+            commits, report = _plan_project(session, api_url, config, repo, project_id, latest.get(project_id))
+        except (requests.exceptions.RequestException, RuntimeError, ValueError) as e:
+            errors.append({'project_id': project_id, 'error': str(e)})
+            continue
+
+        parent = f'{BRANCH_PREFIX}{project_id}^0' if project_id in latest else None
+        for commit in commits:
+            mark += 1
+            rows = commit['rows']
+            stream += _commit_block(
+                project_id, commit['version'], commit['data'],
+                commit.get('device') or (rows[0].get('device') if rows else None),
+                commit.get('timestamp') or (rows[0].get('timestamp') if rows else None),
+                rows, commit['source'], mark, parent
+            )
+            parent = None
+        reports.append(report)
+    fetched_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    if stream:
+        result = run_git_command(['git', 'fast-import', '--quiet'], repo,
+                                 input=stream.decode('utf-8'), timeout=IMPORT_TIMEOUT)
+        if not result['success']:
+            return {
+                'success': False,
+                'error': 'Error escrivint els commits (git fast-import)',
+                'details': result['stderr'],
+                'projects': reports
+            }
+
+    return {
+        'success': not errors,
+        'repo': repo,
+        'created': init['created'],
+        'commits': mark,
+        'projects_checked': len(listed),
+        'projects_updated': len(reports),
+        'projects': reports,
+        'errors': errors,
+        'timings_ms': {
+            'fetch': fetched_ms,
+            'import': round((time.perf_counter() - start) * 1000 - fetched_ms, 2),
+            'total': round((time.perf_counter() - start) * 1000, 2)
+        }
+    }
+
+
+# ==================== LECTURA ====================
+
+def list_versions(repo: str, project_id: str) -> dict:
+    """Versions exportades d'un projecte amb data, device i tipus de canvi."""
+    result = run_git_command(
+        ['git', 'for-each-ref', '--sort=-version:refname',
+         '--format=%(refname)%00%(authordate:iso-strict)%00%(authorname)%00%(subject)',
+         f'refs/tags/{project_id}/'],
+        repo
+    )
+    if not result['success']:
+        return {
+            'success': False,
+            'error': 'Error llegint el repositori',
+            'details': result['stderr']
+        }
+
+    versions = []
+    for line in result['output'].splitlines():
+        refname, date, device, subject = line.split('\0', 3)
+        match = TAG_PATTERN.match(refname)
+        if match:
+            versions.append({
+                'version': int(match['version']),
+                'date': date,
+                'device': device,
+                'subject': subject
+            })
+
+    return {
+        'success': True,
+        'project_id': project_id,
+        'count': len(versions),
+        'versions': versions
+    }
+
+
+def show_version(repo: str, project_id: str, version: int = None) -> dict:
+    """JSON d'un projecte en una versió (default: l'última exportada)."""
+    rev = f'refs/tags/{project_id}/v{version}' if version else f'{BRANCH_PREFIX}{project_id}'
+    data = _read_snapshot(repo, rev)
+    if data is None:
+        return {
+            'success': False,
+            'error': f'Versió no exportada: {project_id} v{version}' if version else f'Projecte no exportat: {project_id}'
+        }
+    return {
+        'success': True,
+        'project_id': project_id,
+        'version': version,
+        'data': data
+    }
+
+
+def diff_versions(repo: str, project_id: str, from_version: int, to_version: int = None,
+                  stat: bool = False) -> dict:
+    """Diferències de project.json entre dues versions (to_version default: l'última)."""
+    to_rev = f'refs/tags/{project_id}/v{to_version}' if to_version else f'{BRANCH_PREFIX}{project_id}'
+    command = ['git', 'diff', '--stat' if stat else '--unified=3',
+               f'refs/tags/{project_id}/v{from_version}', to_rev, '--', SNAPSHOT_FILE]
+    result = run_git_command(command, repo)
+    if not result['success']:
+        return {
+            'success': False,
+            'error': 'Error comparant versions (estan exportades?)',
+            'details': result['stderr']
+        }
+    return {
+        'success': True,
+        'project_id': project_id,
+        'from_version': from_version,
+        'to_version': to_version,
+        'diff': result['stdout']
+    }
+
+
+TOOL_INFO = {
+    "que_fa": "Exporta cada versió dels projectes del Project Manager (projects.data + version_history) a un repositori Git nu, un commit per versió, perquè llegir una versió antiga o comparar-ne dues sigui una operació Git i no un replay a la BD.",
+    "com_ho_fa": "Llegeix list/get/history de project_manager.php, compara amb l'últim tag exportat (<project_id>/v<N>) i escriu només les versions noves amb una sola crida a git fast-import (branch projects/<project_id>, fitxer project.json en JSON canònic, autor i data = device i timestamp). Les versions intermèdies entre dues exportacions es reconstrueixen aplicant version_history sobre l'última exportada.",
+    "que_necessita": [
+        {
+            "nom": "repo",
+            "tipus": "string",
+            "descripcio": "Ruta del repositori Git nu de snapshots (es crea si no existeix)."
+        },
+        {
+            "nom": "config",
+            "tipus": "string",
+            "descripcio": "(Opcional) Configuració BD de project_manager.php (default: project_manager)."
+        },
+        {
+            "nom": "api_url",
+            "tipus": "string",
+            "descripcio": "(Opcional) URL de project_manager.php (default: variable PROJECT_MANAGER_URL o el servidor de producció)."
+        },
+        {
+            "nom": "project_id",
+            "tipus": "string",
+            "descripcio": "Projecte (per versions, show i diff; per export, opcionalment una llista)."
+        },
+        {
+            "nom": "version",
+            "tipus": "integer",
+            "descripcio": "Versió a mostrar (show) o versions a comparar (diff from/to)."
+        }
+    ],
+    "que_retorna": "Objecte JSON amb success (bool) i, segons l'acció: commits i informe per projecte (exported, replayed, empty, gaps, replay_matches_db), llista de versions, el JSON d'una versió o el diff.",
+    "funcions_disponibles": [
+        {
+            "nom": "export",
+            "descripcio": "Exporta incrementalment les versions noves de tots els projectes (o dels indicats).",
+            "parametres": ["repo", "config", "api_url", "project_id"]
+        },
+        {
+            "nom": "versions",
+            "descripcio": "Llista les versions exportades d'un projecte (data, device, tipus de canvi).",
+            "parametres": ["repo", "project_id"]
+        },
+        {
+            "nom": "show",
+            "descripcio": "JSON d'un projecte en una versió, llegit del repositori.",
+            "parametres": ["repo", "project_id", "version"]
+        },
+        {
+            "nom": "diff",
+            "descripcio": "Diff de project.json entre dues versions.",
+            "parametres": ["repo", "project_id", "version"]
+        }
+    ]
+}
+
+
+def main(argv=None):
+    """Punt d'entrada CLI (argv=None llegeix sys.argv)"""
+    parser = argparse.ArgumentParser(description="Snapshots Git dels projectes del Project Manager")
+    parser.add_argument("--info", action="store_true", help="Mostra la informació d'autodescripció de la tool.")
+
+    subparsers = parser.add_subparsers(dest="command", help="Comandes disponibles")
+
+    # Subparser per export
+    parser_export = subparsers.add_parser("export", help="Exporta les versions noves al repositori.")
+    parser_export.add_argument("repo", type=str, help="Ruta del repositori Git nu de snapshots.")
+    parser_export.add_argument("--projects", nargs="+", default=None, help="Només aquests project_id.")
+    parser_export.add_argument("--config", type=str, default=DEFAULT_CONFIG, help=f"Configuració BD (default: {DEFAULT_CONFIG}).")
+    parser_export.add_argument("--api_url", type=str, default=None, help=f"URL de project_manager.php (default: ${API_URL_ENV} o producció).")
+
+    # Subparser per versions
+    parser_versions = subparsers.add_parser("versions", help="Llista les versions exportades d'un projecte.")
+    parser_versions.add_argument("repo", type=str, help="Ruta del repositori Git nu de snapshots.")
+    parser_versions.add_argument("project_id", type=str, help="ID del projecte.")
+
+    # Subparser per show
+    parser_show = subparsers.add_parser("show", help="JSON d'un projecte en una versió.")
+    parser_show.add_argument("repo", type=str, help="Ruta del repositori Git nu de snapshots.")
+    parser_show.add_argument("project_id", type=str, help="ID del projecte.")
+    parser_show.add_argument("--version", type=int, default=None, help="Versió (default: l'última exportada).")
+
+    # Subparser per diff
+    parser_diff = subparsers.add_parser("diff", help="Diferències entre dues versions.")
+    parser_diff.add_argument("repo", type=str, help="Ruta del repositori Git nu de snapshots.")
+    parser_diff.add_argument("project_id", type=str, help="ID del projecte.")
+    parser_diff.add_argument("from_version", type=int, help="Versió inicial.")
+    parser_diff.add_argument("to_version", type=int, nargs="?", default=None, help="Versió final (default: l'última exportada).")
+    parser_diff.add_argument("--stat", action="store_true", help="Només el resum de línies canviades.")
+
+    args = parser.parse_args(argv)
+
+    if args.info:
+        print(json.dumps(TOOL_INFO, indent=2, ensure_ascii=False))
+        return
+    elif args.command == "export":
+        result = export_projects(args.repo, args.config, args.api_url, args.projects)
+    elif args.command == "versions":
+        result = list_versions(args.repo, args.project_id)
+    elif args.command == "show":
+        result = show_version(args.repo, args.project_id, args.version)
+    elif args.command == "diff":
+        result = diff_versions(args.repo, args.project_id, args.from_version, args.to_version, args.stat)
+    else:
+        parser.print_help()
+        return
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,14 @@ Template Manager - Gestió de plantilles de projecte
 Permet llistar i obtenir plantilles predefinides per al Project Manager
 """
 
+import bisect
+import hashlib
 import json
+import math
 import os
+import re
 import sys
+import unicodedata
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -21,33 +26,193 @@ def get_templates_dir() -> Path:
     
     return templates_dir
 
-def list_templates() -> List[Dict]:
-    """Llista totes les plantilles disponibles amb metadata"""
+# Índex persistent del catàleg (metadata + signatura de cada fitxer)
+CATALOG_INDEX_FILENAME = ".template_catalog.idx"
+CATALOG_INDEX_VERSION = 1
+
+# Còpia en memòria de l'índex (evita rellegir-lo dins del mateix procés)
+_catalog_cache: Optional[Dict] = None
+
+
+def _load_template_bytes(raw: bytes) -> Dict:
+    """Parseja el JSON d'una plantilla (admet salts de línia literals dins dels strings)"""
+    return json.loads(raw.decode('utf-8'), strict=False)
+
+
+def _extract_metadata(filename: str, template_data: Dict) -> Dict:
+    """Extrau la metadata bàsica d'una plantilla (sense el path absolut)"""
+    return {
+        "filename": filename,
+        "name": template_data.get("template_name", Path(filename).stem),
+        "version": template_data.get("template_version", "unknown"),
+        "description": template_data.get("description", ""),
+        "author": template_data.get("author", ""),
+        "tags": template_data.get("tags", [])
+    }
+
+
+def _build_lookups(files: Dict) -> Dict:
+    """Construeix els diccionaris de cerca directa per nom de plantilla i per tag"""
+    by_name = {}
+    by_tag = {}
+    
+    for filename in sorted(files):
+        metadata = files[filename].get("metadata")
+        if not metadata:
+            continue
+        by_name.setdefault(str(metadata["name"]).lower(), filename)
+        for tag in metadata["tags"]:
+            filenames = by_tag.setdefault(str(tag).lower(), [])
+            if filename not in filenames:
+                filenames.append(filename)
+    
+    return {"by_name": by_name, "by_tag": by_tag}
+
+
+def _read_index_file(index_path: Path, version: int) -> Optional[Dict]:
+    """Llegeix un índex del disc, o None si no existeix o és d'una altra versió"""
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if catalog.get("version") != version:
+        return None
+    return catalog
+
+
+def _write_index_file(index_path: Path, catalog: Dict):
+    """Escriu un índex de forma atòmica (fitxer temporal + replace)"""
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(catalog, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        # Catàleg en una carpeta de només lectura: l'índex queda només en memòria
+        print(f"Avís: no s'ha pogut desar l'índex {index_path.name}: {e}", file=sys.stderr)
+
+
+def load_catalog(rebuild: bool = False) -> Dict:
+    """
+    Carrega l'índex del catàleg de plantilles i el posa al dia.
+    
+    Només es rellegeixen els fitxers amb mtime/mida diferents; si el contingut
+    (sha256) no ha canviat, no es torna a parsejar el JSON.
+    
+    Args:
+        rebuild: Si True, ignora l'índex existent i el reconstrueix sencer
+    
+    Returns:
+        Dict amb version, files (filename -> signatura + metadata), by_name i by_tag
+    """
+    global _catalog_cache
+    
     templates_dir = get_templates_dir()
-    templates = []
+    index_path = templates_dir / CATALOG_INDEX_FILENAME
+    
+    catalog = None
+    if not rebuild:
+        if _catalog_cache is not None and _catalog_cache.get("templates_dir") == str(templates_dir):
+            catalog = _catalog_cache
+        else:
+            catalog = _read_index_file(index_path, CATALOG_INDEX_VERSION)
+    
+    old_files = catalog["files"] if catalog else {}
+    files = {}
+    changed = catalog is None
     
     for json_file in templates_dir.glob("*.json"):
+        filename = json_file.name
+        if filename.startswith("."):
+            continue
+        
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                template_data = json.load(f)
-                
-                # Extraure metadata bàsica
-                templates.append({
-                    "filename": json_file.name,
-                    "name": template_data.get("template_name", json_file.stem),
-                    "version": template_data.get("template_version", "unknown"),
-                    "description": template_data.get("description", ""),
-                    "author": template_data.get("author", ""),
-                    "tags": template_data.get("tags", []),
-                    "path": str(json_file)
-                })
+            stat = json_file.stat()
+        except OSError:
+            continue
+        
+        entry = old_files.get(filename)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            files[filename] = entry
+            continue
+        
+        changed = True
+        try:
+            raw = json_file.read_bytes()
+        except OSError as e:
+            files[filename] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": None,
+                "metadata": None,
+                "error": str(e)
+            }
+            continue
+        
+        digest = hashlib.sha256(raw).hexdigest()
+        if entry and entry["sha256"] == digest:
+            # Només ha canviat la data: es reaprofita la metadata
+            files[filename] = dict(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            continue
+        
+        try:
+            metadata = _extract_metadata(filename, _load_template_bytes(raw))
+            error = None
         except Exception as e:
-            print(f"Error llegint {json_file.name}: {e}", file=sys.stderr)
+            metadata = None
+            error = str(e)
+        
+        files[filename] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "metadata": metadata,
+            "error": error
+        }
+    
+    if set(files) != set(old_files):
+        changed = True
+    
+    if changed:
+        catalog = {
+            "version": CATALOG_INDEX_VERSION,
+            "templates_dir": str(templates_dir),
+            "files": files
+        }
+        catalog.update(_build_lookups(files))
+        _write_index_file(index_path, catalog)
+    
+    catalog["templates_dir"] = str(templates_dir)
+    _catalog_cache = catalog
+    return catalog
+
+
+def _catalog_entry(catalog: Dict, filename: str) -> Dict:
+    """Metadata d'un fitxer del catàleg amb el path absolut afegit"""
+    entry = dict(catalog["files"][filename]["metadata"])
+    entry["path"] = str(Path(catalog["templates_dir"]) / filename)
+    return entry
+
+
+def list_templates() -> List[Dict]:
+    """Llista totes les plantilles disponibles amb metadata"""
+    catalog = load_catalog()
+    templates = []
+    
+    for filename in sorted(catalog["files"]):
+        file_entry = catalog["files"][filename]
+        if file_entry["metadata"] is None:
+            print(f"Error llegint {filename}: {file_entry['error']}", file=sys.stderr)
+            continue
+        templates.append(_catalog_entry(catalog, filename))
     
     return templates
 
-def get_template(template_name: str) -> Optional[Dict]:
-    """Obté una plantilla específica pel seu nom de fitxer o nom de plantilla"""
+
+def find_template_file(template_name: str) -> Optional[Path]:
+    """Resol el fitxer d'una plantilla pel seu nom de fitxer o nom de plantilla (sense parsejar)"""
     templates_dir = get_templates_dir()
     
     # Intentar primer pel nom de fitxer exacte
@@ -56,49 +221,341 @@ def get_template(template_name: str) -> Optional[Dict]:
         template_file = template_file.with_suffix('.json')
     
     if template_file.exists():
-        with open(template_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return template_file
     
-    # Si no, buscar per template_name dins dels fitxers
-    for json_file in templates_dir.glob("*.json"):
+    # Si no, buscar per template_name a l'índex del catàleg
+    catalog = load_catalog()
+    filename = catalog["by_name"].get(template_name.lower())
+    if filename:
+        return templates_dir / filename
+    
+    return None
+
+
+def get_template(template_name: str) -> Optional[Dict]:
+    """Obté una plantilla específica pel seu nom de fitxer o nom de plantilla"""
+    template_file = find_template_file(template_name)
+    if template_file is None:
+        return None
+    
+    return _load_template_bytes(template_file.read_bytes())
+
+
+def get_templates_by_tag(tag: str) -> List[Dict]:
+    """Retorna la metadata de les plantilles que tenen un tag concret"""
+    catalog = load_catalog()
+    filenames = catalog["by_tag"].get(tag.lower(), [])
+    return [_catalog_entry(catalog, filename) for filename in filenames]
+
+# Índex invertit persistent per a la cerca de text complet
+SEARCH_INDEX_FILENAME = ".template_search.idx"
+SEARCH_INDEX_VERSION = 1
+
+# Paràmetres BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Claus estructurals dels nodes que no s'indexen com a text
+NODE_STRUCTURAL_KEYS = {"children", "type", "status"}
+
+# Claus de la plantilla que formen el node de metadata (path buit)
+TEMPLATE_TEXT_KEYS = ("template_name", "description", "tags", "usage_instructions")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Còpia en memòria de l'índex (postings construïts)
+_search_cache: Optional[Dict] = None
+
+
+def fold_text(text: str) -> str:
+    """Normalitza text per indexar: minúscules i sense accents ("planificació" -> "planificacio")"""
+    # La l·l catalana és una sola paraula
+    text = text.replace("\u00b7", "").replace("\u2027", "")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Divideix el text normalitzat en tokens"""
+    return _TOKEN_RE.findall(fold_text(text))
+
+
+def _collect_strings(value, out: List[str]):
+    """Afegeix a out tots els strings d'un valor JSON (recursiu)"""
+    if isinstance(value, str):
+        out.append(value)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_strings(item, out)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_strings(item, out)
+
+
+def _index_document(path: List[int], titles: List[str], node_type: str, texts: List[str]) -> Dict:
+    """Crea l'entrada d'índex d'un node: freqüència de cada terme i longitud"""
+    terms = {}
+    length = 0
+    for text in texts:
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0) + 1
+            length += 1
+    
+    return {
+        "path": path,
+        "titles": titles,
+        "type": node_type,
+        "length": length,
+        "terms": terms
+    }
+
+
+def _index_template(template_data: Dict) -> List[Dict]:
+    """Indexa la metadata de la plantilla i tots els nodes de structure"""
+    texts = []
+    for key in TEMPLATE_TEXT_KEYS:
+        _collect_strings(template_data.get(key), texts)
+    
+    documents = [_index_document([], [], "template", texts)]
+    
+    # Recorregut en profunditat mantenint el path d'índexs i de títols
+    stack = [([i], [], node) for i, node in reversed(list(enumerate(template_data.get("structure", []))))]
+    while stack:
+        path, parent_titles, node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        
+        titles = parent_titles + [str(node.get("title", ""))]
+        texts = []
+        for key, value in node.items():
+            if key not in NODE_STRUCTURAL_KEYS:
+                _collect_strings(value, texts)
+        documents.append(_index_document(path, titles, str(node.get("type", "")), texts))
+        
+        children = node.get("children") or []
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((path + [i], titles, children[i]))
+    
+    return documents
+
+
+def _build_postings(files: Dict) -> Dict:
+    """Construeix en memòria les llistes de postings a partir de l'índex per fitxer"""
+    documents = []
+    postings = {}
+    
+    for filename in sorted(files):
+        for node_index, node in enumerate(files[filename]["nodes"]):
+            doc_id = len(documents)
+            documents.append((filename, node_index, node["length"]))
+            for term, tf in node["terms"].items():
+                postings.setdefault(term, []).append((doc_id, tf))
+    
+    total_length = sum(length for _, _, length in documents)
+    return {
+        "documents": documents,
+        "postings": postings,
+        "sorted_terms": sorted(postings),
+        "avg_length": total_length / len(documents) if documents else 0.0
+    }
+
+
+def load_search_index(rebuild: bool = False) -> Dict:
+    """
+    Carrega l'índex invertit de les plantilles, construint-lo si cal.
+    
+    L'índex es guarda per fitxer amb el sha256 del catàleg: només es
+    reindexen les plantilles que han canviat des de l'última cerca.
+    
+    Args:
+        rebuild: Si True, reindexa totes les plantilles
+    
+    Returns:
+        Dict amb files (índex per fitxer) i els postings en memòria
+    """
+    global _search_cache
+    
+    catalog = load_catalog(rebuild=rebuild)
+    templates_dir = Path(catalog["templates_dir"])
+    index_path = templates_dir / SEARCH_INDEX_FILENAME
+    
+    index = None
+    if not rebuild:
+        if _search_cache is not None and _search_cache.get("templates_dir") == str(templates_dir):
+            index = _search_cache
+        else:
+            index = _read_index_file(index_path, SEARCH_INDEX_VERSION)
+    
+    old_files = index["files"] if index else {}
+    files = {}
+    changed = index is None
+    
+    for filename, catalog_entry in catalog["files"].items():
+        if catalog_entry["metadata"] is None:
+            continue
+        
+        entry = old_files.get(filename)
+        if entry and entry["sha256"] == catalog_entry["sha256"]:
+            files[filename] = entry
+            continue
+        
+        changed = True
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                template_data = json.load(f)
-                if template_data.get("template_name", "").lower() == template_name.lower():
-                    return template_data
-        except Exception:
+            template_data = _load_template_bytes((templates_dir / filename).read_bytes())
+        except Exception as e:
+            print(f"Error indexant {filename}: {e}", file=sys.stderr)
             continue
+        
+        files[filename] = {
+            "sha256": catalog_entry["sha256"],
+            "nodes": _index_template(template_data)
+        }
     
-    return None
+    if set(files) != set(old_files):
+        changed = True
+    
+    if changed or "postings" not in index:
+        index = {
+            "version": SEARCH_INDEX_VERSION,
+            "templates_dir": str(templates_dir),
+            "files": files
+        }
+        if changed:
+            _write_index_file(index_path, index)
+        index.update(_build_postings(files))
+    
+    _search_cache = index
+    return index
+
+
+def _expand_query(index: Dict, query: str, prefix: bool) -> List[str]:
+    """Converteix la query en la llista de termes de l'índex a puntuar"""
+    terms = []
+    for raw_term in query.split():
+        is_prefix = prefix or raw_term.endswith("*")
+        for token in tokenize(raw_term):
+            if not is_prefix:
+                terms.append(token)
+                continue
+            
+            # Prefix: tots els termes de l'índex que comencen per token
+            sorted_terms = index["sorted_terms"]
+            position = bisect.bisect_left(sorted_terms, token)
+            while position < len(sorted_terms) and sorted_terms[position].startswith(token):
+                terms.append(sorted_terms[position])
+                position += 1
+    
+    return list(dict.fromkeys(terms))
+
+
+def search_nodes(query: str, limit: Optional[int] = 20, prefix: bool = False) -> List[Dict]:
+    """
+    Cerca de text complet sobre tots els nodes de totes les plantilles.
+    
+    Args:
+        query: Termes de cerca (un terme acabat en * es tracta com a prefix)
+        limit: Màxim de resultats (None = tots)
+        prefix: Si True, tots els termes es tracten com a prefix
+    
+    Returns:
+        Llista de hits ordenats per puntuació BM25 amb filename, path i títols del node
+    """
+    index = load_search_index()
+    documents = index["documents"]
+    if not documents:
+        return []
+    
+    total_docs = len(documents)
+    avg_length = index["avg_length"] or 1.0
+    scores = {}
+    
+    for term in _expand_query(index, query, prefix):
+        postings = index["postings"].get(term)
+        if not postings:
+            continue
+        
+        idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+        for doc_id, tf in postings:
+            length = documents[doc_id][2]
+            norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+    
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    if limit is not None:
+        ranked = ranked[:limit]
+    
+    hits = []
+    for doc_id, score in ranked:
+        filename, node_index, _ = documents[doc_id]
+        node = index["files"][filename]["nodes"][node_index]
+        hits.append({
+            "filename": filename,
+            "path": node["path"],
+            "node_path": " > ".join(node["titles"]),
+            "type": node["type"],
+            "score": round(score, 4)
+        })
+    
+    return hits
 
-def search_templates(query: str) -> List[Dict]:
-    """Cerca plantilles que coincideixin amb la query (nom, descripció o tags)"""
-    all_templates = list_templates()
-    query_lower = query.lower()
+
+def search_templates(query: str, limit: Optional[int] = None, prefix: bool = False) -> List[Dict]:
+    """
+    Cerca plantilles que coincideixin amb la query (metadata i contingut dels nodes).
+    
+    Les plantilles on la query apareix com a subcadena del nom, la descripció o
+    un tag (la cerca d'abans de l'índex: `desenvol` troba "desenvolupar") hi
+    són sempre; si no coincideixen per termes van al final amb score 0 i sense hits.
     
-    results = []
-    for template in all_templates:
-        # Buscar a nom, descripció i tags
-        if (query_lower in template["name"].lower() or
-            query_lower in template["description"].lower() or
-            any(query_lower in tag.lower() for tag in template["tags"])):
-            results.append(template)
+    Returns:
+        Metadata de cada plantilla amb score (millor node) i hits (nodes coincidents)
+    """
+    catalog = load_catalog()
+    results = {}
     
-    return results
+    for hit in search_nodes(query, limit=None, prefix=prefix):
+        filename = hit["filename"]
+        if filename not in results:
+            template = _catalog_entry(catalog, filename)
+            template["score"] = hit["score"]
+            template["hits"] = []
+            results[filename] = template
+        results[filename]["hits"].append({k: hit[k] for k in ("path", "node_path", "type", "score")})
+    
+    ranked = sorted(results.values(), key=lambda t: -t["score"])
+    
+    query_lower = query.lower().strip()
+    for filename in sorted(catalog["files"]):
+        metadata = catalog["files"][filename]["metadata"]
+        if filename in results or metadata is None or not query_lower:
+            continue
+        if (query_lower in str(metadata.get("name", "")).lower() or
+            query_lower in str(metadata.get("description", "")).lower() or
+            any(query_lower in str(tag).lower() for tag in metadata.get("tags", []))):
+            template = _catalog_entry(catalog, filename)
+            template["score"] = 0.0
+            template["hits"] = []
+            ranked.append(template)
+    
+    return ranked[:limit] if limit is not None else ranked
 
-def main():
-    """Main CLI interface"""
+def main(argv=None):
+    """Main CLI interface (argv=None llegeix sys.argv)"""
     import argparse
     
     parser = argparse.ArgumentParser(description="Gestió de plantilles de projecte")
-    parser.add_argument("action", choices=["list", "get", "search", "info"],
+    parser.add_argument("action", choices=["list", "get", "search", "tag", "reindex", "info"],
                        help="Acció a realitzar")
     parser.add_argument("--template", "-t", help="Nom de la plantilla")
     parser.add_argument("--query", "-q", help="Query de cerca")
+    parser.add_argument("--tag", help="Tag a buscar (acció tag)")
+    parser.add_argument("--limit", "-l", type=int, default=None, help="Màxim de resultats de cerca")
+    parser.add_argument("--prefix", action="store_true",
+                       help="Tractar tots els termes de cerca com a prefix")
     parser.add_argument("--format", "-f", choices=["json", "text"], default="json",
                        help="Format de sortida")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     try:
         if args.action == "list":
@@ -143,7 +600,7 @@ def main():
             if not args.query:
                 raise ValueError("Cal especificar --query")
             
-            results = search_templates(args.query)
+            results = search_templates(args.query, limit=args.limit, prefix=args.prefix)
             
             if args.format == "json":
                 print(json.dumps({
@@ -155,8 +612,41 @@ def main():
             else:
                 print(f"🔍 Resultats per '{args.query}': {len(results)} plantilles\n")
                 for t in results:
-                    print(f"  • {t['name']}")
-                    print(f"    {t['description']}\n")
+                    print(f"  • {t['name']} (score {t['score']})")
+                    print(f"    {t['description']}")
+                    for hit in t["hits"][:3]:
+                        print(f"      ↳ {hit['node_path'] or '(metadata)'}")
+                    print()
+        
+        elif args.action == "tag":
+            if not args.tag:
+                raise ValueError("Cal especificar --tag")
+            
+            results = get_templates_by_tag(args.tag)
+            
+            if args.format == "json":
+                print(json.dumps({
+                    "success": True,
+                    "tag": args.tag,
+                    "total": len(results),
+                    "results": results
+                }, indent=2, ensure_ascii=False))
+            else:
+                print(f"🏷️ Plantilles amb tag '{args.tag}': {len(results)}\n")
+                for t in results:
+                    print(f"  • {t['name']} ({t['filename']})")
+        
+        elif args.action == "reindex":
+            catalog = load_catalog(rebuild=True)
+            load_search_index(rebuild=True)
+            errors = {name: entry["error"] for name, entry in catalog["files"].items() if entry["error"]}
+            
+            print(json.dumps({
+                "success": True,
+                "indexed": len(catalog["files"]) - len(errors),
+                "errors": errors,
+                "index_path": str(get_templates_dir() / CATALOG_INDEX_FILENAME)
+            }, indent=2, ensure_ascii=False))
         
         elif args.action == "info":
             templates_dir = get_templates_dir()
@@ -0,0 +1,63 @@
+"""
+Tool Client - Shim de línia de comandes per al tool_daemon
+
+Manté la CLI de sempre però envia la crida al daemon resident si està actiu:
+
+    python tool_client.py git_manager status C:/projecte
+    python tool_client.py template_manager search --query web
+    python tool_client.py db-insert-utf8 execute tutor "SELECT 1"
+
+La sortida (stdout/stderr) i el codi de sortida són els mateixos que executant
+l'script directament. Si el daemon no respon (o rebutja el token), la tool
+s'executa localment. Si el daemon accepta la crida però no acaba en
+PM_TOOL_TIMEOUT segons (default 600), el client surt amb error en lloc de
+penjar-se; no es reexecuta localment perquè la crida pot estar a mig fer.
+"""
+
+import os
+import sys
+import socket
+
+from tool_daemon import TOOLS, UNAUTHORIZED, call, run_tool
+
+DEFAULT_TIMEOUT = 600
+
+
+def main(argv=None):
+    """Reenvia la crida al daemon, o l'executa localment si no està actiu."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    if not argv or argv[0] not in TOOLS:
+        print(f"Ús: python tool_client.py <tool> [arguments...]\n"
+              f"Tools: {', '.join(sorted(TOOLS))}", file=sys.stderr)
+        sys.exit(2)
+
+    tool, tool_argv = argv[0], argv[1:]
+    params = {'tool': tool, 'argv': tool_argv, 'cwd': os.getcwd()}
+
+    timeout = float(os.environ.get('PM_TOOL_TIMEOUT') or DEFAULT_TIMEOUT)
+
+    try:
+        response = call('run', params, timeout=timeout)
+    except socket.timeout:
+        print(f"El daemon no ha respost en {timeout:g} s (les crides s'executen d'una en una: "
+              f"pot estar ocupat amb una altra)", file=sys.stderr)
+        sys.exit(1)
+    except OSError:
+        response = None
+
+    if response is None or response.get('error', {}).get('code') == UNAUTHORIZED:
+        result = run_tool(tool, tool_argv)
+    elif 'error' in response:
+        print(response['error'].get('message', response['error']), file=sys.stderr)
+        sys.exit(1)
+    else:
+        result = response['result']
+
+    sys.stdout.write(result['stdout'])
+    sys.stderr.write(result['stderr'])
+    sys.exit(result['exit_code'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""
+Tool Daemon - Procés resident per a les eines MCP del Project Manager
+
+Cada acció MCP llançava un `python git_manager.py ...` nou: arrencada de
+l'intèrpret, imports (requests), argparse i els diccionaris de --info. El
+daemon importa les eines una sola vegada i executa els seus `main(argv)` dins
+del mateix procés, de manera que l'estat calent es manté entre crides:
+- Índex del catàleg i de cerca de template_manager
+- Sessions HTTP de db-insert-utf8
+- git-config.json ja llegits per git_manager
+
+Protocol: JSON-RPC 2.0, un missatge per línia (UTF-8).
+  {"jsonrpc": "2.0", "id": 1, "method": "run",
+   "params": {"tool": "git_manager", "argv": ["status", "C:/projecte"], "cwd": "..."}}
+  -> {"jsonrpc": "2.0", "id": 1, "result": {"stdout": "...", "stderr": "...", "exit_code": 0}}
+
+Mètodes: run, tools, ping, stats, shutdown
+
+Transports:
+- serve: socket Unix (Linux/macOS) o TCP a 127.0.0.1 (Windows)
+- stdio: JSON-RPC per stdin/stdout (el llança el client MCP directament)
+
+L'adreça es pot fixar amb la variable d'entorn PM_TOOL_DAEMON
+("unix:/ruta/socket" o "tcp:127.0.0.1:47321").
+
+Autenticació: el socket Unix queda amb permisos 0600 (només l'usuari). Amb
+TCP qualsevol procés local es pot connectar al port, així que en arrencar el
+daemon genera un token a ~/.pm_tool_daemon.token (0600, o PM_TOOL_DAEMON_TOKEN)
+i totes les peticions han de portar-lo a params.token; call() el llegeix sol.
+
+Concurrència: els main() de les tools escriuen a sys.stdout i canvien el cwd
+del procés, per això les crides run s'executen d'una en una (_run_lock). Una
+crida llarga fa esperar les altres; ping, tools i stats no esperen.
+"""
+
+import os
+import io
+import sys
+import hmac
+import json
+import stat
+import time
+import errno
+import socket
+import secrets
+import tempfile
+import argparse
+import threading
+import socketserver
+import importlib.util
+from contextlib import redirect_stdout, redirect_stderr
+
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Nom de la tool -> fitxer dins de tools/
+TOOLS = {
+    'git_manager': 'git_manager.py',
+    'db-insert-utf8': 'db-insert-utf8.py',
+    'template_manager': 'template_manager.py',
+    'gestio_arxius': 'gestio_arxius.py'
+}
+
+DEFAULT_TCP_PORT = 47321
+
+# Error JSON-RPC quan falta el token o no coincideix
+UNAUTHORIZED = -32001
+
+# Mòduls ja importats (estat calent entre crides)
+_modules = {}
+
+# Els main() escriuen a sys.stdout: les crides s'executen d'una en una
+_run_lock = threading.Lock()
+
+_stats = {
+    'started': time.time(),
+    'calls': 0,
+    'errors': 0,
+    'per_tool': {}
+}
+
+
+def default_address() -> str:
+    """Adreça per defecte del daemon (PM_TOOL_DAEMON o socket segons la plataforma)."""
+    env_address = os.environ.get('PM_TOOL_DAEMON')
+    if env_address:
+        return env_address
+
+    if hasattr(socket, 'AF_UNIX') and sys.platform != 'win32':
+        return 'unix:' + os.path.join(tempfile.gettempdir(), 'pm_tool_daemon.sock')
+
+    return f'tcp:127.0.0.1:{DEFAULT_TCP_PORT}'
+
+
+def token_path() -> str:
+    """Fitxer del token del daemon TCP (PM_TOOL_DAEMON_TOKEN o ~/.pm_tool_daemon.token)."""
+    return os.environ.get('PM_TOOL_DAEMON_TOKEN') or os.path.join(os.path.expanduser('~'), '.pm_tool_daemon.token')
+
+
+def read_token() -> str:
+    """Token del daemon TCP actiu, o None si no n'hi ha."""
+    try:
+        with open(token_path(), 'r', encoding='ascii') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_token(token: str):
+    """Desa el token amb permisos 0600 (temporal al mateix directori + os.replace)."""
+    path = token_path()
+    fd, temp_path = tempfile.mkstemp(prefix='.pm_tool_daemon_', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='ascii') as f:
+            f.write(token)
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def parse_address(address: str) -> tuple:
+    """Converteix 'unix:/ruta' o 'tcp:host:port' a (family, adreça de socket)."""
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+
+    if address.startswith('tcp:'):
+        host, _, port = address[len('tcp:'):].rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+    raise ValueError(f"Adreça no vàlida: {address} (cal 'unix:/ruta' o 'tcp:host:port')")
+
+
+def load_tool(tool: str):
+    """Importa (un sol cop) el mòdul d'una tool pel seu nom."""
+    if tool in _modules:
+        return _modules[tool]
+
+    if tool not in TOOLS:
+        raise ValueError(f"Tool desconeguda: {tool}. Disponibles: {', '.join(sorted(TOOLS))}")
+
+    module_name = 'pm_tool_' + tool.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(TOOLS_DIR, TOOLS[tool]))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+
+    _modules[tool] = module
+    return module
+
+
+def run_tool(tool: str, argv: list, cwd: str = None) -> dict:
+    """
+    Executa el main(argv) d'una tool dins del procés i captura la sortida.
+
+    Args:
+        tool: Nom de la tool (git_manager, db-insert-utf8, ...)
+        argv: Arguments tal com es passarien per línia de comandes
+        cwd: Directori de treball del client (per a rutes relatives)
+
+    Returns:
+        Dict amb stdout, stderr, exit_code i duration_ms
+
+    Les crides es serialitzen amb _run_lock (stdout i cwd són globals del procés).
+    """
+    module = load_tool(tool)
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    exit_code = 0
+
+    with _run_lock:
+        start = time.perf_counter()
+        previous_cwd = os.getcwd()
+        try:
+            if cwd:
+                os.chdir(cwd)
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    module.main(list(argv))
+                except SystemExit as e:
+                    if isinstance(e.code, int):
+                        exit_code = e.code
+                    elif e.code is not None:
+                        print(e.code, file=sys.stderr)
+                        exit_code = 1
+                except Exception as e:
+                    print(json.dumps({
+                        'success': False,
+                        'error': str(e),
+                        'type': type(e).__name__
+                    }, indent=2, ensure_ascii=False), file=sys.stderr)
+                    exit_code = 1
+        finally:
+            os.chdir(previous_cwd)
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        _stats['calls'] += 1
+        if exit_code != 0:
+            _stats['errors'] += 1
+        tool_stats = _stats['per_tool'].setdefault(tool, {'calls': 0, 'total_ms': 0.0})
+        tool_stats['calls'] += 1
+        tool_stats['total_ms'] = round(tool_stats['total_ms'] + duration_ms, 2)
+
+    return {
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue(),
+        'exit_code': exit_code,
+        'duration_ms': duration_ms
+    }
+
+
+class DaemonShutdown(Exception):
+    """Petició de shutdown rebuda pel daemon."""
+
+
+def handle_request(request: dict, token: str = None) -> dict:
+    """Resol un missatge JSON-RPC i retorna la resposta (token: el que cal a params.token)."""
+    request_id = request.get('id')
+    method = request.get('method')
+    params = request.get('params') or {}
+
+    if token is not None:
+        sent = params.get('token') if isinstance(params, dict) else None
+        if not isinstance(sent, str) or not hmac.compare_digest(sent.encode('utf-8'), token.encode('ascii')):
+            return {'jsonrpc': '2.0', 'id': request_id,
+                    'error': {'code': UNAUTHORIZED, 'message': 'No autoritzat: token del daemon absent o incorrecte'}}
+
+    try:
+        if method == 'run':
+            result = run_tool(params['tool'], params.get('argv', []), params.get('cwd'))
+        elif method == 'tools':
+            result = sorted(TOOLS)
+        elif method == 'ping':
+            result = {'pong': True, 'pid': os.getpid()}
+        elif method == 'stats':
+            result = dict(_stats, uptime_s=round(time.time() - _stats['started'], 1),
+                          loaded_tools=sorted(_modules))
+        elif method == 'shutdown':
+            raise DaemonShutdown()
+        else:
+            return {'jsonrpc': '2.0', 'id': request_id,
+                    'error': {'code': -32601, 'message': f'Mètode desconegut: {method}'}}
+    except DaemonShutdown:
+        raise
+    except Exception as e:
+        return {'jsonrpc': '2.0', 'id': request_id,
+                'error': {'code': -32000, 'message': str(e), 'type': type(e).__name__}}
+
+    return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+
+def _handle_line(line: bytes, token: str = None) -> tuple:
+    """Processa una línia rebuda; retorna (resposta, shutdown)."""
+    try:
+        request = json.loads(line.decode('utf-8'))
+    except ValueError as e:
+        return {'jsonrpc': '2.0', 'id': None,
+                'error': {'code': -32700, 'message': f'JSON no vàlid: {e}'}}, False
+
+    try:
+        if not isinstance(request, dict):
+            raise ValueError('la petició ha de ser un objecte')
+        return handle_request(request, token), False
+    except DaemonShutdown:
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': {'shutdown': True}}, True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Una connexió pot enviar diverses peticions (una per línia)."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response, shutdown = _handle_line(line, self.server.token)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if shutdown:
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _unix_socket_in_use(path: str) -> bool:
+    """True si hi ha un daemon escoltant a path (un socket orfe refusa la connexió)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+    return True
+
+
+def serve(address: str = None, preload: bool = True) -> dict:
+    """
+    Serveix peticions pel socket indicat fins rebre 'shutdown'.
+
+    Args:
+        address: 'unix:/ruta' o 'tcp:host:port' (default: default_address())
+        preload: Importar totes les tools en arrencar
+    """
+    address = address or default_address()
+    family, sock_address = parse_address(address)
+
+    if preload:
+        for tool in TOOLS:
+            try:
+                load_tool(tool)
+            except Exception as e:
+                print(f"Avís: no s'ha pogut carregar {tool}: {e}", file=sys.stderr)
+
+    bound_socket = None
+    if family == socket.AF_INET:
+        try:
+            server = _TCPServer(sock_address, _RequestHandler)
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+            return {'success': False, 'error': f'Ja hi ha un daemon escoltant a {address}'}
+        # El token s'escriu després del bind: un segon daemon que no pot obrir el port no el trepitja
+        server.token = secrets.token_hex(32)
+        _write_token(server.token)
+    else:
+        # Només s'esborra un socket orfe: el d'un daemon viu no es trepitja
+        if os.path.lexists(sock_address):
+            if not stat.S_ISSOCK(os.lstat(sock_address).st_mode):
+                return {'success': False, 'error': f'{sock_address} existeix i no és un socket'}
+            if _unix_socket_in_use(sock_address):
+                return {'success': False, 'error': f'Ja hi ha un daemon escoltant a {address}'}
+            os.unlink(sock_address)
+        previous_umask = os.umask(0o177)
+        try:
+            server = _UnixServer(sock_address, _RequestHandler)
+        finally:
+            os.umask(previous_umask)
+        server.token = None
+        info = os.stat(sock_address)
+        bound_socket = (info.st_dev, info.st_ino)
+
+    print(json.dumps({'success': True, 'message': 'Daemon escoltant', 'address': address,
+                      'pid': os.getpid()}, ensure_ascii=False), file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        # El socket només s'esborra si encara és el que ha creat aquest procés
+        try:
+            info = os.stat(sock_address) if bound_socket else None
+        except OSError:
+            info = None
+        if info and (info.st_dev, info.st_ino) == bound_socket:
+            os.unlink(sock_address)
+        if server.token and read_token() == server.token:
+            os.remove(token_path())
+
+    return {'success': True, 'message': 'Daemon aturat', 'calls': _stats['calls']}
+
+
+def serve_stdio() -> dict:
+    """Serveix JSON-RPC per stdin/stdout (una petició per línia)."""
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        response, shutdown = _handle_line(line)
+        stdout.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        stdout.flush()
+        if shutdown:
+            break
+
+    return {'success': True, 'message': 'Daemon aturat', 'calls': _stats['calls']}
+
+
+def call(method: str, params: dict = None, address: str = None, timeout: float = None) -> dict:
+    """
+    Envia una petició JSON-RPC al daemon i retorna la resposta.
+
+    Per TCP hi afegeix el token de token_path(). timeout=None espera indefinidament.
+
+    Raises:
+        OSError si el daemon no està escoltant (socket.timeout si no respon a temps)
+    """
+    family, sock_address = parse_address(address or default_address())
+    params = dict(params or {})
+    if family == socket.AF_INET and 'token' not in params:
+        token = read_token()
+        if token:
+            params['token'] = token
+
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(sock_address)
+        request = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+
+    if not line:
+        raise ConnectionError('El daemon ha tancat la connexió sense resposta')
+    return json.loads(line.decode('utf-8'))
+
+
+TOOL_INFO = {
+    "que_fa": "Procés resident que serveix totes les comandes de git_manager, db-insert-utf8, template_manager i gestio_arxius sense reiniciar Python a cada crida.",
+    "com_ho_fa": "Importa les tools una vegada i executa el seu main(argv) dins del procés, capturant stdout/stderr. Les crides run s'executen d'una en una (stdout i cwd són del procés): una crida llarga fa esperar les següents. Escolta JSON-RPC 2.0 (una petició per línia) per socket Unix (0600), TCP local amb token (~/.pm_tool_daemon.token, 0600) o stdio. tool_client.py manté la CLI d'avui.",
+    "que_necessita": [
+        {
+            "nom": "address",
+            "tipus": "string",
+            "descripcio": "(Opcional) 'unix:/ruta' o 'tcp:127.0.0.1:port'. Default: PM_TOOL_DAEMON o socket per plataforma."
+        }
+    ],
+    "que_retorna": "Per a cada petició run: stdout, stderr, exit_code i duration_ms (la mateixa sortida JSON que la tool per CLI).",
+    "funcions_disponibles": [
+        {
+            "nom": "serve",
+            "descripcio": "Arrenca el daemon en un socket.",
+            "parametres": ["address"]
+        },
+        {
+            "nom": "stdio",
+            "descripcio": "Serveix JSON-RPC per stdin/stdout.",
+            "parametres": []
+        },
+        {
+            "nom": "ping",
+            "descripcio": "Comprova si el daemon respon.",
+            "parametres": ["address"]
+        },
+        {
+            "nom": "stats",
+            "descripcio": "Crides servides, temps per tool i tools carregades.",
+            "parametres": ["address"]
+        },
+        {
+            "nom": "stop",
+            "descripcio": "Atura el daemon.",
+            "parametres": ["address"]
+        }
+    ]
+}
+
+
+def main(argv=None):
+    """Punt d'entrada CLI (argv=None llegeix sys.argv)"""
+    parser = argparse.ArgumentParser(description="Daemon resident per a les tools del Project Manager.")
+    parser.add_argument("--info", action="store_true", help="Mostra la informació d'autodescripció de la tool.")
+
+    subparsers = parser.add_subparsers(dest="command", help="Comandes disponibles")
+
+    parser_serve = subparsers.add_parser("serve", help="Arrenca el daemon en un socket.")
+    parser_serve.add_argument("--address", type=str, default=None, help="'unix:/ruta' o 'tcp:host:port'.")
+    parser_serve.add_argument("--no_preload", action="store_true", help="No importar les tools fins la primera crida.")
+
+    subparsers.add_parser("stdio", help="Serveix JSON-RPC per stdin/stdout.")
+
+    for name, help_text in (("ping", "Comprova si el daemon respon."),
+                            ("stats", "Mostra estadístiques del daemon."),
+                            ("stop", "Atura el daemon.")):
+        parser_cmd = subparsers.add_parser(name, help=help_text)
+        parser_cmd.add_argument("--address", type=str, default=None, help="'unix:/ruta' o 'tcp:host:port'.")
+
+    args = parser.parse_args(argv)
+
+    if args.info:
+        print(json.dumps(TOOL_INFO, indent=2, ensure_ascii=False))
+    elif args.command == "serve":
+        result = serve(args.address, preload=not args.no_preload)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        if not result['success']:
+            sys.exit(1)
+    elif args.command == "stdio":
+        serve_stdio()
+    elif args.command in ("ping", "stats", "stop"):
+        method = 'shutdown' if args.command == 'stop' else args.command
+        try:
+            response = call(method, address=args.address, timeout=10)
+            result = {'success': 'error' not in response, **response.get('result', response.get('error', {}))}
+        except OSError as e:
+            result = {'success': False, 'error': f'Daemon no disponible: {e}'}
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        if not result['success']:
+            sys.exit(1)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()